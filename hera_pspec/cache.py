@@ -0,0 +1,424 @@
+"""
+Bounded, memory-aware caches for the matrices used by PSpecData.
+"""
+import os
+import hashlib
+import tempfile
+import zipfile
+import numpy as np
+from collections import OrderedDict as odict
+
+
+class MatrixCache(object):
+
+    def __init__(self, max_bytes=None):
+        """
+        Dictionary-like cache of arrays with least-recently-used (LRU)
+        eviction once the arrays it holds exceed a byte budget.
+
+        Entries can be pinned, in which case they count towards the size of
+        the cache but are never evicted. This is used for matrices injected
+        by the user (e.g. with PSpecData.set_R), which cannot be recomputed.
+        The most recently inserted entry is never evicted either, so that a
+        value can always be read back right after it was stored, even if it
+        is larger than the budget on its own.
+
+        Membership tests (key in cache) are counted as cache hits or misses.
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            Maximum total size in bytes of the arrays held by the cache.
+            Default: None (unbounded).
+        """
+        self._data = odict()
+        self._nbytes = odict()
+        self._pinned = set()
+        self.nbytes = 0
+        self.set_max_bytes(max_bytes)
+        self.reset_stats()
+
+    def set_max_bytes(self, max_bytes=None):
+        """
+        Set the byte budget of the cache, evicting entries if needed.
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            Maximum total size in bytes of the arrays held by the cache.
+            Default: None (unbounded).
+        """
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError("max_bytes must be None or non-negative")
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def reset_stats(self):
+        """
+        Reset the hit, miss and eviction counters.
+        """
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+    def stats(self):
+        """
+        Return usage statistics of the cache.
+
+        Returns
+        -------
+        stats : dict
+            Dictionary with the number of entries ('size'), pinned entries
+            ('pinned'), bytes held ('nbytes'), byte budget ('max_bytes'),
+            and the 'hits', 'misses' and 'evictions' counters.
+        """
+        return dict(size=len(self._data), pinned=len(self._pinned),
+                    nbytes=self.nbytes, max_bytes=self.max_bytes,
+                    hits=self.hits, misses=self.misses,
+                    evictions=self.evictions)
+
+    def set(self, key, value, pinned=False):
+        """
+        Insert an entry into the cache.
+
+        Parameters
+        ----------
+        key : hashable
+            Key of the entry.
+
+        value : array_like
+            Value of the entry.
+
+        pinned : bool, optional
+            If True, the entry is never evicted. Default: False.
+        """
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = value
+        self._nbytes[key] = _sizeof(value)
+        self.nbytes += self._nbytes[key]
+        if pinned:
+            self._pinned.add(key)
+        self._evict()
+
+    def get(self, key, default=None):
+        """
+        Read an entry from the cache, counting a hit or a miss.
+
+        Unlike a membership test followed by indexing, this cannot fail if
+        the entry is evicted in between, so it should be used whenever other
+        entries may be inserted before the value is read.
+
+        Parameters
+        ----------
+        key : hashable
+            Key of the entry.
+
+        default : optional
+            Value returned if the entry is not in the cache. Default: None.
+
+        Returns
+        -------
+        value : array_like
+            Value of the entry, or default.
+        """
+        if key not in self._data:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return self[key]
+
+    def is_pinned(self, key):
+        """
+        Whether an entry is in the cache and pinned (see set).
+
+        Parameters
+        ----------
+        key : hashable
+            Key of the entry.
+
+        Returns
+        -------
+        pinned : bool
+            True if the entry is pinned. Does not count a hit or a miss.
+        """
+        return key in self._pinned
+
+    def _remove(self, key):
+        del self._data[key]
+        self.nbytes -= self._nbytes.pop(key)
+        self._pinned.discard(key)
+
+    def _evict(self):
+        # evict least recently used entries until within budget, skipping
+        # pinned entries and the most recently inserted one
+        if self.max_bytes is None or self.nbytes <= self.max_bytes:
+            return
+        for key in list(self._data.keys())[:-1]:
+            if self.nbytes <= self.max_bytes:
+                break
+            if key not in self._pinned:
+                self._remove(key)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all entries from the cache. Statistics are kept.
+        """
+        self._data.clear()
+        self._nbytes.clear()
+        self._pinned.clear()
+        self.nbytes = 0
+
+    def __contains__(self, key):
+        if key in self._data:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        if key not in self._data:
+            raise KeyError(key)
+        self._remove(key)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+
+def _sizeof(value):
+    """
+    Size in bytes of an array, or of a tuple or list of arrays.
+    """
+    if isinstance(value, (tuple, list)):
+        return sum([_sizeof(v) for v in value])
+    return getattr(value, 'nbytes', 0)
+
+
+class DiskCache(object):
+
+    # number of writes after which the cache directory is scanned again
+    # while the tracked size is within budget, to account for entries
+    # written or evicted by other processes
+    rescan_interval = 100
+
+    def __init__(self, cache_dir, max_bytes=None):
+        """
+        Persistent cache of sets of named arrays, stored in a directory as
+        one npz file per entry, named by a hash of the entry key. Entries
+        therefore survive between processes and runs.
+
+        The cache can be shared by several processes: entries are written
+        to a temporary file and atomically renamed into place, so readers
+        never see partially written entries, and entries that cannot be
+        read (e.g. because another process just evicted them) are treated
+        as cache misses.
+
+        Parameters
+        ----------
+        cache_dir : str
+            Path to the cache directory. Created if it does not exist.
+
+        max_bytes : int, optional
+            Maximum total size in bytes of the cache files. Once exceeded
+            after a write, the least recently used entries are deleted.
+            The size is tracked in memory between scans of the cache
+            directory, which happen when the tracked size exceeds the budget
+            or every rescan_interval writes. Default: None (unbounded).
+        """
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError("max_bytes must be None or non-negative")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        if not os.path.exists(cache_dir):
+            try:
+                os.makedirs(cache_dir)
+            except OSError:
+                # another process may have created it in the meantime
+                if not os.path.isdir(cache_dir):
+                    raise
+        # total size of the cache files as of the last scan plus the writes
+        # since, or None before the first scan
+        self._nbytes = None
+        self._writes = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """
+        Reset the hit, miss and eviction counters.
+        """
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+    def stats(self):
+        """
+        Return usage statistics of the cache.
+
+        Returns
+        -------
+        stats : dict
+            Dictionary with the number of entries ('size'), bytes held
+            ('nbytes'), byte budget ('max_bytes'), and the 'hits', 'misses'
+            and 'evictions' counters of this process.
+        """
+        entries = self._entries()
+        return dict(size=len(entries),
+                    nbytes=sum([e[1] for e in entries]),
+                    max_bytes=self.max_bytes, hits=self.hits,
+                    misses=self.misses, evictions=self.evictions)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, hash_key(key) + '.npz')
+
+    def _entries(self):
+        # (last use, size, path) of all entries
+        entries = []
+        for fname in os.listdir(self.cache_dir):
+            if not fname.endswith('.npz'):
+                continue
+            path = os.path.join(self.cache_dir, fname)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def get(self, key):
+        """
+        Read an entry from the cache.
+
+        Parameters
+        ----------
+        key : tuple
+            Key of the entry (see hash_key).
+
+        Returns
+        -------
+        value : dict
+            Dictionary of arrays stored under key, or None if the entry
+            does not exist or cannot be read.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as f:
+                value = dict([(k, f[k]) for k in f.files])
+        except (IOError, OSError, EOFError, ValueError, KeyError,
+                zipfile.BadZipfile):
+            self.misses += 1
+            return None
+        # mark as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def set(self, key, **arrays):
+        """
+        Write an entry to the cache, replacing an existing entry.
+
+        Parameters
+        ----------
+        key : tuple
+            Key of the entry (see hash_key).
+
+        arrays : array_like
+            Arrays to store, passed as keyword arguments.
+        """
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+                size = f.tell()
+            try:
+                size -= os.stat(path).st_size
+            except OSError:
+                pass
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        if self._nbytes is not None:
+            self._nbytes += size
+        self._writes += 1
+        self._evict()
+
+    def _evict(self):
+        # delete least recently used entries until within budget, scanning
+        # the cache directory only if the tracked size exceeds the budget or
+        # after rescan_interval writes
+        if self.max_bytes is None:
+            return
+        if self._nbytes is not None and self._nbytes <= self.max_bytes \
+                and self._writes < self.rescan_interval:
+            return
+        entries = sorted(self._entries())
+        nbytes = sum([e[1] for e in entries])
+        for mtime, size, path in entries:
+            if nbytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                # already removed by another process
+                pass
+            nbytes -= size
+        self._nbytes, self._writes = nbytes, 0
+
+    def clear(self):
+        """
+        Remove all entries from the cache directory.
+        """
+        for mtime, size, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._nbytes = 0
+
+
+def hash_key(key):
+    """
+    Hash a cache key into a hex string that is stable across processes,
+    sessions and platforms.
+
+    Parameters
+    ----------
+    key : tuple
+        Key made of (nested tuples of) str, bytes, bool, int, float, None
+        and numpy scalars, which are converted to Python scalars first.
+
+    Returns
+    -------
+    hash : str
+        SHA-1 hex digest of the key.
+    """
+    def plain(x):
+        if isinstance(x, (tuple, list)):
+            return tuple([plain(_x) for _x in x])
+        if isinstance(x, np.generic):
+            return x.item()
+        return x
+    return hashlib.sha1(repr(plain(key)).encode('utf-8')).hexdigest()
@@ -2,6 +2,7 @@ import numpy as np
 import h5py
 import argparse
 import time
+import os
 from functools import wraps
 
 from . import uvpspec, version, utils
@@ -188,7 +189,7 @@ class PSpecContainer(object):
         self.data.close()
         self.data = None
     
-    def _store_pspec(self, pspec_group, uvp):
+    def _store_pspec(self, pspec_group, uvp, dedupe=False):
         """
         Store a UVPSpec object as group of datasets within the HDF5 file.
 
@@ -199,6 +200,11 @@ class PSpecContainer(object):
 
         uvp : UVPSpec
             Object containing power spectrum and related data.
+
+        dedupe : bool, optional
+            If True, store only the distinct baseline-pair time slices of
+            the window function and covariance arrays (see
+            UVPSpec.write_to_group). Default: False.
         """
         if self.mode == 'r':
             raise IOError("HDF5 file was opened read-only; cannot write to file.")
@@ -207,7 +213,7 @@ class PSpecContainer(object):
         assert isinstance(uvp, uvpspec.UVPSpec)
 
         # Write UVPSpec to group
-        uvp.write_to_group(pspec_group, run_check=True)
+        uvp.write_to_group(pspec_group, run_check=True, dedupe=dedupe)
 
     def _load_pspec(self, pspec_group, **kwargs):
         """
@@ -265,7 +271,7 @@ class PSpecContainer(object):
             hdr.attrs['hera_pspec.git_hash'] = version.git_hash
     
     @transactional
-    def set_pspec(self, group, psname, pspec, overwrite=False):
+    def set_pspec(self, group, psname, pspec, overwrite=False, dedupe=False):
         """
         Store a delay power spectrum in the container.
 
@@ -283,6 +289,11 @@ class PSpecContainer(object):
         overwrite : bool, optional
             If the power spectrum already exists in the file, whether it should
             overwrite it or raise an error. Default: False (does not overwrite).
+
+        dedupe : bool, optional
+            If True, store only the distinct baseline-pair time slices of
+            the window function and covariance arrays, which are expanded
+            again by get_pspec (see UVPSpec.write_to_group). Default: False.
         """
         if self.mode == 'r':
             raise IOError("HDF5 file was opened read-only; cannot write to file.")
@@ -298,7 +309,8 @@ class PSpecContainer(object):
                     if not isinstance(_pspec, uvpspec.UVPSpec):
                         raise TypeError("pspec lists must only contain UVPSpec "
                                         "objects.")
-                    self.set_pspec(group, _psname, _pspec, overwrite=overwrite)
+                    self.set_pspec(group, _psname, _pspec, overwrite=overwrite,
+                                   dedupe=dedupe, nested=True)
                 return
             else:
                 # Raise exception if psname is a list, but pspec is not
@@ -343,11 +355,109 @@ class PSpecContainer(object):
                    % (key1, key2) )
 
         # Add power spectrum to this group
-        self._store_pspec(psgrp, pspec)
+        self._store_pspec(psgrp, pspec, dedupe=dedupe)
 
         # Store info about what kind of power spectra are in the group
         psgrp.attrs['pspec_type'] = pspec.__class__.__name__
 
+    @transactional
+    def append_pspec(self, group, psname, pspec, dedupe=False):
+        """
+        Append the baseline-pair times of a delay power spectrum to a power
+        spectrum in the container, creating it if it does not exist yet.
+
+        New power spectra are stored with resizable datasets (see
+        UVPSpec.write_to_group), so that a long run can write blocks of
+        baseline-pairs to disk as they are computed rather than holding the
+        full power spectrum in memory. Every block written is kept if the
+        run fails later on.
+
+        Parameters
+        ----------
+        group : str
+            Which group the power spectrum belongs to.
+
+        psname : str
+            The name of the power spectrum to append to.
+
+        pspec : UVPSpec
+            Power spectrum to append. Its spectral windows, delays and
+            polarization pairs must match those of the stored spectrum.
+
+        dedupe : bool, optional
+            If True and the power spectrum does not exist yet, store only
+            the distinct baseline-pair time slices of its window function
+            and covariance arrays, and of those appended later (see
+            UVPSpec.write_to_group). Ignored when appending to an existing
+            power spectrum, which keeps its layout. Default: False.
+        """
+        if self.mode == 'r':
+            raise IOError("HDF5 file was opened read-only; cannot write to file.")
+        if self.swmr:
+            raise ValueError("Cannot append to datasets with SWMR")
+        if not isinstance(pspec, uvpspec.UVPSpec):
+            raise TypeError("pspec must be a UVPSpec object.")
+
+        key1 = "%s" % group
+        key2 = "%s" % psname
+
+        # Check that the group exists
+        if key1 not in list(self.data.keys()):
+            grp = self.data.create_group(key1)
+        else:
+            grp = self.data[key1]
+
+        if key2 not in list(grp.keys()):
+            psgrp = grp.create_group(key2)
+            pspec.write_to_group(psgrp, run_check=True, appendable=True,
+                                 dedupe=dedupe)
+            psgrp.attrs['pspec_type'] = pspec.__class__.__name__
+        else:
+            pspec.append_to_group(grp[key2], run_check=True)
+
+    @transactional
+    def _copy_pspecs(self, shard, overwrite=False):
+        """
+        Copy all power spectra of another container file into this
+        container, keeping their group and spectra names. The HDF5 groups
+        are copied directly, so the spectra are not loaded into memory.
+
+        Parameters
+        ----------
+        shard : str
+            Path to the HDF5 file of the container to copy from.
+
+        overwrite : bool, optional
+            If True, overwrite spectra that already exist in the container.
+            Otherwise an error is raised before anything is copied.
+            Default: False.
+        """
+        if self.mode == 'r':
+            raise IOError("HDF5 file was opened read-only; cannot write to file.")
+        if self.swmr:
+            raise ValueError("Cannot write new group or dataset with SWMR")
+
+        spsc = PSpecContainer(shard, mode='r')
+        try:
+            tree = spsc.tree(return_str=False)
+            if not overwrite:
+                for grp, psnames in tree.items():
+                    for psname in psnames:
+                        if grp in self.data and psname in self.data[grp]:
+                            raise AttributeError(
+                                "Power spectrum %s/%s already exists and "
+                                "overwrite=False." % (grp, psname))
+            for grp, psnames in tree.items():
+                if grp not in self.data:
+                    self.data.create_group(grp)
+                for psname in psnames:
+                    if psname in self.data[grp]:
+                        del self.data[grp][psname]
+                    spsc.data.copy(spsc.data[grp][psname], self.data[grp],
+                                   name=psname)
+        finally:
+            spsc._close()
+
     @transactional
     def get_pspec(self, group, psname=None, **kwargs):
         """
@@ -603,6 +713,50 @@ def combine_psc_spectra(psc, groups=None, dset_split_str='_x_', ext_split_str='_
     
 
 
+def merge_psc_shards(psc, shards, overwrite=False, remove_shards=True,
+                     verbose=True):
+    """
+    Copy all power spectra stored in a set of shard containers into one
+    PSpecContainer, keeping their group and spectra names. This is used to
+    gather the output of parallel workers that each wrote into their own
+    container, so that they do not contend on a single HDF5 file.
+
+    The HDF5 groups of the spectra of each shard are copied in a single
+    transaction, without loading the spectra into memory, so that the
+    target container is only opened once per shard.
+
+    Parameters
+    ----------
+    psc : PSpecContainer object or str
+        Container to write the spectra into, or path to its HDF5 file.
+
+    shards : list of str
+        Paths to the HDF5 files of the shard containers.
+
+    overwrite : bool, optional
+        If True, overwrite spectra that already exist in psc. Otherwise
+        an error is raised. Default: False.
+
+    remove_shards : bool, optional
+        If True, delete each shard file once its spectra have been copied.
+        Default: True.
+
+    verbose : bool, optional
+        If True, report feedback to stdout. Default: True.
+    """
+    # Load container
+    if isinstance(psc, (str, np.str)):
+        psc = PSpecContainer(psc, mode='rw')
+    else:
+        assert isinstance(psc, PSpecContainer)
+
+    for shard in shards:
+        if verbose: print("Merging {}".format(shard))
+        psc._copy_pspecs(shard, overwrite=overwrite)
+        if remove_shards:
+            os.remove(shard)
+
+
 def get_combine_psc_spectra_argparser():
     a = argparse.ArgumentParser(
         description="argument parser for hera_pspec.container.combine_psc_spectra")
@@ -1,7 +1,9 @@
 import numpy as np
+from scipy.linalg import toeplitz
 from pyuvdata import UVData, UVCal
-import copy, operator, itertools, sys
+import copy, operator, itertools, sys, collections, hashlib
 from collections import OrderedDict as odict
+from concurrent.futures import ThreadPoolExecutor
 import hera_cal as hc
 from pyuvdata import utils as uvutils
 import datetime
@@ -11,15 +13,30 @@ import ast
 import glob
 import warnings
 import json
+import os
+import shutil
+import tempfile
+import multiprocessing
 import uvtools.dspec as dspec
 
 from . import uvpspec, utils, version, pspecbeam, container, uvpspec_utils as uvputils
+from .cache import MatrixCache, DiskCache
 
 
 class PSpecData(object):
 
+    # names of the matrix caches, stored in attributes '_' + name. The
+    # data caches hold per-baseline matrices derived from the data and
+    # flags of the current spw, while the normalization caches are keyed on
+    # everything they depend on (see _identity_GH_key and _dayenu_R_key), so
+    # they can be kept across spectral windows, dataset pairs and calls to
+    # pspec
+    data_cache_names = ['C', 'I', 'iC', 'Y', 'R']
+    norm_cache_names = ['identity_G', 'identity_H', 'identity_MW', 'dayenu_R']
+    cache_names = data_cache_names + norm_cache_names
+
     def __init__(self, dsets=[], wgts=None, dsets_std=None, labels=None,
-                 beam=None, cals=None, cal_flag=True):
+                 beam=None, cals=None, cal_flag=True, lazy_cal=False):
         """
         Object to store multiple sets of UVData visibilities and perform
         operations such as power spectrum estimation on them.
@@ -56,8 +73,14 @@ class PSpecData(object):
 
         cal_flag : bool, optional
             If True, propagate flags from calibration into data
+
+        lazy_cal : bool, optional
+            If True, defer calibration of each baseline until its data is
+            first accessed. See add.
         """
-        self.clear_cache()  # clear matrix cache
+        # matrix caches (see set_cache_size)
+        for name in self.cache_names:
+            setattr(self, '_' + name, MatrixCache())
         self.dsets = []; self.wgts = []; self.labels = []
         self.dsets_std = []
         self.Nfreqs = None
@@ -74,6 +97,33 @@ class PSpecData(object):
         self.data_weighting = 'identity'
         self.taper = 'none'
         self.symmetric_taper = True
+        # hit/miss counters of the identity-weighting G and H cache used by
+        # pspec (see _identity_GH_key)
+        self.identity_cache_stats = {'hits': 0, 'misses': 0}
+        # use the rank-1 structure of Q_alt to compute G and H by default
+        self.norm_engine = 'rank1'
+        # delay operators for the current spectral window (see
+        # get_spw_operators)
+        self._spw_ops, self._spw_ops_key = {}, None
+        # optional persistent cache of the identity-weighting normalization
+        # matrices (see set_norm_cache_dir)
+        self._norm_disk_cache = None
+        # deferred calibration (cal, cal_flag) of each dataset, or None, the
+        # (dset, ant1, ant2) baselines it was applied to, and the units of
+        # the calibrated baselines of partially calibrated (dset, 0)
+        # datasets and (dset, 1) dsets_std (see add)
+        self._lazy_cals = []
+        self._lazy_cal_applied = set()
+        self._lazy_cal_units = {}
+        # contiguous data, weight and standard deviation cubes of the
+        # baselines of the current pspec call (see _set_data_cubes)
+        self._data_cubes = {}
+        # auto-correlations and median nsample of each dataset and spectral
+        # window, for the 'autos' covariance model (see _auto_variance)
+        self._auto_cubes = {}
+        # beam scalars of each spw and polarization pair, shared by the
+        # chunks of pspec_iter, or None outside of it
+        self._iter_scalars = None
         # Set all weights to None if wgts=None
         if wgts is None:
             wgts = [None for dset in dsets]
@@ -84,12 +134,31 @@ class PSpecData(object):
 
         # Store the input UVData objects if specified
         if len(dsets) > 0:
-            self.add(dsets, wgts, dsets_std=dsets_std, labels=labels, cals=cals, cal_flag=cal_flag)
+            self.add(dsets, wgts, dsets_std=dsets_std, labels=labels,
+                     cals=cals, cal_flag=cal_flag, lazy_cal=lazy_cal)
 
         # Store a primary beam
         self.primary_beam = beam
 
-    def add(self, dsets, wgts, labels=None, dsets_std=None, cals=None, cal_flag=True):
+    @property
+    def primary_beam(self):
+        """
+        PSpecBeam object containing information about the primary beam, or
+        None.
+        """
+        return self._primary_beam
+
+    @primary_beam.setter
+    def primary_beam(self, beam):
+        # G and H computed with exact_norm depend on the beam, which is not
+        # part of the identity-weighting cache keys, so drop the cached ones
+        if getattr(self, '_primary_beam', None) is not beam:
+            self.clear_cache(caches=['identity_G', 'identity_H',
+                                     'identity_MW'])
+        self._primary_beam = beam
+
+    def add(self, dsets, wgts, labels=None, dsets_std=None, cals=None,
+            cal_flag=True, lazy_cal=False):
         """
         Add a dataset to the collection in this PSpecData object.
 
@@ -120,6 +189,17 @@ class PSpecData(object):
 
         cal_flag : bool, optional
             If True, propagate flags from calibration into data
+
+        lazy_cal : bool, optional
+            If True, calibrate each baseline of dsets and dsets_std in place
+            the first time its data, weights or autocorrelations are
+            accessed by this object, rather than calibrating whole datasets
+            up front, so that the cost of calibration scales with the
+            baselines used. Operations on whole datasets (broadcast_dset_flags,
+            rephase_to_dset and Jy_to_mK) calibrate all baselines first.
+            Data accessed directly from dsets before that may be
+            uncalibrated, and vis_units of dsets and dsets_std are only
+            updated once all their baselines are calibrated. Default: False.
         """
         # Check for dicts and unpack into an ordered list if found
         if isinstance(dsets, dict):
@@ -208,13 +288,21 @@ class PSpecData(object):
 
         # Apply calibration if provided
         for dset, dset_std, cal in zip(dsets, dsets_std, cals):
-            if cal is not None:
-                if dset is not None:
+            if cal is None:
+                self._lazy_cals.append(None)
+                continue
+            if lazy_cal:
+                self._lazy_cals.append((cal, cal_flag))
+            else:
+                self._lazy_cals.append(None)
+            if dset is not None:
+                if not lazy_cal:
                     uvutils.uvcalibrate(dset, cal, inplace=True, prop_flags=cal_flag)
-                    dset.extra_keywords['calibration'] = cal.extra_keywords.get('filename', '""')
-                if dset_std is not None:
+                dset.extra_keywords['calibration'] = cal.extra_keywords.get('filename', '""')
+            if dset_std is not None:
+                if not lazy_cal:
                     uvutils.uvcalibrate(dset_std, cal, inplace=True, prop_flags=cal_flag)
-                    dset_std.extra_keywords['calibration'] = cal.extra_keywords.get('filename', '""')
+                dset_std.extra_keywords['calibration'] = cal.extra_keywords.get('filename', '""')
 
         # Append to list
         self.dsets += dsets
@@ -243,6 +331,54 @@ class PSpecData(object):
         self.spw_Nfreqs = self.Nfreqs
         self.spw_Ndlys = self.spw_Nfreqs
 
+    def _apply_lazy_cal(self, dset, antpairs=None):
+        """
+        Apply deferred calibration (see add) to baselines of a dataset and
+        its standard deviations, skipping those already calibrated.
+
+        Parameters
+        ----------
+        dset : int
+            Index of the dataset.
+
+        antpairs : list of tuples, optional
+            Baselines to calibrate, as antenna-pair tuples. Polarizations
+            in the tuples are ignored: all polarizations are calibrated.
+            Default: None (all baselines, after which vis_units of the
+            dataset and its standard deviations are updated).
+        """
+        if dset >= len(self._lazy_cals) or self._lazy_cals[dset] is None:
+            return
+        cal, cal_flag = self._lazy_cals[dset]
+        uvds = [self.dsets[dset], self.dsets_std[dset]]
+        all_bls = antpairs is None
+        if all_bls:
+            antpairs = self.dsets[dset].get_antpairs()
+
+        # baselines are calibrated in both orientations at once
+        keys = set([(dset, min(ap[:2]), max(ap[:2])) for ap in antpairs])
+        keys = sorted(keys.difference(self._lazy_cal_applied))
+        for i, uvd in enumerate(uvds):
+            if uvd is None or len(keys) == 0:
+                continue
+            inds = np.unique(np.concatenate(
+                        [uvd.antpair2ind(key[1:], ordered=False)
+                         for key in keys]).astype(int))
+            if len(inds) == 0:
+                continue
+            sub = uvd.select(blt_inds=inds, inplace=False)
+            uvutils.uvcalibrate(sub, cal, inplace=True, prop_flags=cal_flag)
+            uvd.data_array[inds] = sub.data_array
+            uvd.flag_array[inds] = sub.flag_array
+            # the other baselines are still in the original units
+            self._lazy_cal_units[(dset, i)] = sub.vis_units
+        self._lazy_cal_applied.update(keys)
+
+        if all_bls:
+            for i, uvd in enumerate(uvds):
+                if uvd is not None and (dset, i) in self._lazy_cal_units:
+                    uvd.vis_units = self._lazy_cal_units.pop((dset, i))
+
     def __str__(self):
         """
         Print basic info about this PSpecData object.
@@ -363,7 +499,7 @@ class PSpecData(object):
         except KeyError:
             return False
 
-    def clear_cache(self, keys=None):
+    def clear_cache(self, keys=None, caches=None):
         """
         Clear stored matrix data (or some subset of it).
 
@@ -372,10 +508,16 @@ class PSpecData(object):
         keys : list of tuples, optional
             List of keys to remove from matrix cache. If None, all
             keys will be removed. Default: None.
+
+        caches : list of str, optional
+            Names of the caches to clear entirely if keys is None, out of
+            self.cache_names. Default: None (all caches).
         """
         if keys is None:
-            self._C, self._I, self._iC, self._Y, self._R = {}, {}, {}, {}, {}
-            self._identity_G, self._identity_H, self._identity_Y = {}, {}, {}
+            if caches is None:
+                caches = self.cache_names
+            for name in caches:
+                getattr(self, '_' + name).clear()
         else:
             for k in keys:
                 try: del(self._C[k])
@@ -391,6 +533,71 @@ class PSpecData(object):
                 try: del(self._R[k])
                 except(KeyError): pass
 
+    def set_cache_size(self, max_bytes=None, caches=None):
+        """
+        Set the memory budget of the matrix caches. Once the matrices held
+        by a cache exceed its budget, the least recently used ones are
+        evicted and recomputed when needed again. Matrices set by hand with
+        set_C, set_iC or set_R are never evicted.
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            Maximum size in bytes of each of the selected caches.
+            Default: None (unbounded).
+
+        caches : list of str, optional
+            Names of the caches to size, out of self.cache_names.
+            Default: None (all caches).
+        """
+        if caches is None:
+            caches = self.cache_names
+        for name in caches:
+            if name not in self.cache_names:
+                raise ValueError("cache '{}' not recognized, must be one of "
+                                 "{}".format(name, self.cache_names))
+            getattr(self, '_' + name).set_max_bytes(max_bytes)
+
+    def cache_stats(self):
+        """
+        Return usage statistics of the matrix caches.
+
+        Returns
+        -------
+        stats : dict
+            Statistics of each cache in self.cache_names (see
+            MatrixCache.stats), keyed by cache name.
+        """
+        return odict([(name, getattr(self, '_' + name).stats())
+                      for name in self.cache_names])
+
+    def set_norm_cache_dir(self, cache_dir=None, max_bytes=None):
+        """
+        Set a directory in which pspec persists the identity-weighting
+        normalization matrices (G, H, M and W), so that they can be reused
+        by later runs and by other processes computing power spectra with
+        the same spectral windows, flag patterns and normalization settings.
+
+        Entries are keyed on the frequencies of the spectral window rather
+        than on its channel indices. Normalization matrices computed with
+        exact_norm=True depend on the primary beam and are not persisted.
+
+        Parameters
+        ----------
+        cache_dir : str, optional
+            Path to the cache directory, created if it does not exist.
+            Default: None (disable the on-disk cache).
+
+        max_bytes : int, optional
+            Maximum total size in bytes of the cache directory, beyond which
+            the least recently used entries are deleted.
+            Default: None (unbounded).
+        """
+        if cache_dir is None:
+            self._norm_disk_cache = None
+        else:
+            self._norm_disk_cache = DiskCache(cache_dir, max_bytes=max_bytes)
+
     def dset_idx(self, dset):
         """
         Return the index of a dataset, regardless of whether it was specified
@@ -483,6 +690,10 @@ class PSpecData(object):
             Array of data from the requested UVData dataset and baseline.
         """
         dset, bl = self.parse_blkey(key)
+        cube = self._data_cube_view('x', dset, bl, include_extension)
+        if cube is not None:
+            return cube
+        self._apply_lazy_cal(dset, [bl])
         spw = slice(*self.get_spw(include_extension=include_extension))
         return self.dsets[dset].get_data(bl).T[spw]
 
@@ -509,6 +720,10 @@ class PSpecData(object):
         """
         assert isinstance(key, tuple)
         dset,bl = self.parse_blkey(key)
+        cube = self._data_cube_view('dx', dset, bl, include_extension)
+        if cube is not None:
+            return cube
+        self._apply_lazy_cal(dset, [bl])
         spw = slice(*self.get_spw(include_extension=include_extension))
         return self.dsets_std[dset].get_data(bl).T[spw]
 
@@ -534,15 +749,107 @@ class PSpecData(object):
             Array of weights for the requested UVData dataset and baseline.
         """
         dset, bl = self.parse_blkey(key)
+        cube = self._data_cube_view('w', dset, bl, include_extension)
+        if cube is not None:
+            return cube
         spw = slice(*self.get_spw(include_extension=include_extension))
         if self.wgts[dset] is not None:
             return self.wgts[dset].get_data(bl).T[spw]
         else:
             # If weights were not specified, use the flags built in to the
             # UVData dataset object
+            self._apply_lazy_cal(dset, [bl])
             wgts = (~self.dsets[dset].get_flags(bl)).astype(float).T[spw]
             return wgts
 
+    def _set_data_cubes(self, keys):
+        """
+        Gather the data, weights and standard deviations of a set of
+        baselines into contiguous (Nbls, Nfreqs, Ntimes) cubes covering the
+        current spectral window (including filter extensions), replacing
+        any existing cubes. Until the cubes are cleared, x, w and dx return
+        read-only views into them for these baselines instead of indexing
+        the UVData objects on every call.
+
+        The cubes are a snapshot of the datasets. They are built by pspec
+        for the baselines of the spectral window and polarization being
+        computed, and cleared at the end of the call and by the methods
+        editing the datasets (see _clear_data_cubes).
+
+        Parameters
+        ----------
+        keys : list of tuples
+            Keys of the form (dset, bl, pol) (see parse_blkey). Baselines
+            absent from a dataset, present in both orientations, or with a
+            number of times differing from the other baselines are left out,
+            and fall back to indexing the UVData objects.
+        """
+        self._clear_data_cubes()
+        start, stop = self.get_spw(include_extension=True)
+        if start < 0 or stop > self.Nfreqs:
+            return
+        freqs = np.arange(start, stop)
+
+        # unique baseline(pol) keys of each dataset
+        dset_bls = odict()
+        for key in keys:
+            dset, bl = self.parse_blkey(key)
+            if len(bl) == 3:
+                dset_bls.setdefault(dset, odict())[bl] = None
+
+        for dset, bls in dset_bls.items():
+            bls = list(bls.keys())
+            self._apply_lazy_cal(dset, bls)
+            kinds = [('x', self.dsets[dset]), ('dx', self.dsets_std[dset])]
+            if self.wgts[dset] is None:
+                kinds.append(('w', self.dsets[dset]))
+            index = {}
+            for kind, uvd in kinds:
+                if uvd is None:
+                    continue
+                # datasets share the index of the baselines they hold
+                if id(uvd) not in index:
+                    index[id(uvd)] = _blt_index(uvd, bls)
+                rows, blt_inds, pol_inds, conj = index[id(uvd)]
+                if len(rows) == 0:
+                    continue
+                blt_inds = blt_inds[:, :, None]
+                pol_inds = pol_inds[:, None, None]
+                if kind == 'w':
+                    cube = (~uvd.flag_array[blt_inds, 0, freqs, pol_inds]
+                            ).astype(float)
+                else:
+                    cube = uvd.data_array[blt_inds, 0, freqs, pol_inds]
+                    cube[conj] = cube[conj].conj()
+                # store with frequency ahead of time, as returned by x()
+                cube = np.ascontiguousarray(cube.transpose(0, 2, 1))
+                cube.flags.writeable = False
+                self._data_cubes[(kind, dset)] = (rows, (start, stop), cube)
+
+    def _clear_data_cubes(self):
+        """
+        Clear the data cubes built by _set_data_cubes, and the
+        auto-correlations read by _auto_variance. Called by the methods
+        editing the datasets.
+        """
+        self._data_cubes = {}
+        self._auto_cubes = {}
+
+    def _data_cube_view(self, kind, dset, bl, include_extension=False):
+        """
+        Return the view of a baseline in a data cube of the current spectral
+        window, or None if it is not held by a cube.
+        """
+        if (kind, dset) not in self._data_cubes:
+            return None
+        rows, (start, stop), cube = self._data_cubes[(kind, dset)]
+        if bl not in rows:
+            return None
+        spw = self.get_spw(include_extension=include_extension)
+        if spw[0] < start or spw[1] > stop:
+            return None
+        return cube[rows[bl], spw[0] - start:spw[1] - start]
+
     def set_C(self, cov):
         """
         Set the cached covariance matrix to a set of user-provided values.
@@ -554,10 +861,12 @@ class PSpecData(object):
             The key should conform to
             (dset_pair_index, blpair_int, model, time_index, conj_1, conj_2).
             e.g. ((0, 1), ((25,37,"xx"), (25, 37, "xx")), 'empirical', False, True)
-            while the ndarrays should have shape (spw_Nfreqs, spw_Nfreqs)
+            while the ndarrays should have shape (spw_Nfreqs, spw_Nfreqs).
+            These matrices are never evicted from the cache (see
+            set_cache_size).
         """
         self.clear_cache(cov.keys())
-        for key in cov: self._C[key] = cov[key]
+        for key in cov: self._C.set(key, cov[key], pinned=True)
 
     def get_spw(self, include_extension=False):
         """
@@ -652,17 +961,123 @@ class PSpecData(object):
         if Ckey not in self._C:
             # calculate covariance model
             if model == 'empirical':
-                self.set_C({Ckey: utils.cov(self.x(key, include_extension=include_extension), self.w(key, include_extension=include_extension))})
+                self._C[Ckey] = utils.cov(self.x(key, include_extension=include_extension), self.w(key, include_extension=include_extension))
             elif model == 'dsets':
-                self.set_C({Ckey: np.diag( np.abs(self.w(key, include_extension=include_extension)[:,time_index] * self.dx(key, include_extension=include_extension)[:,time_index]) ** 2. )})
+                self._C[Ckey] = np.diag( np.abs(self.w(key, include_extension=include_extension)[:,time_index] * self.dx(key, include_extension=include_extension)[:,time_index]) ** 2. )
             elif model == 'autos':
-                spw_range = self.get_spw(include_extension=include_extension)
-                self.set_C({Ckey: np.diag(utils.variance_from_auto_correlations(self.dsets[dset], bl, spw_range, time_index))})
+                self._C[Ckey] = np.diag(self._auto_variance(key, time_index,
+                                                            include_extension=include_extension))
             else:
                 raise ValueError("didn't recognize Ckey {}".format(Ckey))
 
         return self._C[Ckey]
 
+    def _C_diag_times(self, key, model, times, known_cov=None):
+        """
+        Return the diagonals of a 'dsets' or 'autos' covariance model (see
+        C_model) at a set of times, computed for all times at once.
+        Covariances set with set_C or fed through known_cov take precedence.
+
+        Parameters
+        ----------
+        key : tuple
+            Tuple containing indices of dataset and baselines.
+
+        model : str
+            Covariance model, 'dsets' or 'autos'.
+
+        times : array_like of int
+            Time indices.
+
+        known_cov : dicts of covariance matrices, optional
+            See C_model.
+
+        Returns
+        -------
+        C_diag : ndarray, (Ntimes, spw_Nfreqs)
+            Diagonals of the covariance model at each time.
+        """
+        dset, bl = self.parse_blkey(key)
+        C_diag = [None for t in times]
+        for i, time_index in enumerate(times):
+            Ckey = ((dset, dset), (bl,bl), ) + (model, int(time_index), False, True,)
+            if Ckey in self._C or (known_cov is not None and Ckey in known_cov):
+                C_diag[i] = np.diag(self.C_model(key, model=model, time_index=int(time_index),
+                                                 known_cov=known_cov))
+
+        missing = [i for i, c in enumerate(C_diag) if c is None]
+        if len(missing) > 0:
+            tinds = np.asarray(times)[missing]
+            if model == 'dsets':
+                C_missing = np.abs(self.w(key)[:, tinds] * self.dx(key)[:, tinds]).T ** 2.
+            elif model == 'autos':
+                C_missing = self._auto_variance(key, tinds)
+            else:
+                raise ValueError("didn't recognize model {}".format(model))
+            for i, c in zip(missing, C_missing):
+                C_diag[i] = c
+
+        return np.asarray(C_diag)
+
+    def _auto_variance(self, key, time_index, include_extension=False):
+        """
+        Predict the noise variance of a baseline from the auto-correlations
+        of its two antennas, as utils.variance_from_auto_correlations does.
+
+        The auto-correlations of each antenna and the median nsample of the
+        spectral window are only read once per dataset and spectral window,
+        and kept in self._auto_cubes until the datasets are edited (see
+        _clear_data_cubes). The variances of any baseline and times are
+        then a product of the cached auto-correlations, instead of two
+        baseline lookups and a median over the whole nsample array per call.
+
+        Parameters
+        ----------
+        key : tuple
+            Tuple containing indices of dataset and baselines, in the format
+            (dset, ant1, ant2, pol).
+
+        time_index : int or array_like of int
+            Time index, or indices to compute the variance at several times
+            at once.
+
+        include_extension : bool, optional
+            If True, extend spw to include filtering window extensions.
+            Default: False.
+
+        Returns
+        -------
+        var : ndarray, (spw_Nfreqs,) or (Ntimes, spw_Nfreqs)
+            Noise variance of the baseline.
+        """
+        dset, bl = self.parse_blkey(key)
+        assert isinstance(bl, tuple) and len(bl)==3, "bl must be fed as Length-3 tuple"
+        uvd = self.dsets[dset]
+        spw_range = tuple(self.get_spw(include_extension=include_extension))
+        spw = slice(*spw_range)
+        self._apply_lazy_cal(dset, [bl, (bl[0], bl[0]), (bl[1], bl[1])])
+
+        if (dset, spw_range) not in self._auto_cubes:
+            # Delta_t, B and the median nsample within the spectral window
+            self._auto_cubes[(dset, spw_range)] = {
+                'dt': np.median(uvd.integration_time),
+                'df': uvd.channel_width,
+                'nsample': np.median(uvd.nsample_array[:, :, spw, :]),
+                'autos': {}}
+        cube = self._auto_cubes[(dset, spw_range)]
+        autos = cube['autos']
+        for ant in bl[:2]:
+            if (ant, bl[2]) not in autos:
+                autos[(ant, bl[2])] = np.array(uvd.get_data((ant, ant, bl[2]))[:, spw])
+
+        x_bl1 = autos[(bl[0], bl[2])][time_index]
+        x_bl2 = autos[(bl[1], bl[2])][time_index]
+        nsample_bl = uvd.get_nsamples(bl)[time_index, spw]
+        # some impainted data have zero nsample while is not flagged, and they
+        # will be assigned the median nsample within the spectral window.
+        nsample_bl = np.where(nsample_bl > 0, nsample_bl, cube['nsample'])
+        return np.abs(x_bl1 * x_bl2.conj()) / cube['dt'] / cube['df'] / nsample_bl
+
     def cross_covar_model(self, key1, key2, model='empirical',
                           time_index=None, conj_1=False, conj_2=True, known_cov=None, include_extension=False):
         """
@@ -803,28 +1218,59 @@ class PSpecData(object):
             Inverse covariance matrix for specified dataset and baseline.
         """
         assert isinstance(key, tuple)
-        # parse key
-        dset, bl = self.parse_blkey(key)
-        key = (dset,) + (bl,)
+        return self.iC_batch([key], model=model, time_index=time_index)[0]
+
+    def iC_batch(self, keys, model='empirical', time_index=None):
+        """
+        Return the inverse covariance matrices, C^-1, of a set of baselines.
+
+        The covariances missing from the cache are stacked and inverted
+        together, rather than one baseline at a time. Poorly conditioned
+        covariances (condition number >= 1e9) are pseudo-inverted.
+
+        Parameters
+        ----------
+        keys : list of tuples
+            Tuples containing indices of dataset and baselines (see iC).
+
+        model : string, optional
+            Type of covariance model to calculate, if not cached (see iC).
 
-        Ckey = ((dset, dset), (bl,bl), ) + (model, time_index, False, True,)
+        time_index : integer, compute covariance at specific time-step
 
-        # Calculate inverse covariance if not in cache
-        if Ckey not in self._iC:
-            C = self.C_model(key, model=model, time_index=time_index)
-            #U,S,V = np.linalg.svd(C.conj()) # conj in advance of next step
-            if np.linalg.cond(C) >= 1e9:
-                warnings.warn("Poorly conditioned covariance. Computing Psuedo-Inverse")
-                ic = np.linalg.pinv(C)
+        Returns
+        -------
+        iC : list of array_like
+            Inverse covariance matrix of each key.
+        """
+        Ckeys = []
+        for key in keys:
+            assert isinstance(key, tuple)
+            # parse key
+            dset, bl = self.parse_blkey(key)
+            Ckeys.append(((dset, dset), (bl,bl), ) + (model, time_index, False, True,))
+
+        # Read the cached inverse covariances before inserting new ones,
+        # which may evict them
+        iC, C = odict(), odict()
+        for key, Ckey in zip(keys, Ckeys):
+            if Ckey in iC or Ckey in C:
+                continue
+            ic = self._iC.get(Ckey)
+            if ic is None:
+                C[Ckey] = self.C_model(key, model=model, time_index=time_index)
             else:
-                ic = np.linalg.inv(C)
-            # FIXME: Not sure what these are supposed to do
-            #if self.lmin is not None: S += self.lmin # ensure invertibility
-            #if self.lmode is not None: S += S[self.lmode-1]
+                iC[Ckey] = ic
 
-            # FIXME: Is series of dot products quicker?
-            self.set_iC({Ckey:ic})
-        return self._iC[Ckey]
+        # Calculate inverse covariances if not in cache
+        if len(C) > 0:
+            ic, cond = _inv_covariances(np.array(list(C.values())))
+            for Ckey, _ic, _cond in zip(list(C.keys()), ic, cond):
+                if _cond >= 1e9:
+                    warnings.warn("Poorly conditioned covariance. Computing Psuedo-Inverse")
+                self._iC[Ckey] = iC[Ckey] = _ic
+
+        return [iC[Ckey] for Ckey in Ckeys]
 
     def Y(self, key):
         """
@@ -854,13 +1300,30 @@ class PSpecData(object):
             spw_Nfreqs x spw_Nfreqs diagonal matrix holding AND of flags
             across all times for each freq channel.
         """
+        return np.diag(self._Y_diag(key))
+
+    def _Y_diag(self, key):
+        """
+        Return the diagonal of the weighting matrix Y (see self.Y), which is
+        what is cached, as a vector of length spw_Nfreqs.
+
+        Parameters
+        ----------
+        key : tuple
+            Tuple containing indices of dataset and baselines.
+
+        Returns
+        -------
+        Y_diag : array_like
+            AND of flags across all times for each freq channel.
+        """
         assert isinstance(key, tuple)
         # parse key
         dset, bl = self.parse_blkey(key)
         key = (dset,) + (bl,)
 
         if key not in self._Y:
-            self._Y[key] = np.diag(np.max(self.w(key), axis=1))
+            self._Y[key] = np.max(self.w(key), axis=1)
             if not np.all(np.isclose(self._Y[key], 0.0) \
                         + np.isclose(self._Y[key], 1.0)):
                 raise NotImplementedError("Non-binary weights not currently implmented")
@@ -877,10 +1340,11 @@ class PSpecData(object):
         d : dict
             Dictionary containing data to insert into inverse covariance matrix
             cache. Keys are tuples, following the same format as the input to
-            self.iC().
+            self.iC(). These matrices are never evicted from the cache (see
+            set_cache_size).
         """
         for k in d:
-            self._iC[k] = d[k]
+            self._iC.set(k, d[k], pinned=True)
 
     def set_R(self, d):
         """
@@ -897,9 +1361,13 @@ class PSpecData(object):
 
             If data_weight == 'dayenu' then additional elements are appended:
             `key + (filter_extension, spw_Nfreqs, symmetric_taper)`
+
+            Values are either R matrices or, for diagonal R matrices without
+            a filter extension, 1D arrays holding the diagonal of R. These
+            are never evicted from the cache (see set_cache_size).
         """
         for k in d:
-            self._R[k] = d[k]
+            self._R.set(k, d[k], pinned=True)
 
     def R(self, key):
         """
@@ -924,30 +1392,49 @@ class PSpecData(object):
             Tuple containing indices of dataset and baselines. The first item
             specifies the index (ID) of a dataset in the collection, while
             subsequent indices specify the baseline index, in _key2inds format.
+
+        Returns
+        -------
+        R : array_like
+            Data-weighting matrix, with dimensions
+            (spw_Nfreqs, spw_Nfreqs + sum(filter_extension)).
+        """
+        R = self._R_operator(key)
+        if R.ndim == 1:
+            return np.diag(R)
+        return R
+
+    def _R_operator(self, key):
+        """
+        Return the cached data-weighting matrix R (see self.R). With identity
+        weighting and no filter extension R is diagonal, so only its diagonal
+        is stored and returned as a 1D array. Use _apply_R and _right_apply_R
+        to multiply with either form.
+
+        Parameters
+        ----------
+        key : tuple
+            Tuple containing indices of dataset and baselines.
+
+        Returns
+        -------
+        R : array_like
+            Data-weighting matrix, or its diagonal if R is diagonal.
         """
         # type checks
         assert isinstance(key, tuple)
         dset, bl = self.parse_blkey(key)
         key = (dset,) + (bl,)
-
-        # Only add to Rkey if a particular mode is enabled
-        # If you do add to this, you need to specify this in self.set_R docstring!
-        Rkey = key + (self.data_weighting,) + (self.taper,)
-        if self.data_weighting == 'dayenu':
-            # add extra dayenu params
-            Rkey = Rkey + tuple(self.filter_extension,) + (self.spw_Nfreqs,) \
-                   + (self.symmetric_taper,)
+        Rkey = self._R_key(key)
 
         if Rkey not in self._R:
+            spw_ops = self.get_spw_operators()
             # form sqrt(taper) matrix
-            if self.taper == 'none':
-                sqrtT = np.ones(self.spw_Nfreqs).reshape(1, -1)
-            else:
-                sqrtT = np.sqrt(dspec.gen_window(self.taper, self.spw_Nfreqs)).reshape(1, -1)
+            sqrtT = np.sqrt(spw_ops['taper']).reshape(1, -1)
 
             # get flag weight vector: straight multiplication of vectors
             # mimics matrix multiplication
-            sqrtY = np.sqrt(self.Y(key).diagonal().reshape(1, -1))
+            sqrtY = np.sqrt(self._Y_diag(key).reshape(1, -1))
 
             # replace possible nans with zero (when something dips negative
             # in sqrt for some reason)
@@ -955,12 +1442,16 @@ class PSpecData(object):
             sqrtY[np.isnan(sqrtY)] = 0.0
             fext = self.filter_extension
             #if we want to use a full-band filter, set the R-matrix to filter and then truncate.
-            tmat = np.zeros((self.spw_Nfreqs,
-                             self.spw_Nfreqs+np.sum(fext)),dtype=complex)
-            tmat[:,fext[0]:fext[0] + self.spw_Nfreqs] = np.identity(self.spw_Nfreqs,dtype=complex)
+            tmat = spw_ops['tmat']
             # form R matrix
             if self.data_weighting == 'identity':
-                if self.symmetric_taper:
+                if np.sum(fext) == 0:
+                    # R is diagonal, so only store its diagonal
+                    if self.symmetric_taper:
+                        self._R[Rkey] = (sqrtT * sqrtY * sqrtY * sqrtT)[0]
+                    else:
+                        self._R[Rkey] = (sqrtT ** 2. * sqrtY * sqrtY)[0]
+                elif self.symmetric_taper:
                     self._R[Rkey] =  sqrtT.T * sqrtY.T * self.I(key) * sqrtY * sqrtT
                 else:
                     self._R[Rkey] =  sqrtT.T ** 2. * np.dot(tmat, sqrtY.T * self.I(key) * sqrtY)
@@ -980,25 +1471,88 @@ class PSpecData(object):
                    not 'filter_half_widths' in r_params or\
                    not  'filter_factors' in r_params:
                        raise ValueError("filtering parameters not specified!")
-                #This line retrieves a the psuedo-inverse of a lazy covariance
-                #matrix given by dspec.dayenu_mat_inv.
-                # Note that we multiply sqrtY inside of the pinv
-                #to apply flagging weights before taking psuedo inverse.
-                if self.symmetric_taper:
-                    self._R[Rkey] = sqrtT.T * np.linalg.pinv(sqrtY.T * \
-                    dspec.dayenu_mat_inv(x=self.freqs[self.spw_range[0]-fext[0]:self.spw_range[1]+fext[1]],
-                                        filter_centers=r_params['filter_centers'],
-                                        filter_half_widths=r_params['filter_half_widths'],
-                                        filter_factors=r_params['filter_factors']) * sqrtY) * sqrtT
+                # baselines with the same filter parameters and flags share
+                # their R matrix, which is built once
+                Dkey = self._dayenu_R_key(r_params, sqrtY)
+                if Dkey in self._dayenu_R:
+                    R = self._dayenu_R[Dkey]
                 else:
-                    self._R[Rkey] = sqrtT.T ** 2. * np.dot(tmat, np.linalg.pinv(sqrtY.T * \
-                    dspec.dayenu_mat_inv(x=self.freqs[self.spw_range[0]-fext[0]:self.spw_range[1]+fext[1]],
+                    #This line retrieves a the psuedo-inverse of a lazy covariance
+                    #matrix given by dspec.dayenu_mat_inv.
+                    # Note that we multiply sqrtY inside of the pinv
+                    #to apply flagging weights before taking psuedo inverse.
+                    freqs = self.freqs[self.spw_range[0]-fext[0]:self.spw_range[1]+fext[1]]
+                    cmat = dspec.dayenu_mat_inv(x=freqs,
                                         filter_centers=r_params['filter_centers'],
                                         filter_half_widths=r_params['filter_half_widths'],
-                                        filter_factors=r_params['filter_factors']) * sqrtY))
+                                        filter_factors=r_params['filter_factors'])
+                    if self.symmetric_taper:
+                        R = sqrtT.T * np.linalg.pinv(sqrtY.T * cmat * sqrtY) * sqrtT
+                    else:
+                        R = sqrtT.T ** 2. * np.dot(tmat, np.linalg.pinv(sqrtY.T * cmat * sqrtY))
+                    self._dayenu_R[Dkey] = R
+                self._R[Rkey] = R
 
         return self._R[Rkey]
 
+    def _R_key(self, key):
+        """
+        Return the key of the data-weighting matrix cache (see set_R) for a
+        dataset and baseline.
+
+        Parameters
+        ----------
+        key : tuple
+            Tuple containing indices of dataset and baselines.
+
+        Returns
+        -------
+        Rkey : tuple
+            Key of self._R.
+        """
+        dset, bl = self.parse_blkey(key)
+
+        # Only add to Rkey if a particular mode is enabled
+        # If you do add to this, you need to specify this in self.set_R docstring!
+        Rkey = (dset,) + (bl,) + (self.data_weighting,) + (self.taper,)
+        if self.data_weighting == 'dayenu':
+            # add extra dayenu params
+            Rkey = Rkey + tuple(self.filter_extension,) + (self.spw_Nfreqs,) \
+                   + (self.symmetric_taper,)
+        return Rkey
+
+    def _dayenu_R_key(self, r_params, sqrtY):
+        """
+        Return the key of the dayenu R matrix cache.
+
+        A dayenu R matrix only depends on the frequencies of the spectral
+        window (including its filter extension), the taper, the filter
+        parameters and the flag weights of the baseline, so the key holds
+        these rather than the baseline. Baselines of a redundant group
+        usually share all of them, and thus a single pseudo-inverse.
+
+        Parameters
+        ----------
+        r_params : dict
+            Dayenu filter parameters of the baseline (see set_r_param).
+
+        sqrtY : ndarray
+            Square root of the flag weights of the baseline.
+
+        Returns
+        -------
+        Dkey : tuple
+            Hashable key of the dayenu R matrix cache.
+        """
+        fext = self.filter_extension
+        freqs = self.freqs[self.spw_range[0] - fext[0]:self.spw_range[1] + fext[1]]
+        filters = tuple([tuple(np.atleast_1d(r_params[k]).astype(float).tolist())
+                         for k in ('filter_centers', 'filter_half_widths',
+                                   'filter_factors')])
+        return (np.asarray(freqs, dtype=float).tobytes(), tuple(fext),
+                self.spw_Nfreqs, self.taper, self.symmetric_taper, filters,
+                np.asarray(sqrtY, dtype=float).tobytes())
+
     def set_symmetric_taper(self, use_symmetric_taper):
         """
         Set the symmetric taper parameter
@@ -1061,6 +1615,25 @@ class PSpecData(object):
         """
         self.data_weighting = data_weighting
 
+    def set_norm_engine(self, norm_engine):
+        """
+        Set the method used to compute the G and H normalization matrices.
+
+        Parameters
+        ----------
+        norm_engine : str
+            Options=['rank1', 'einsum']. 'rank1' uses the fact that each
+            Q^alt_a is a rank-1 outer product to reduce the traces in get_G
+            and get_H to products of delay-projected R matrices (using FFTs
+            when spw_Ndlys equals the number of channels), which scales as
+            O(Nfreqs^3). 'einsum' computes every trace Tr[R_1 Q_a R_2 Q_b]
+            explicitly, which scales as O(Nfreqs^4). Both give the same
+            result to within numerical precision.
+        """
+        if norm_engine not in ['rank1', 'einsum']:
+            raise ValueError("norm_engine must be one of ['rank1', 'einsum']")
+        self.norm_engine = norm_engine
+
     def set_r_param(self, key, r_params):
         """
         Set the weighting parameters for baseline at (dset,bl, [pol])
@@ -1290,25 +1863,20 @@ class PSpecData(object):
             Unnormalized/normalized bandpowers
         """
         Rx1, Rx2 = 0.0, 0.0
-        R1, R2 = 0.0, 0.0
 
         # Calculate R x_1
         if isinstance(key1, list):
             for _key in key1:
-                Rx1 += np.dot(self.R(_key), self.x(_key))
-                R1 += self.R(_key)
+                Rx1 += _apply_R(self._R_operator(_key), self.x(_key))
         else:
-            Rx1 = np.dot(self.R(key1), self.x(key1))
-            R1  = self.R(key1)
+            Rx1 = _apply_R(self._R_operator(key1), self.x(key1))
 
         # Calculate R x_2
         if isinstance(key2, list):
             for _key in key2:
-                Rx2 += np.dot(self.R(_key), self.x(_key))
-                R2 += self.R(_key)
+                Rx2 += _apply_R(self._R_operator(_key), self.x(_key))
         else:
-            Rx2 = np.dot(self.R(key2), self.x(key2))
-            R2  = self.R(key2)
+            Rx2 = _apply_R(self._R_operator(key2), self.x(key2))
 
         # The set of operations for exact_norm == True are drawn from Equations
         # 11(a) and 11(b) from HERA memo #44. We are incorporating the
@@ -1323,11 +1891,12 @@ class PSpecData(object):
             q          = []
             del_tau    = np.median(np.diff(self.delays()))*1e-9  #Get del_eta in Eq.11(a) (HERA memo #44) (seconds)
             integral_beam = self.get_integral_beam(pol) #Integral of beam in Eq.11(a) (HERA memo #44)
+            m = self.get_spw_operators()['m']
 
             for i in range(self.spw_Ndlys):
                 # Ideally, del_tau and integral_beam should be part of get_Q. We use them here to
                 # avoid their repeated computation for each delay mode.
-                Q = del_tau * self.get_Q_alt(i) * integral_beam
+                Q = del_tau * np.einsum('i,j', m[i].conj(), m[i]) * integral_beam
                 QRx2 = np.dot(Q, Rx2)
 
                 # Square and sum over columns
@@ -1345,13 +1914,96 @@ class PSpecData(object):
                        * np.fft.fftshift(_Rx2, axes=0)
 
         else:
-            q = []
-            for i in range(self.spw_Ndlys):
-                Q = self.get_Q_alt(i)
-                QRx2 = np.dot(Q, Rx2)
-                qi = np.einsum('i...,i...->...', Rx1.conj(), QRx2)
-                q.append(qi)
-            return 0.5 * np.array(q)
+            # Q^alt_a = m_a^* m_a^t, so x_1^dagger Q^alt_a x_2 is the product
+            # of the delay-projected vectors (m_a . x_1)^* (m_a . x_2)
+            m = self.get_spw_operators()['m']
+            q = np.dot(m, Rx1).conj() * np.dot(m, Rx2)
+            return 0.5 * q
+
+    def q_hat_batch(self, keys1, keys2, allow_fft=False, exact_norm=False,
+                    pol=False):
+        """
+        Construct unnormalized bandpowers, q_hat, for a list of baseline-pairs
+        at once. This is equivalent to
+
+          [self.q_hat(key1, key2) for key1, key2 in zip(keys1, keys2)]
+
+        but the visibilities of all baselines that share a data-weighting
+        matrix R are stacked into a single (Nfreqs, Nbls * Ntimes) matrix,
+        so that R and the delay transform are applied with one matrix product
+        per R matrix instead of once per baseline-pair.
+
+        Under identity weighting R only depends on the flag pattern of a
+        baseline (see self.Y), so all baselines with the same flags share R,
+        unless their R was set with set_R. For other data weightings, only
+        repeated keys share R.
+
+        Parameters
+        ----------
+        keys1, keys2 : list of tuples
+            Lists of tuples containing indices of dataset and baselines for
+            the two input datavectors of each power spectrum estimate. Must
+            have the same length. See q_hat for details.
+
+        allow_fft : bool, optional
+            Whether to use a fast FFT summation trick to construct q_hat. See
+            q_hat for details. Default: False.
+
+        exact_norm : bool, optional
+            If True, beam and spectral window factors are taken into account
+            in the computation of q_hat. The Q matrix is then not rank-1, so
+            this falls back to calling q_hat for each baseline-pair.
+            Default: False.
+
+        pol : str/int/bool, optional
+            Used only if exact_norm is True. See q_hat for details.
+
+        Returns
+        -------
+        q_hat : array_like
+            Unnormalized bandpowers, with shape (Nblpairs, Ndlys, Ntimes).
+        """
+        assert len(keys1) == len(keys2), \
+            "keys1 and keys2 must have the same length"
+        keys = list(keys1) + list(keys2)
+
+        # baseline lists are combined inside q_hat and exact_norm does not
+        # use a rank-1 Q, so compute these one baseline-pair at a time
+        if exact_norm or len(keys) == 0 \
+                or np.any([isinstance(k, list) for k in keys]):
+            return np.array([self.q_hat(key1, key2, allow_fft=allow_fft,
+                                        exact_norm=exact_norm, pol=pol)
+                             for key1, key2 in zip(keys1, keys2)])
+
+        # group unique keys by their R matrix. R matrices set with set_R
+        # are pinned in the cache and may differ from the computed ones
+        groups = odict()
+        for key in odict.fromkeys(keys):
+            if self.data_weighting == 'identity' \
+                    and not self._R.is_pinned(self._R_key(key)):
+                Rgroup = self._Y_diag(key).tobytes()
+            else:
+                Rgroup = key
+            groups.setdefault(Rgroup, []).append(key)
+
+        # apply the delay transform m R to all data sharing an R matrix
+        mRx = {}
+        m = self.get_spw_operators()['m']
+        use_fft = allow_fft and (self.spw_Nfreqs == self.spw_Ndlys)
+        for group in groups.values():
+            R = self._R_operator(group[0])
+            if use_fft and R.ndim == 2:
+                mR = np.fft.fftshift(np.fft.fft(R, axis=0), axes=0)
+            else:
+                mR = _right_apply_R(m, R)
+            x = [self.x(key) for key in group]
+            _mRx = np.dot(mR, np.hstack(x))
+            splits = np.cumsum([_x.shape[1] for _x in x])[:-1]
+            for key, _q in zip(group, np.split(_mRx, splits, axis=1)):
+                mRx[key] = _q
+
+        q = [mRx[key1].conj() * mRx[key2] for key1, key2 in zip(keys1, keys2)]
+        return 0.5 * np.array(q)
 
     def get_G(self, key1, key2, exact_norm=False, pol=False):
         """
@@ -1391,8 +2043,15 @@ class PSpecData(object):
                              "by now! Cannot be equal to None")
 
         G = np.zeros((self.spw_Ndlys, self.spw_Ndlys), dtype=np.complex)
-        R1 = self.R(key1)
-        R2 = self.R(key2)
+
+        # the beam-weighted Q matrices are not rank-1, so exact_norm
+        # always uses explicit traces
+        if self.norm_engine == 'rank1' and not exact_norm:
+            G = self._get_rank1_trace(self._R_operator(key1),
+                                      self._R_operator(key2))
+            if np.count_nonzero(G) == 0:
+                G = np.eye(self.spw_Ndlys)
+            return G / 2.
 
         iR1Q1, iR2Q2 = {}, {}
         if (exact_norm):
@@ -1402,6 +2061,8 @@ class PSpecData(object):
             qnorm =  del_tau * integral_beam
         else:
             qnorm = 1.
+        R1 = self.R(key1)
+        R2 = self.R(key2)
         for ch in range(self.spw_Ndlys):
             #G is given by Tr[E^\alpha C,\beta]
             #where E^\alpha = R_1^\dagger Q^\apha R_2
@@ -1427,78 +2088,413 @@ class PSpecData(object):
 
         return G / 2.
 
-    def get_H(self, key1, key2, sampling=False, exact_norm=False, pol=False):
+    def _get_rank1_trace(self, R1, R2, sinc=False):
         """
-        Calculates the response matrix H of the unnormalized band powers q
-        to the true band powers p, i.e.,
-
-            <q_a> = \sum_b H_{ab} p_b
-
-        This is given by
+        Calculates
 
-            H_ab = (1/2) Tr[R_1 Q_a^alt R_2 Q_b]
+            T_ab = Tr[R_1^dagger Q^alt_a R_2 Q^alt_b]
 
-        (See HERA memo #44). As currently implemented, this approximates the
-        primary beam as frequency independent.
+        for all pairs of delay modes, using the fact that each Q^alt_a is a
+        rank-1 outer product, Q^alt_a = m_a^* m_a^t. With the matrices
+        A = (m_a) and B = (m_b) holding these vectors as rows (B includes
+        the filter extension), the trace factorizes into
 
-        The sampling option determines whether one is assuming that the
-        output points are integrals over k bins or samples at specific
-        k values. The effect is to add a dampening of widely separated
-        frequency correlations with the addition of the term
+            T_ab = conj[A R_1 B^dagger]_ab [A R_2 B^dagger]_ab,
 
-            sinc(pi \Delta eta (nu_i - nu_j))
+        which costs O(Nfreqs^3) instead of the O(Nfreqs^4) of evaluating
+        each trace explicitly. When spw_Ndlys equals the number of channels,
+        the projections onto A and B are done with FFTs. If R_1 and R_2 are
+        both diagonal, m_a,i m_b,i^* only depends on a - b, so A R B^dagger
+        is a Toeplitz matrix that is built in O(Nfreqs^2).
 
-        Note that numpy uses the engineering definition of sinc, where
-        sinc(x) = sin(pi x) / (pi x), whereas in the line above and in
-        all of our documentation, we use the physicist definition where
-        sinc(x) = sin(x) / x
+        If sinc is True, Q^alt_b is replaced by the elementwise product
+        Q^alt_b * S with the sinc matrix S used by get_H. S is expanded in its
+        eigenvectors, S = sum_r lambda_r s_r s_r^t, keeping only modes with
+        eigenvalues above numerical precision (see get_spw_operators), so
+        that each mode again reduces to products of delay-projected matrices.
 
-        Note that in the limit that R_1 = R_2 = C^-1 and Q_a is used instead
-        of Q_a^alt, this reduces to the Fisher matrix
+        Parameters
+        ----------
+        R1, R2 : array_like
+            Data-weighting matrices, with dimensions
+            (spw_Nfreqs, spw_Nfreqs + sum(filter_extension)), or 1D arrays
+            holding the diagonal of diagonal R matrices (see _R_operator).
 
-            F_ab = 1/2 Tr [C^-1 Q_a C^-1 Q_b] (arXiv:1502.06016, Eq. 17)
+        sinc : boolean, optional
+            If True, multiply Q^alt_b elementwise by the sinc matrix.
+            Default: False.
 
-        This function uses the state of self.taper in constructing H.
-        See PSpecData.pspec for details.
+        Returns
+        -------
+        T : array_like, complex
+            Traces for all pairs of delay modes, with dimensions
+            (spw_Ndlys, spw_Ndlys).
+        """
+        spw_ops = self.get_spw_operators()
+        nfreq = self.spw_Nfreqs + np.sum(self.filter_extension)
+        use_fft = (self.spw_Ndlys == nfreq)
+
+        if R1.ndim == 1 and R2.ndim == 1:
+            # [A diag(d) B^dagger]_ab = sum_i d_i m_a,i m_b,i^* only depends
+            # on a - b; its values for a - b >= 0 and a - b <= 0 follow from
+            # the products of all rows with the first one
+            m = spw_ops['m']
+            W = m * m[0].conj()
+
+            def toeplitz_project(d):
+                return toeplitz(np.dot(W, d), np.dot(W.conj(), d))
+
+            if not sinc:
+                return toeplitz_project(R1).conj() * toeplitz_project(R2)
+
+            eigvals, eigvecs = spw_ops['sinc_eigvals'], spw_ops['sinc_eigvecs']
+            T = np.zeros((self.spw_Ndlys, self.spw_Ndlys), dtype=np.complex)
+            for eigval, eigvec in zip(eigvals, eigvecs):
+                T += eigval * toeplitz_project(R1 * eigvec).conj() \
+                            * toeplitz_project(R2 * eigvec)
+            return T
+
+        # diagonal R matrices are only mixed with dense ones if set by hand
+        if R1.ndim == 1:
+            R1 = np.diag(R1)
+        if R2.ndim == 1:
+            R2 = np.diag(R2)
+
+        # project the rows of R onto the delay modes (A R)
+        if use_fft:
+            # get_Q_alt uses m_a = fft(ifftshift(delta_a)), i.e. the rows
+            # of the DFT matrix in fftshift order
+            AR1 = np.fft.fftshift(np.fft.fft(R1, axis=0), axes=0)
+            AR2 = np.fft.fftshift(np.fft.fft(R2, axis=0), axes=0)
+        else:
+            A, B = spw_ops['m'], spw_ops['m_ext']
+            AR1 = np.dot(A, R1)
+            AR2 = np.dot(A, R2)
+
+        def project(X):
+            # project the last axis of X onto the delay modes (X B^dagger)
+            if use_fft:
+                return nfreq * np.fft.fftshift(np.fft.ifft(X, axis=-1), axes=-1)
+            return np.dot(X, B.conj().T)
+
+        if not sinc:
+            return project(AR1).conj() * project(AR2)
+
+        eigvals, eigvecs = spw_ops['sinc_eigvals'], spw_ops['sinc_eigvecs']
+        X1 = project(AR1[np.newaxis] * eigvecs[:, np.newaxis, :])
+        X2 = project(AR2[np.newaxis] * eigvecs[:, np.newaxis, :])
+        return np.einsum('r,rab,rab->ab', eigvals, X1.conj(), X2)
+
+    def _identity_GH_key(self, key1, key2, sampling=False, exact_norm=False,
+                         pol=False):
+        """
+        Return the key of the identity-weighting G and H cache for a pair of
+        baselines.
+
+        Under identity weighting, G and H only depend on the flag patterns of
+        the two baselines and on the spectral window settings, so the key
+        holds the packed binary flag masks of key1 and key2 together with the
+        spw range, Ndlys, filter extension, taper and normalization options
+        (and the beam polarization if exact_norm is True). This makes cache
+        lookups O(1) in the number of cached flag patterns, and lets the
+        cache be kept across spectral windows, dataset pairs and calls to
+        pspec. The caches are cleared when a new primary_beam is set.
 
         Parameters
         ----------
-        key1, key2 : tuples or lists of tuples
-            Tuples containing indices of dataset and baselines for the two
-            input datavectors. If a list of tuples is provided, the baselines
-            in the list will be combined with inverse noise weights.
+        key1, key2 : tuples
+            Tuples containing indices of dataset and baselines.
 
-        sampling : boolean, optional
-            Whether to sample the power spectrum or to assume integrated
-            bands over wide delay bins. Default: False
+        sampling : bool, optional
+            Whether H is computed with sampling=True. Default: False.
 
-        exact_norm : boolean, optional
-            Exact normalization (see HERA memo #44, Eq. 11 and documentation
-            of q_hat for details).
+        exact_norm : bool, optional
+            Whether G and H are computed with exact_norm=True. Default: False.
 
         pol : str/int/bool, optional
-            Polarization parameter to be used for extracting the correct beam.
-            Used only if exact_norm is True.
+            Beam polarization, only used if exact_norm is True.
 
         Returns
         -------
-        H : array_like, complex
-            Dimensions (Nfreqs, Nfreqs).
+        GHkey : tuple
+            Hashable key of the identity-weighting G and H cache.
+        """
+        masks = tuple([np.packbits(~np.isclose(self._Y_diag(key), 0.0)).tobytes()
+                       for key in (key1, key2)])
+        return masks + (self.spw_range, self.spw_Ndlys,
+                        tuple(self.filter_extension), self.taper,
+                        self.symmetric_taper, sampling, exact_norm,
+                        pol if exact_norm else None)
+
+    def _norm_disk_key(self, key1, key2, sampling=False, exact_norm=False):
+        """
+        Return the key of the on-disk identity-weighting normalization cache
+        (see set_norm_cache_dir) for a pair of baselines.
+
+        This is the counterpart of _identity_GH_key that is valid across
+        runs: the spw is identified by its (extended) frequencies instead of
+        its channel range, and the package version is included so that
+        entries written by other versions are not reused.
+
+        Parameters
+        ----------
+        key1, key2 : tuples
+            Tuples containing indices of dataset and baselines.
+
+        sampling : bool, optional
+            Whether H is computed with sampling=True. Default: False.
+
+        exact_norm : bool, optional
+            Whether G and H are computed with exact_norm=True. Default: False.
+
+        Returns
+        -------
+        diskkey : tuple
+            Key of the on-disk cache, or None if there is no on-disk cache
+            or exact_norm is True.
+        """
+        if self._norm_disk_cache is None or exact_norm:
+            return None
+        masks = tuple([np.packbits(~np.isclose(self._Y_diag(key), 0.0)).tobytes()
+                       for key in (key1, key2)])
+        spw = self.get_spw(include_extension=True)
+        freqs = np.asarray(self.freqs[spw[0]:spw[1]], dtype=np.float64)
+        return ('identity', version.version) + masks \
+               + (freqs.tobytes(), self.spw_Ndlys, tuple(self.filter_extension),
+                  self.taper, self.symmetric_taper, sampling)
+
+    def _get_GH(self, key1, key2, sampling=False, exact_norm=False, pol=False,
+                verbose=False):
+        """
+        Get the G and H matrices of a pair of baselines in pspec.
+
+        Under identity weighting, G and H only depend on the flag patterns of
+        the two baselines, so they are taken from the identity-weighting
+        caches (see _identity_GH_key) or the on-disk normalization cache if
+        possible, and cached otherwise.
+
+        Parameters
+        ----------
+        key1, key2 : tuples
+            Tuples containing indices of dataset and baselines.
+
+        sampling : bool, optional
+            Whether H is computed with sampling=True. Default: False.
+
+        exact_norm : bool, optional
+            Whether G and H are computed with exact_norm=True. Default: False.
+
+        pol : str/int/bool, optional
+            Beam polarization, only used if exact_norm is True.
+
+        verbose : bool, optional
+            If True, print progress. Default: False.
+
+        Returns
+        -------
+        Gv, Hv : array_like
+            G and H matrices, with dimensions (Ndlys, Ndlys).
+        """
+        if self.data_weighting != 'identity':
+            # for non identity weighting (i.e. iC weighting)
+            # Gv and Hv are always different, so compute them
+            if verbose: print("  Building G...")
+            Gv = self.get_G(key1, key2, exact_norm=exact_norm, pol = pol)
+            Hv = self.get_H(key1, key2, sampling=sampling, exact_norm=exact_norm, pol = pol)
+            return Gv, Hv
+
+        # in this case, all Gv and Hv differ only by flagging pattern
+        # so check if we've already computed this
+        GHkey = self._identity_GH_key(key1, key2, sampling=sampling,
+                                      exact_norm=exact_norm, pol=pol)
+        # G and H are held in caches with separate budgets, so either may
+        # have been evicted
+        Gv = self._identity_G.get(GHkey)
+        Hv = self._identity_H.get(GHkey)
+        if Gv is not None and Hv is not None:
+            # This flag pattern exists, so pick appropriate G and H and continue
+            self.identity_cache_stats['hits'] += 1
+            return Gv, Hv
+
+        # This flag pattern doesn't exist, so load it from
+        # the on-disk cache if there is one, or compute it
+        self.identity_cache_stats['misses'] += 1
+        diskkey = self._norm_disk_key(key1, key2, sampling=sampling,
+                                      exact_norm=exact_norm)
+        GH = None
+        if diskkey is not None:
+            GH = self._norm_disk_cache.get(('GH',) + diskkey)
+        if GH is not None:
+            Gv, Hv = GH['G'], GH['H']
+        else:
+            if verbose: print("  Building G...")
+            Gv = self.get_G(key1, key2, exact_norm=exact_norm, pol = pol)
+            Hv = self.get_H(key1, key2, sampling=sampling, exact_norm=exact_norm, pol = pol)
+            if diskkey is not None:
+                self._norm_disk_cache.set(('GH',) + diskkey, G=Gv, H=Hv)
+        # cache it
+        self._identity_G[GHkey] = Gv
+        self._identity_H[GHkey] = Hv
+        return Gv, Hv
+
+    def _get_MW_batch(self, keys1, keys2, GH, norm, sampling=False,
+                      exact_norm=False, pol=False):
+        """
+        Get the M and W matrices of many pairs of baselines in pspec, with a
+        single batched call to get_MW.
+
+        Under identity weighting (and a norm other than 'V^-1/2'), M and W
+        only depend on G and H, so they are taken from the identity-weighting
+        caches or the on-disk normalization cache if possible, and only the
+        remaining distinct flag patterns are computed and cached.
+
+        Parameters
+        ----------
+        keys1, keys2 : lists of tuples
+            Tuples containing indices of dataset and baselines of each pair.
+
+        GH : list of tuples
+            G and H matrices (Gv, Hv) of each pair (see _get_GH).
+
+        norm : str
+            Normalization mode, see the 'mode' argument of get_MW.
+
+        sampling : bool, optional
+            Whether H is computed with sampling=True. Default: False.
+
+        exact_norm : bool, optional
+            Whether G and H are computed with exact_norm=True. Default: False.
+
+        pol : str/int/bool, optional
+            Beam polarization, only used if exact_norm is True.
+
+        Returns
+        -------
+        MW : list of tuples
+            M and W matrices (Mv, Wv) of each pair.
+        """
+        if norm == 'V^-1/2' or self.data_weighting != 'identity':
+            V = None
+            if norm == 'V^-1/2':
+                V = np.array([self.get_unnormed_V(key1, key2, exact_norm=exact_norm, pol = pol)
+                              for key1, key2 in zip(keys1, keys2)])
+            M, W = self.get_MW(np.array([Gv for Gv, Hv in GH]),
+                               np.array([Hv for Gv, Hv in GH]), mode=norm,
+                               band_covar=V, exact_norm=exact_norm)
+            return list(zip(M, W))
+
+        # M and W only depend on G and H, so cache them alongside
+        MW = odict()
+        missing = odict()
+        MWkeys = []
+        for k, (key1, key2) in enumerate(zip(keys1, keys2)):
+            MWkey = self._identity_GH_key(key1, key2, sampling=sampling,
+                                          exact_norm=exact_norm, pol=pol) + (norm,)
+            MWkeys.append(MWkey)
+            if MWkey in MW or MWkey in missing:
+                continue
+            cached = self._identity_MW.get(MWkey)
+            if cached is not None:
+                MW[MWkey] = cached
+                continue
+            diskkey = self._norm_disk_key(key1, key2, sampling=sampling,
+                                          exact_norm=exact_norm)
+            cached = None
+            if diskkey is not None:
+                cached = self._norm_disk_cache.get(('MW', norm) + diskkey)
+            if cached is not None:
+                MW[MWkey] = (cached['M'], cached['W'])
+                self._identity_MW[MWkey] = MW[MWkey]
+            else:
+                missing[MWkey] = (k, diskkey)
+
+        if len(missing) > 0:
+            inds = [k for k, diskkey in missing.values()]
+            M, W = self.get_MW(np.array([GH[k][0] for k in inds]),
+                               np.array([GH[k][1] for k in inds]), mode=norm,
+                               exact_norm=exact_norm)
+            for (MWkey, (k, diskkey)), Mv, Wv in zip(missing.items(), M, W):
+                if diskkey is not None:
+                    self._norm_disk_cache.set(('MW', norm) + diskkey, M=Mv, W=Wv)
+                MW[MWkey] = (Mv, Wv)
+                self._identity_MW[MWkey] = (Mv, Wv)
+        return [MW[MWkey] for MWkey in MWkeys]
+
+    def get_H(self, key1, key2, sampling=False, exact_norm=False, pol=False):
+        """
+        Calculates the response matrix H of the unnormalized band powers q
+        to the true band powers p, i.e.,
+
+            <q_a> = \sum_b H_{ab} p_b
+
+        This is given by
+
+            H_ab = (1/2) Tr[R_1 Q_a^alt R_2 Q_b]
+
+        (See HERA memo #44). As currently implemented, this approximates the
+        primary beam as frequency independent.
+
+        The sampling option determines whether one is assuming that the
+        output points are integrals over k bins or samples at specific
+        k values. The effect is to add a dampening of widely separated
+        frequency correlations with the addition of the term
+
+            sinc(pi \Delta eta (nu_i - nu_j))
+
+        Note that numpy uses the engineering definition of sinc, where
+        sinc(x) = sin(pi x) / (pi x), whereas in the line above and in
+        all of our documentation, we use the physicist definition where
+        sinc(x) = sin(x) / x
+
+        Note that in the limit that R_1 = R_2 = C^-1 and Q_a is used instead
+        of Q_a^alt, this reduces to the Fisher matrix
+
+            F_ab = 1/2 Tr [C^-1 Q_a C^-1 Q_b] (arXiv:1502.06016, Eq. 17)
+
+        This function uses the state of self.taper in constructing H.
+        See PSpecData.pspec for details.
+
+        Parameters
+        ----------
+        key1, key2 : tuples or lists of tuples
+            Tuples containing indices of dataset and baselines for the two
+            input datavectors. If a list of tuples is provided, the baselines
+            in the list will be combined with inverse noise weights.
+
+        sampling : boolean, optional
+            Whether to sample the power spectrum or to assume integrated
+            bands over wide delay bins. Default: False
+
+        exact_norm : boolean, optional
+            Exact normalization (see HERA memo #44, Eq. 11 and documentation
+            of q_hat for details).
+
+        pol : str/int/bool, optional
+            Polarization parameter to be used for extracting the correct beam.
+            Used only if exact_norm is True.
+
+        Returns
+        -------
+        H : array_like, complex
+            Dimensions (Nfreqs, Nfreqs).
         """
         if self.spw_Ndlys == None:
             raise ValueError("Number of delay bins should have been set"
                              "by now! Cannot be equal to None.")
 
         H = np.zeros((self.spw_Ndlys, self.spw_Ndlys), dtype=np.complex)
-        R1 = self.R(key1)
-        R2 = self.R(key2)
         if not sampling:
-            nfreq=np.sum(self.filter_extension) + self.spw_Nfreqs
-            sinc_matrix = np.zeros((nfreq, nfreq))
-            for i in range(nfreq):
-                for j in range(nfreq):
-                    sinc_matrix[i,j] = np.float(i - j)
-            sinc_matrix = np.sinc(sinc_matrix / np.float(nfreq))
+            sinc_matrix = self.get_spw_operators()['sinc_matrix']
+
+        # the beam-weighted Q matrices are not rank-1, so exact_norm
+        # always uses explicit traces
+        if self.norm_engine == 'rank1' and not exact_norm:
+            H = self._get_rank1_trace(self._R_operator(key1),
+                                      self._R_operator(key2),
+                                      sinc=not sampling)
+            if np.count_nonzero(H) == 0:
+                H = np.eye(self.spw_Ndlys)
+            return H / 2.
 
         iR1Q1, iR2Q2 = {}, {}
         if (exact_norm):
@@ -1508,6 +2504,8 @@ class PSpecData(object):
             qnorm = del_tau * integral_beam
         else:
             qnorm = 1.
+        R1 = self.R(key1)
+        R2 = self.R(key2)
         for ch in range(self.spw_Ndlys):
             Q1 = self.get_Q_alt(ch) * qnorm
             Q2 = self.get_Q_alt(ch, include_extension=True) * qnorm
@@ -1552,8 +2550,9 @@ class PSpecData(object):
         implementation in q_hat. So this should only be used as a helper
         method for methods such as get_unnormed_V.
 
-        Note for the future: There may be advantages to doing the
-        matrix multiplications separately
+        Without exact normalization, the E matrices are rank-1, and
+        _unnormed_E_operator returns them in a factored form that is cheaper
+        to store and multiply.
 
 
         Parameters
@@ -1577,20 +2576,71 @@ class PSpecData(object):
             Set of E matrices, with dimensions (Ndlys, Nfreqs, Nfreqs).
 
         """
+        E = self._unnormed_E_operator(key1, key2, exact_norm=exact_norm,
+                                      pol=pol)
+        if isinstance(E, tuple):
+            return np.einsum('ai,aj->aij', E[0], E[1])
+        return E
+
+    def _unnormed_E_operator(self, key1, key2, exact_norm=False, pol=False):
+        """
+        Calculates the unnormalized E matrices (see get_unnormed_E), in
+        factored form where possible.
+
+        Without exact normalization, Q^alt_a = m_a^* m_a^t is rank-1, so
+        each E matrix is the outer product
+
+            E^{12,a} = (1/2) (R_1^dagger m_a^*) (m_a^t R_2) = u_a v_a^t,
+
+        and only the vectors u_a and v_a are returned, which takes
+        O(Ndlys Nfreqs) rather than O(Ndlys Nfreqs^2) memory. The exact
+        normalization weights Q^alt_a by the integral of the beam over each
+        pair of frequencies, so its E matrices are not rank-1 and are
+        returned dense. Use _E_traces, _E_dot, _E_dagger, _E_conj and
+        _E_transpose to operate on either form.
+
+        Parameters
+        ----------
+        key1, key2 : tuples or lists of tuples
+            Tuples containing indices of dataset and baselines for the two
+            input datavectors. If a list of tuples is provided, the baselines
+            in the list will be combined with inverse noise weights.
+
+        exact_norm : boolean, optional
+            Exact normalization (see HERA memo #44, Eq. 11 and documentation
+            of q_hat for details).
+
+        pol : str/int/bool, optional
+            Polarization parameter to be used for extracting the correct beam.
+            Used only if exact_norm is True.
+
+        Returns
+        -------
+        E : tuple or array_like, complex
+            Pair of arrays (U, V) with dimensions (Ndlys, Nfreqs), holding
+            the vectors u_a and v_a as rows, or set of E matrices with
+            dimensions (Ndlys, Nfreqs, Nfreqs) if exact_norm is True.
+        """
         if self.spw_Ndlys == None:
             raise ValueError("Number of delay bins should have been set"
                              "by now! Cannot be equal to None")
+        m = self.get_spw_operators()['m']
+        if not exact_norm:
+            mR1 = _right_apply_R(m, self._R_operator(key1))
+            mR2 = _right_apply_R(m, self._R_operator(key2))
+            return (0.5 * mR1.conj(), mR2)
+
+        R1 = self.R(key1)
+        R2 = self.R(key2)
+
         nfreq = self.spw_Nfreqs + np.sum(self.filter_extension)
         E_matrices = np.zeros((self.spw_Ndlys, nfreq, nfreq),
                                dtype=np.complex)
-        R1 = self.R(key1)
-        R2 = self.R(key2)
-        if (exact_norm):
-            integral_beam = self.get_integral_beam(pol)
-            del_tau = np.median(np.diff(self.delays()))*1e-9
+        integral_beam = self.get_integral_beam(pol)
+        del_tau = np.median(np.diff(self.delays()))*1e-9
         for dly_idx in range(self.spw_Ndlys):
-            if exact_norm: QR2 = del_tau * integral_beam * np.dot(self.get_Q_alt(dly_idx), R2)
-            else: QR2 = np.dot(self.get_Q_alt(dly_idx), R2)
+            Q = np.einsum('i,j', m[dly_idx].conj(), m[dly_idx])
+            QR2 = del_tau * integral_beam * np.dot(Q, R2)
             E_matrices[dly_idx] = np.dot(np.conj(R1).T, QR2)
 
         return 0.5 * E_matrices
@@ -1687,7 +2737,7 @@ class PSpecData(object):
             Bandpower covariance matrix, with dimensions (Ndlys, Ndlys).
         """
         # Collect all the relevant pieces
-        E_matrices = self.get_unnormed_E(key1, key2, exact_norm=exact_norm, pol=pol)
+        E = self._unnormed_E_operator(key1, key2, exact_norm=exact_norm, pol=pol)
         C1 = self.C_model(key1, model=model, time_index=time_index)
         C2 = self.C_model(key2, model=model, time_index=time_index)
         P21 = self.cross_covar_model(key2, key1, model=model, conj_1=False,
@@ -1695,17 +2745,14 @@ class PSpecData(object):
         S21 = self.cross_covar_model(key2, key1, model=model, conj_1=True,
                                      conj_2=True, time_index=time_index)
 
-        E21C1 = np.dot(np.transpose(E_matrices.conj(), (0,2,1)), C1)
-        E12C2 = np.dot(E_matrices, C2)
-        auto_term = np.einsum('aij,bji', E12C2, E21C1)
-        E12starS21 = np.dot(E_matrices.conj(), S21)
-        E12P21 = np.dot(E_matrices, P21)
-        cross_term = np.einsum('aij,bji', E12P21, E12starS21)
+        auto_term = _E_traces(E, C2, _E_dagger(E), C1)
+        cross_term = _E_traces(E, P21, _E_conj(E), S21)
 
         return auto_term + cross_term
 
     def get_analytic_covariance(self, key1, key2, M=None, exact_norm=False,
-                                pol=False, model='empirical', known_cov=None):
+                                pol=False, model='empirical', known_cov=None,
+                                diag_only=False):
         """
         Calculates the auto-covariance matrix for both the real and imaginary
         parts of bandpowers (i.e., the q vectors and the p vectors).
@@ -1856,173 +2903,197 @@ class PSpecData(object):
         known_cov : dicts of covariance matrices
             Covariance matrices that are not calculated internally from data.
 
+        diag_only : bool, optional
+            If True, only compute the variances of the bandpowers, i.e. the
+            diagonals of the covariance matrices. If M is diagonal at all
+            times, only the traces with a = b above are then needed.
+            Default: False.
+
         Returns
         -------
         V : array_like, complex
-            Bandpower covariance, with dimension (Ntimes, spw_Ndlys, spw_Ndlys).
+            Bandpower covariance, with dimension (Ntimes, spw_Ndlys, spw_Ndlys),
+            or bandpower variance, with dimension (Ntimes, spw_Ndlys), if
+            diag_only is True.
         """
         # Collect all the relevant pieces
         if M.ndim == 2:
             M = np.asarray([M for time in range(self.Ntimes)])
         # M has a shape of (Ntimes, spw_Ndlys,spw_Ndlys)
-        E_matrices = self.get_unnormed_E(key1, key2, exact_norm=exact_norm, pol=pol)
-        # E_matrices has a shape of (spw_Ndlys, spw_Nfreqs, spw_Nfreqs)
-
-        # using numpy.einsum_path to speed up the array products with numpy.einsum
-        einstein_path_0 =  np.einsum_path('bij, cji->bc', E_matrices, E_matrices, optimize='optimal')[0]
-        einstein_path_1 = np.einsum_path('bi, ci,i->bc', E_matrices[:,:,0], E_matrices[:,:,0],E_matrices[0,:,0], optimize='optimal')[0]
-        einstein_path_2 =  np.einsum_path('ab,cd,bd->ac', M[0], M[0], M[0], optimize='optimal')[0]
-
-        # check if the covariance matrix is uniform along the time axis. If so, we just calculate the result for one timestamp and duplicate its copies
-        # along the time axis.
-        check_uniform_input = False
-        if model != 'foreground_dependent':
-        # When model is 'foreground_dependent', since we are processing the outer products of visibilities from different times,
-        # we are expected to have time-dependent inputs, thus check_uniform_input is always set to be False here.
-            C11_first = self.C_model(key1, model=model, known_cov=known_cov, time_index=0)
-            C11_last = self.C_model(key1, model=model, known_cov=known_cov, time_index=self.dsets[0].Ntimes-1)
-            if np.isclose(C11_first, C11_last).all():
-                check_uniform_input = True
-
-        cov_q_real, cov_q_imag, cov_p_real, cov_p_imag = [], [], [], []
-        for time_index in range(self.dsets[0].Ntimes):
-            if model in ['dsets','autos']:
-                # calculate <q_a q_b^\dagger> - <q_a><q_b^\dagger> = tr[ E^{12,a} C^{22} E^{21,b} C^{11} ]
-                # We have used tr[A D_1 B D_2] = \sum_{ijkm} A_{ij} d_{1j} \delta_{jk} B_{km} d_{2m} \delta_{mi} = \sum_{ik} [A_{ik}*d_{1k}] * [B_{ki}*d_{2i}]
-                # to simplify the computation.
-                C11 = self.C_model(key1, model=model, known_cov=known_cov, time_index=time_index)
-                C22 = self.C_model(key2, model=model, known_cov=known_cov, time_index=time_index)
-                E21C11 = np.multiply(np.transpose(E_matrices.conj(), (0,2,1)), np.diag(C11))
-                E12C22 = np.multiply(E_matrices, np.diag(C22))
-                # Get q_q, q_qdagger, qdagger_qdagger
-                q_q, qdagger_qdagger = 0.+1.j*0, 0.+1.j*0
-                q_qdagger = np.einsum('bij, cji->bc', E12C22, E21C11, optimize=einstein_path_0)
-            elif model == 'foreground_dependent':
-                # calculate tr[ E^{12,b} Cautos^{22} E^{21,c} Cautos^{11} +
-                # E^{12,b} Cs E^{21,c} Cautos^{11} +
-                # E^{12,b} Cautos^{22} E^{21,c} Cs ],
-                # and we take Cs_{ij} = 1/2 * [ x1_i x2_j^{*} + x2_i x1_j^{*} ].
-                # For terms like E^{12,b} Cs E^{21,c} Cautos^{11},
-                # we have used tr[A u u*^t B D_2] = \sum_{ijkm} A_{ij} u_j u*_k B_{km} D_{2mi} \\
-                # = \sum_{i} [ \sum_j A_{ij} u_j ] * [\sum_k u*_k B_{ki} ] * d_{2i}
-                # to simplify the computation.
-                C11_autos = self.C_model(key1, model='autos', known_cov=known_cov, time_index=time_index)
-                C22_autos = self.C_model(key2, model='autos', known_cov=known_cov, time_index=time_index)
-                E21C11_autos = np.multiply(np.transpose(E_matrices.conj(), (0,2,1)), np.diag(C11_autos))
-                E12C22_autos = np.multiply(E_matrices, np.diag(C22_autos))
-                # Get q_q, q_qdagger, qdagger_qdagger
-                q_q, qdagger_qdagger = 0.+1.j*0, 0.+1.j*0
-                q_qdagger = np.einsum('bij, cji->bc', E12C22_autos, E21C11_autos, optimize=einstein_path_0)
-                x1 = self.w(key1)[:,time_index] * self.x(key1)[:,time_index]
-                x2 = self.w(key2)[:,time_index] * self.x(key2)[:,time_index]
-                E12_x1 = np.dot(E_matrices, x1)
-                E12_x2 = np.dot(E_matrices, x2)
-                x2star_E21 = E12_x2.conj()
-                x1star_E21 = E12_x1.conj()
-                x1star_E12 = np.dot(np.transpose(E_matrices,(0,2,1)), x1.conj())
-                x2star_E12 = np.dot(np.transpose(E_matrices,(0,2,1)), x2.conj())
-                E21_x1 = x1star_E12.conj()
-                E21_x2 = x2star_E12.conj()
-                SN_cov = np.einsum('bi,ci,i->bc', E12_x1, x2star_E21, np.diag(C11_autos), optimize=einstein_path_1)/2. + np.einsum('bi,ci,i->bc', E12_x2, x1star_E21, np.diag(C11_autos), optimize=einstein_path_1)/2.\
-                            + np.einsum('bi,ci,i->bc', x2star_E12, E21_x1, np.diag(C22_autos), optimize=einstein_path_1)/2. + np.einsum('bi,ci,i->bc', x1star_E12, E21_x2, np.diag(C22_autos), optimize=einstein_path_1)/2.
-                # Apply zero clipping on the columns and rows containing negative diagonal elements
-                SN_cov[np.real(np.diag(SN_cov))<=0., :] = 0. + 1.j*0
-                SN_cov[:, np.real(np.diag(SN_cov))<=0.,] = 0. + 1.j*0
-                q_qdagger += SN_cov
+        # E matrices, factored as (U, V) of shape (spw_Ndlys, spw_Nfreqs) each
+        # unless exact_norm is set (see _unnormed_E_operator)
+        E = self._unnormed_E_operator(key1, key2, exact_norm=exact_norm, pol=pol)
+        E_dagger = _E_dagger(E)
+        Ntimes = self.dsets[0].Ntimes
+        # the variances of p only need the variances of q if M is diagonal
+        delay_diag = diag_only and np.all(M * (1 - np.eye(M.shape[-1])) == 0)
+
+        # the covariances only depend on the inputs at each time, i.e. the
+        # input covariance matrices and M, so they are only computed once per
+        # distinct set of inputs and then copied to all times with the same
+        # inputs. `times` holds the first time of each distinct set and
+        # `inverse` the index in `times` of the set of each time.
+        # When model is 'foreground_dependent', the visibility outer products
+        # differ between times, so all times are computed.
+        times = inverse = np.arange(Ntimes)
+
+        # the q covariances of all times, with shape (Ntimes, spw_Ndlys, spw_Ndlys),
+        # or (Ntimes, spw_Ndlys) if delay_diag, or zero if they vanish
+        q_q, qdagger_qdagger = 0.+1.j*0, 0.+1.j*0
+        if model in ['dsets','autos']:
+            # calculate <q_a q_b^\dagger> - <q_a><q_b^\dagger> = tr[ E^{12,a} C^{22} E^{21,b} C^{11} ]
+            # for all times at once, from the diagonals of C^{11} and C^{22}
+            C11 = self._C_diag_times(key1, model, times, known_cov=known_cov)
+            C22 = self._C_diag_times(key2, model, times, known_cov=known_cov)
+            digests = [_array_digest(C11[t], C22[t], M[t]) for t in times]
+            _, times, inverse = np.unique(digests, return_index=True,
+                                          return_inverse=True)
+            C11, C22 = C11[times], C22[times]
+            q_qdagger = _E_traces(E, C22, E_dagger, C11, diag=True,
+                                  delay_diag=delay_diag)
+        elif model == 'foreground_dependent':
+            # calculate tr[ E^{12,b} Cautos^{22} E^{21,c} Cautos^{11} +
+            # E^{12,b} Cs E^{21,c} Cautos^{11} +
+            # E^{12,b} Cautos^{22} E^{21,c} Cs ],
+            # and we take Cs_{ij} = 1/2 * [ x1_i x2_j^{*} + x2_i x1_j^{*} ].
+            # For terms like E^{12,b} Cs E^{21,c} Cautos^{11},
+            # we have used tr[A u u*^t B D_2] = \sum_{ijkm} A_{ij} u_j u*_k B_{km} D_{2mi} \\
+            # = \sum_{i} [ \sum_j A_{ij} u_j ] * [\sum_k u*_k B_{ki} ] * d_{2i}
+            # to simplify the computation.
+            C11_autos = self._C_diag_times(key1, 'autos', times, known_cov=known_cov)
+            C22_autos = self._C_diag_times(key2, 'autos', times, known_cov=known_cov)
+            q_qdagger = _E_traces(E, C22_autos, E_dagger, C11_autos, diag=True,
+                                  delay_diag=delay_diag)
+            # weighted data of all times, with shape (Ntimes, spw_Nfreqs)
+            x1 = (self.w(key1) * self.x(key1))[:, times].T
+            x2 = (self.w(key2) * self.x(key2))[:, times].T
+            # products with shape (Ntimes, spw_Ndlys, spw_Nfreqs)
+            E_T = _E_transpose(E)
+            E12_x1 = _E_dot(E, x1)
+            E12_x2 = _E_dot(E, x2)
+            x2star_E21 = E12_x2.conj()
+            x1star_E21 = E12_x1.conj()
+            x1star_E12 = _E_dot(E_T, x1.conj())
+            x2star_E12 = _E_dot(E_T, x2.conj())
+            E21_x1 = x1star_E12.conj()
+            E21_x2 = x2star_E12.conj()
+            if delay_diag:
+                SN_cov = np.sum(E12_x1 * C11_autos[:, None] * x2star_E21
+                                + E12_x2 * C11_autos[:, None] * x1star_E21
+                                + x2star_E12 * C22_autos[:, None] * E21_x1
+                                + x1star_E12 * C22_autos[:, None] * E21_x2, axis=2) / 2.
+                # Apply zero clipping on the negative diagonal elements
+                SN_cov[np.real(SN_cov) <= 0.] = 0. + 1.j*0
             else:
-                # for general case (which is the slowest without simplification)
-                C11 = self.C_model(key1, model=model, known_cov=known_cov, time_index=time_index)
-                C22 = self.C_model(key2, model=model, known_cov=known_cov, time_index=time_index)
-                C21 = self.cross_covar_model(key2, key1, model=model, conj_1=False, conj_2=True, known_cov=known_cov, time_index=time_index)
-                C12 = self.cross_covar_model(key1, key2, model=model, conj_1=False, conj_2=True, known_cov=known_cov, time_index=time_index)
-                P11 = self.cross_covar_model(key1, key1, model=model, conj_1=False, conj_2=False, known_cov=known_cov, time_index=time_index)
-                S11 = self.cross_covar_model(key1, key1, model=model, conj_1=True, conj_2=True, known_cov=known_cov, time_index=time_index)
-                P22 = self.cross_covar_model(key2, key2, model=model, conj_1=False, conj_2=False, known_cov=known_cov, time_index=time_index)
-                S22 = self.cross_covar_model(key2, key2, model=model, conj_1=True, conj_2=True, known_cov=known_cov, time_index=time_index)
-                P21 = self.cross_covar_model(key2, key1, model=model, conj_1=False, conj_2=False, known_cov=known_cov, time_index=time_index)
-                S21 = self.cross_covar_model(key2, key1, model=model, conj_1=True, conj_2=True, known_cov=known_cov, time_index=time_index)
+                SN_cov = (np.matmul(E12_x1 * C11_autos[:, None], np.transpose(x2star_E21, (0,2,1)))
+                          + np.matmul(E12_x2 * C11_autos[:, None], np.transpose(x1star_E21, (0,2,1)))
+                          + np.matmul(x2star_E12 * C22_autos[:, None], np.transpose(E21_x1, (0,2,1)))
+                          + np.matmul(x1star_E12 * C22_autos[:, None], np.transpose(E21_x2, (0,2,1)))) / 2.
+                # Apply zero clipping on the columns and rows containing negative diagonal elements
+                clip = np.real(np.diagonal(SN_cov, axis1=1, axis2=2)) <= 0.
+                SN_cov[clip[:, :, None] | clip[:, None, :]] = 0. + 1.j*0
+            q_qdagger = q_qdagger + SN_cov
+        else:
+            # for general case (which is the slowest without simplification)
+            q_q, q_qdagger, qdagger_qdagger = [], [], []
+            first, inverse, seen = [], [], {}
+            # the empirical covariances are averaged over time, so they are
+            # the same at all times
+            inputs = None
+            for time_index in range(Ntimes):
+                if inputs is None or model != 'empirical':
+                    C11 = self.C_model(key1, model=model, known_cov=known_cov, time_index=time_index)
+                    C22 = self.C_model(key2, model=model, known_cov=known_cov, time_index=time_index)
+                    C21 = self.cross_covar_model(key2, key1, model=model, conj_1=False, conj_2=True, known_cov=known_cov, time_index=time_index)
+                    C12 = self.cross_covar_model(key1, key2, model=model, conj_1=False, conj_2=True, known_cov=known_cov, time_index=time_index)
+                    P11 = self.cross_covar_model(key1, key1, model=model, conj_1=False, conj_2=False, known_cov=known_cov, time_index=time_index)
+                    S11 = self.cross_covar_model(key1, key1, model=model, conj_1=True, conj_2=True, known_cov=known_cov, time_index=time_index)
+                    P22 = self.cross_covar_model(key2, key2, model=model, conj_1=False, conj_2=False, known_cov=known_cov, time_index=time_index)
+                    S22 = self.cross_covar_model(key2, key2, model=model, conj_1=True, conj_2=True, known_cov=known_cov, time_index=time_index)
+                    P21 = self.cross_covar_model(key2, key1, model=model, conj_1=False, conj_2=False, known_cov=known_cov, time_index=time_index)
+                    S21 = self.cross_covar_model(key2, key1, model=model, conj_1=True, conj_2=True, known_cov=known_cov, time_index=time_index)
+                    inputs = _array_digest(C11, C22, C21, C12, P11, S11, P22,
+                                           S22, P21, S21)
+                digest = inputs + _array_digest(M[time_index])
+                if digest in seen:
+                    inverse.append(seen[digest])
+                    continue
+                seen[digest] = len(first)
+                inverse.append(len(first))
+                first.append(time_index)
                 # Get q_q, q_qdagger, qdagger_qdagger
-                if np.isclose(P22, 0).all() or np.isclose(S11,0).all():
-                    q_q = 0.+1.j*0
-                else:
-                    E12P22 = np.matmul(E_matrices, P22)
-                    E21starS11 = np.matmul(np.transpose(E_matrices, (0,2,1)), S11)
-                    q_q = np.einsum('bij, cji->bc', E12P22, E21starS11, optimize=einstein_path_0)
-                if np.isclose(C21, 0).all():
-                    q_q += 0.+1.j*0
-                else:
-                    E12C21 = np.matmul(E_matrices, C21)
-                    q_q += np.einsum('bij, cji->bc', E12C21, E12C21, optimize=einstein_path_0)
-                E21C11 = np.matmul(np.transpose(E_matrices.conj(), (0,2,1)), C11)
-                E12C22 = np.matmul(E_matrices, C22)
-                q_qdagger = np.einsum('bij, cji->bc', E12C22, E21C11, optimize=einstein_path_0)
-                if np.isclose(P21, 0).all() or np.isclose(S21,0).all():
-                    q_qdagger += 0.+1.j*0
-                else:
-                    E12P21 = np.matmul(E_matrices, P21)
-                    E12starS21 = np.matmul(E_matrices.conj(), S21)
-                    q_qdagger += np.einsum('bij, cji->bc', E12P21, E12starS21, optimize=einstein_path_0)
-                if np.isclose(C12, 0).all():
-                    qdagger_qdagger = 0.+1.j*0
-                else:
-                    E21C12 = np.matmul(np.transpose(E_matrices.conj(), (0,2,1)), C12)
-                    qdagger_qdagger = np.einsum('bij, cji->bc', E21C12, E21C12, optimize=einstein_path_0)
-                if np.isclose(P11, 0).all() or np.isclose(S22,0).all():
-                    qdagger_qdagger += 0.+1.j*0
-                else:
-                    E21P11 = np.matmul(np.transpose(E_matrices.conj(), (0,2,1)), P11)
-                    E12starS22 = np.matmul(E_matrices.conj(), S22)
-                    qdagger_qdagger += np.einsum('bij, cji->bc', E21P11, E12starS22, optimize=einstein_path_0)
-
-            cov_q_real_temp = (q_q + qdagger_qdagger + q_qdagger + q_qdagger.conj() ) / 4.
-            cov_q_imag_temp = -(q_q + qdagger_qdagger - q_qdagger - q_qdagger.conj() ) / 4.
-
-            m = M[time_index]
-            # calculate \sum_{bd} [ M_{ab} M_{cd} (<q_b q_d> - <q_b><q_d>) ]
-            if np.isclose([q_q], 0).all():
-                MMq_q = np.zeros((E_matrices.shape[0],E_matrices.shape[0])).astype(np.complex128)
-            else:
-                assert np.shape(q_q) == np.shape(m), "covariance matrix and normalization matrix has different shapes."
-                MMq_q = np.einsum('ab,cd,bd->ac', m, m, q_q, optimize=einstein_path_2)
-            # calculate \sum_{bd} [ M_{ab} M_{cd}^* (<q_b q_d^\dagger> - <q_b><q_d^\dagger>) ]
-            # and \sum_{bd} [ M_{ab}^* M_{cd} (<q_b^\dagger q_d> - <q_b^\dagger><q_d>) ]
-            if np.isclose([q_qdagger], 0).all():
-                MM_q_qdagger = 0.+1.j*0
-                M_Mq_qdagger_ = 0.+1.j*0
-            else:
-                assert np.shape(q_qdagger) == np.shape(m), "covariance matrix and normalization matrix has different shapes."
-                MM_q_qdagger = np.einsum('ab,cd,bd->ac', m, m.conj(), q_qdagger, optimize=einstein_path_2)
-                M_Mq_qdagger_ = np.einsum('ab,cd,bd->ac', m.conj(), m, q_qdagger.conj(), optimize=einstein_path_2)
-            # calculate \sum_{bd} [ M_{ab}^* M_{cd}^* (<q_b^\dagger q_d^\dagger> - <q_b^\dagger><q_d^\dagger>) ]
-            if np.isclose([qdagger_qdagger], 0).all():
-                M_M_qdagger_qdagger = 0.+1.j*0
-            else:
-                assert np.shape(qdagger_qdagger) == np.shape(m), "covariance matrix and normalization matrix has different shapes."
-                M_M_qdagger_qdagger = np.einsum('ab,cd,bd->ac', m.conj(), m.conj(), qdagger_qdagger, optimize=einstein_path_2)
-
-            cov_p_real_temp = ( MMq_q + MM_q_qdagger + M_Mq_qdagger_ + M_M_qdagger_qdagger)/ 4.
-            cov_p_imag_temp = -( MMq_q - MM_q_qdagger - M_Mq_qdagger_ + M_M_qdagger_qdagger)/ 4.
-            # cov_p_real_temp has a shaoe of (spw_Ndlys, spw_Ndlys)
-
-            if check_uniform_input:
-            # if the covariance matrix is uniform along the time axis, we just calculate the result for one timestamp and duplicate its copies
-            # along the time axis.
-                cov_q_real.extend([cov_q_real_temp]*self.dsets[0].Ntimes)
-                cov_q_imag.extend([cov_q_imag_temp]*self.dsets[0].Ntimes)
-                cov_p_real.extend([cov_p_real_temp]*self.dsets[0].Ntimes)
-                cov_p_imag.extend([cov_p_imag_temp]*self.dsets[0].Ntimes)
+                qq = qdqd = 0.+1.j*0
+                if not (np.isclose(P22, 0).all() or np.isclose(S11,0).all()):
+                    qq = qq + _E_traces(E, P22, _E_transpose(E), S11, delay_diag=delay_diag)
+                if not np.isclose(C21, 0).all():
+                    qq = qq + _E_traces(E, C21, E, C21, delay_diag=delay_diag)
+                qqd = _E_traces(E, C22, E_dagger, C11, delay_diag=delay_diag)
+                if not (np.isclose(P21, 0).all() or np.isclose(S21,0).all()):
+                    qqd = qqd + _E_traces(E, P21, _E_conj(E), S21, delay_diag=delay_diag)
+                if not np.isclose(C12, 0).all():
+                    qdqd = qdqd + _E_traces(E_dagger, C12, E_dagger, C12, delay_diag=delay_diag)
+                if not (np.isclose(P11, 0).all() or np.isclose(S22,0).all()):
+                    qdqd = qdqd + _E_traces(E_dagger, P11, _E_conj(E), S22, delay_diag=delay_diag)
+                q_q.append(qq + np.zeros_like(qqd))
+                q_qdagger.append(qqd)
+                qdagger_qdagger.append(qdqd + np.zeros_like(qqd))
+            times, inverse = np.array(first), np.array(inverse)
+            q_q, q_qdagger, qdagger_qdagger = [
+                np.asarray(q, dtype=np.complex128)
+                for q in (q_q, q_qdagger, qdagger_qdagger)]
+
+        cov_q_real = (q_q + qdagger_qdagger + q_qdagger + q_qdagger.conj() ) / 4.
+        cov_q_imag = -(q_q + qdagger_qdagger - q_qdagger - q_qdagger.conj() ) / 4.
+
+        m = M[times]
+        if delay_diag:
+            m = np.diagonal(m, axis1=1, axis2=2)
+        assert q_qdagger.shape == m.shape, "covariance matrix and normalization matrix has different shapes."
+        # the M products of q covariances that are close to zero at a given
+        # time are zero
+        def nonzero(q):
+            return ~np.isclose(q, 0).all(axis=tuple(range(1, q.ndim)))[:, None]
+        if delay_diag:
+            # the sums over (b, d) below only have b = d = a terms
+            def sandwich(A, q, B):
+                return A * q * B * nonzero(q)
+        elif diag_only:
+            def sandwich(A, q, B):
+                return np.sum(np.matmul(A, q) * B, axis=2) * nonzero(q)
+        else:
+            def sandwich(A, q, B):
+                return np.matmul(np.matmul(A, q), np.transpose(B, (0,2,1))) \
+                       * nonzero(q)[:, None]
+        # calculate \sum_{bd} [ M_{ab} M_{cd} (<q_b q_d> - <q_b><q_d>) ]
+        if np.ndim(q_q):
+            MMq_q = sandwich(m, q_q, m)
+        else:
+            MMq_q = 0.+1.j*0
+        # calculate \sum_{bd} [ M_{ab} M_{cd}^* (<q_b q_d^\dagger> - <q_b><q_d^\dagger>) ]
+        # and \sum_{bd} [ M_{ab}^* M_{cd} (<q_b^\dagger q_d> - <q_b^\dagger><q_d>) ]
+        MM_q_qdagger = sandwich(m, q_qdagger, m.conj())
+        M_Mq_qdagger_ = sandwich(m.conj(), q_qdagger.conj(), m)
+        # calculate \sum_{bd} [ M_{ab}^* M_{cd}^* (<q_b^\dagger q_d^\dagger> - <q_b^\dagger><q_d^\dagger>) ]
+        if np.ndim(qdagger_qdagger):
+            M_M_qdagger_qdagger = sandwich(m.conj(), qdagger_qdagger, m.conj())
+        else:
+            M_M_qdagger_qdagger = 0.+1.j*0
+
+        if diag_only and not delay_diag:
+            cov_q_real, cov_q_imag = [np.diagonal(cov, axis1=1, axis2=2)
+                                      for cov in (cov_q_real, cov_q_imag)]
+
+        cov_p_real = ( MMq_q + MM_q_qdagger + M_Mq_qdagger_ + M_M_qdagger_qdagger)/ 4.
+        cov_p_imag = -( MMq_q - MM_q_qdagger - M_Mq_qdagger_ + M_M_qdagger_qdagger)/ 4.
+
+        if not np.array_equal(inverse, np.arange(Ntimes)):
+            # copy the covariances of each distinct set of inputs to all
+            # times with the same inputs
+            cov_q_real, cov_q_imag, cov_p_real, cov_p_imag = [
+                np.take(cov, inverse, axis=0)
+                for cov in (cov_q_real, cov_q_imag, cov_p_real, cov_p_imag)]
+            if len(times) == 1:
                 warnings.warn("Producing time-uniform covariance matrices between bandpowers.")
-                break
-            else:
-                cov_q_real.append(cov_q_real_temp)
-                cov_q_imag.append(cov_q_imag_temp)
-                cov_p_real.append(cov_p_real_temp)
-                cov_p_imag.append(cov_p_imag_temp)
-
-        cov_q_real = np.asarray(cov_q_real)
-        cov_q_imag = np.asarray(cov_q_imag)
-        cov_p_real = np.asarray(cov_p_real)
-        cov_p_imag = np.asarray(cov_p_imag)
         # (Ntimes, spw_Ndlys, spw_Ndlys)
 
         return cov_q_real, cov_q_imag, cov_p_real, cov_p_imag
@@ -2054,6 +3125,11 @@ class PSpecData(object):
         normalized. If the beam is being provided, this will be done in the pspec
         function.
 
+        G, H and band_covar may also be stacks of matrices, e.g. of many
+        baseline pairs, with dimensions (..., Nfreqs, Nfreqs), in which case
+        the matrices are decomposed in batches and stacks of M and W are
+        returned.
+
         Parameters
         ----------
         G : array_like
@@ -2111,7 +3187,13 @@ class PSpecData(object):
 
             except np.linalg.LinAlgError as err:
                 if 'Singular matrix' in str(err):
-                    M = np.linalg.pinv(H, rcond=rcond)
+                    # only pseudo-invert the singular matrices of a stack
+                    M = np.empty(np.shape(H), dtype=np.result_type(H, np.float64))
+                    for idx in np.ndindex(*np.shape(H)[:-2]):
+                        try:
+                            M[idx] = np.linalg.inv(H[idx])
+                        except np.linalg.LinAlgError:
+                            M[idx] = np.linalg.pinv(H[idx], rcond=rcond)
                     raise_warning("Warning: Window function matrix is singular "
                                   "and cannot be inverted, so using "
                                   " pseudoinverse instead.")
@@ -2120,9 +3202,9 @@ class PSpecData(object):
                     raise np.linalg.LinAlgError("Linear algebra error with H matrix "
                                                 "during MW computation.")
 
-            W = np.dot(M, H)
-            W_norm = np.sum(W, axis=1)
-            W = (W.T / W_norm).T
+            W = np.matmul(M, H)
+            W_norm = np.sum(W, axis=-1)
+            W = W / W_norm[..., None]
 
         elif mode == 'V^-1/2':
             if np.sum(band_covar) == None:
@@ -2134,23 +3216,25 @@ class PSpecData(object):
             if (nonpos_eigvals).any():
                 raise_warning("At least one non-positive eigenvalue for the "
                               "unnormed bandpower covariance matrix.")
-                # truncate them
-                eigvals = eigvals[~nonpos_eigvals]
-                eigvects = eigvects[:, ~nonpos_eigvals]
-            V_minus_half = np.dot(eigvects, np.dot(np.diag(1./np.sqrt(eigvals)), eigvects.T))
+            # truncate them
+            inv_sqrt_eigvals = np.zeros_like(eigvals)
+            inv_sqrt_eigvals[~nonpos_eigvals] = 1. / np.sqrt(eigvals[~nonpos_eigvals])
+            V_minus_half = np.matmul(eigvects, inv_sqrt_eigvals[..., None]
+                                     * np.swapaxes(eigvects, -1, -2))
 
-            W_norm = np.diag(1. / np.sum(np.dot(V_minus_half, H), axis=1))
-            M = np.dot(W_norm, V_minus_half)
-            W = np.dot(M, H)
+            W_norm = 1. / np.sum(np.matmul(V_minus_half, H), axis=-1)
+            M = W_norm[..., None] * V_minus_half
+            W = np.matmul(M, H)
 
         elif mode == 'I':
             # This is not the M matrix as is rigorously defined in the
             # OQE formalism, because the power spectrum scalar is excluded
             # in this matrix normalization (i.e., M doesn't do the full
             # normalization)
-            M = np.diag(1. / np.sum(G, axis=1))
-            W_norm = np.diag(1. / np.sum(H, axis=1))
-            W = np.dot(W_norm, H)
+            diag = np.arange(np.shape(G)[-1])
+            M = np.zeros(np.shape(G), dtype=np.result_type(G, np.float64))
+            M[..., diag, diag] = 1. / np.sum(G, axis=-1)
+            W = (1. / np.sum(H, axis=-1))[..., None] * H
         else:
             raise NotImplementedError("Cholesky decomposition mode not currently supported.")
             # # Cholesky decomposition
@@ -2220,6 +3304,53 @@ class PSpecData(object):
         if mode >= self.spw_Ndlys:
             raise IndexError("Cannot compute Q matrix for a mode outside"
                              "of allowed range of delay modes.")
+        if allow_fft:
+            spw_ops = self.get_spw_operators()
+            m = spw_ops['m_ext' if include_extension else 'm'][mode]
+        else:
+            m = self.get_Q_alt_vectors(modes=[mode], allow_fft=allow_fft,
+                                       include_extension=include_extension)[0]
+
+        Q_alt = np.einsum('i,j', m.conj(), m) # dot it with its conjugate
+        return Q_alt
+
+    def get_Q_alt_vectors(self, modes=None, allow_fft=True,
+                          include_extension=False):
+        """
+        Vectors m_alpha that take the Fourier transform from frequency to
+        delay mode alpha, such that Q_alt for mode alpha is the outer product
+
+            Q^alt_alpha = m_alpha^* m_alpha^t.
+
+        See get_Q_alt for details.
+
+        Parameters
+        ----------
+        modes : list of int, optional
+            Central wavenumbers (indices) of the bandpowers. Default: None,
+            which returns all spw_Ndlys modes.
+
+        allow_fft : boolean, optional
+            If set to True, allows a shortcut FFT method when
+            the number of delay bins equals the number of delay channels.
+            Default: True
+
+        include_extension : boolean, optional
+            If True, the vectors include the filter extension channels.
+            Default: False
+
+        Return
+        -------
+        m : array_like
+            Complex array of shape (len(modes), nfreq), where nfreq is
+            spw_Nfreqs (plus the filter extension if include_extension).
+        """
+        if self.spw_Ndlys == None:
+            self.set_Ndlys()
+        if modes is None:
+            modes = np.arange(self.spw_Ndlys)
+        modes = np.asarray(modes)
+
         nfreq = self.spw_Nfreqs
         if include_extension:
             nfreq = nfreq + np.sum(self.filter_extension)
@@ -2227,20 +3358,88 @@ class PSpecData(object):
         else:
             phase_correction = 0.
         if (self.spw_Ndlys == nfreq) and (allow_fft == True):
-            _m = np.zeros((nfreq,), dtype=np.complex)
-            _m[mode] = 1. # delta function at specific delay mode
+            _m = np.zeros((len(modes), nfreq), dtype=np.complex)
+            _m[np.arange(len(modes)), modes] = 1. # delta fn at each delay mode
             # FFT to transform to frequency space
-            m = np.fft.fft(np.fft.ifftshift(_m))
+            m = np.fft.fft(np.fft.ifftshift(_m, axes=1), axis=1)
         else:
             if self.spw_Ndlys % 2 == 0:
                 start_idx = -self.spw_Ndlys/2
             else:
                 start_idx = -(self.spw_Ndlys - 1)/2
-            m = (start_idx + mode) * (np.arange(nfreq) - phase_correction)
+            m = np.outer(start_idx + modes, np.arange(nfreq) - phase_correction)
             m = np.exp(-2j * np.pi * m / self.spw_Ndlys)
 
-        Q_alt = np.einsum('i,j', m.conj(), m) # dot it with its conjugate
-        return Q_alt
+        return m
+
+    def get_spw_operators(self):
+        """
+        Return the delay and tapering operators for the current spectral
+        window. These only depend on self.spw_range, self.spw_Ndlys,
+        self.filter_extension and self.taper, so they are built once on
+        first use after any of these change (e.g. through set_spw,
+        set_Ndlys, set_filter_extension or set_taper), and shared between
+        q_hat, get_G, get_H, get_unnormed_E and R.
+
+        Returns
+        -------
+        spw_ops : dict
+            Dictionary with the following items:
+
+            'm': Q_alt vectors of all delay modes (see get_Q_alt_vectors),
+            with dimensions (spw_Ndlys, spw_Nfreqs).
+
+            'm_ext': Same as 'm', including the filter extension channels,
+            with dimensions (spw_Ndlys, nfreq), where
+            nfreq = spw_Nfreqs + sum(filter_extension).
+
+            'taper': Tapering function, with dimensions (spw_Nfreqs,).
+
+            'tmat': Truncation matrix from the extended band to the spw,
+            with dimensions (spw_Nfreqs, nfreq).
+
+            'sinc_matrix': sinc(pi (nu_i - nu_j) / nfreq) response used by
+            get_H, with dimensions (nfreq, nfreq).
+
+            'sinc_eigvals', 'sinc_eigvecs': Eigenvalues and (row)
+            eigenvectors of 'sinc_matrix' above numerical precision.
+        """
+        if self.spw_Ndlys == None:
+            self.set_Ndlys()
+        key = (self.spw_range, self.spw_Nfreqs, self.spw_Ndlys,
+               tuple(self.filter_extension), self.taper)
+        if key == self._spw_ops_key:
+            return self._spw_ops
+
+        fext = self.filter_extension
+        nfreq = self.spw_Nfreqs + np.sum(fext)
+        spw_ops = {}
+        spw_ops['m'] = self.get_Q_alt_vectors()
+        spw_ops['m_ext'] = self.get_Q_alt_vectors(include_extension=True)
+
+        if self.taper == 'none':
+            spw_ops['taper'] = np.ones(self.spw_Nfreqs)
+        else:
+            spw_ops['taper'] = dspec.gen_window(self.taper, self.spw_Nfreqs)
+
+        tmat = np.zeros((self.spw_Nfreqs, nfreq), dtype=complex)
+        tmat[:, fext[0]:fext[0] + self.spw_Nfreqs] = np.identity(self.spw_Nfreqs,
+                                                                 dtype=complex)
+        spw_ops['tmat'] = tmat
+
+        sinc_matrix = np.subtract.outer(np.arange(nfreq),
+                                        np.arange(nfreq)).astype(np.float)
+        sinc_matrix = np.sinc(sinc_matrix / np.float(nfreq))
+        spw_ops['sinc_matrix'] = sinc_matrix
+        # only keep eigenmodes above numerical precision
+        eigvals, eigvecs = np.linalg.eigh(sinc_matrix)
+        keep = np.abs(eigvals) > np.abs(eigvals).max() * nfreq \
+                                 * np.finfo(np.float64).eps
+        spw_ops['sinc_eigvals'] = eigvals[keep]
+        spw_ops['sinc_eigvecs'] = eigvecs[:, keep].T
+
+        self._spw_ops, self._spw_ops_key = spw_ops, key
+        return spw_ops
 
     def get_integral_beam(self, pol=False):
         """
@@ -2344,15 +3543,21 @@ class PSpecData(object):
         Parameters
         ----------
         M : array_like
-            Normalization matrix, M.
+            Normalization matrix, M, with dimensions (Ndlys, Ndlys), or a
+            stack of them with dimensions (..., Ntimes, Ndlys, Ndlys).
 
         q_cov : array_like
-            covariance between bandpowers in q_alpha and q_beta
+            covariance between bandpowers in q_alpha and q_beta, with
+            dimensions (..., Ntimes, Ndlys, Ndlys).
+
+        Returns
+        -------
+        p_cov : array_like
+            Covariance between bandpowers in p_alpha and p_beta, with the
+            dimensions of q_cov.
         """
-        p_cov = np.zeros_like(q_cov)
-        for tnum in range(len(p_cov)):
-            p_cov[tnum] = np.einsum('ab,cd,bd->ac', M, M, q_cov[tnum])
-        return p_cov
+        p_cov = np.matmul(np.matmul(M, q_cov), np.swapaxes(M, -1, -2))
+        return p_cov.astype(np.result_type(q_cov), copy=False)
 
     def broadcast_dset_flags(self, spw_ranges=None, time_thresh=0.2,
                              unflag=False):
@@ -2395,6 +3600,7 @@ class PSpecData(object):
 
         # clear matrix cache (which may be holding weight matrices Y)
         self.clear_cache()
+        self._clear_data_cubes()
 
         # spw type check
         if spw_ranges is None:
@@ -2403,39 +3609,23 @@ class PSpecData(object):
             "spw_ranges must be fed as a list of tuples"
 
         # iterate over datasets
-        for dset in self.dsets:
-            # iterate over spw ranges
-            for spw in spw_ranges:
-                self.set_spw(spw)
-                # unflag
-                if unflag:
-                    # unflag for all times
+        for dset_idx, dset in enumerate(self.dsets):
+            # flags are final once all baselines are calibrated
+            self._apply_lazy_cal(dset_idx)
+            # unflag for all times
+            if unflag:
+                for spw in spw_ranges:
+                    self.set_spw(spw)
                     dset.flag_array[:,:,self.spw_range[0]:self.spw_range[1],:] = False
-                    continue
-                # enact time threshold on flag waterfalls
-                # iterate over polarizations
-                for i in range(dset.Npols):
-                    # iterate over unique baselines
-                    ubl = np.unique(dset.baseline_array)
-                    for bl in ubl:
-                        # get baseline-times indices
-                        bl_inds = np.where(np.in1d(dset.baseline_array, bl))[0]
-                        # get flag waterfall
-                        flags = dset.flag_array[bl_inds, 0, :, i].copy()
-                        Ntimes = float(flags.shape[0])
-                        Nfreqs = float(flags.shape[1])
-                        # get time- and freq-continguous flags
-                        freq_contig_flgs = np.sum(flags, axis=1) / Nfreqs > 0.999999
-                        Ntimes_noncontig = np.sum(~freq_contig_flgs, dtype=np.float)
-                        # get freq channels where non-contiguous flags exceed threshold
-                        exceeds_thresh = np.sum(flags[~freq_contig_flgs], axis=0, dtype=np.float) / Ntimes_noncontig > time_thresh
-                        # flag channels for all times that exceed time_thresh
-                        dset.flag_array[bl_inds, :, np.where(exceeds_thresh)[0][:, None], i] = True
-                        # for pixels that have flags but didn't meet broadcasting limit
-                        # flag the integration within the spw
-                        flags[:, np.where(exceeds_thresh)[0]] = False
-                        flag_ints = np.max(flags[:, self.spw_range[0]:self.spw_range[1]], axis=1)
-                        dset.flag_array[bl_inds[flag_ints], :, self.spw_range[0]:self.spw_range[1], i] = True
+                continue
+            # enact time threshold on the flag waterfalls of all baselines
+            # and polarizations at once, iterating over spw ranges
+            for blt_inds in _bl_time_groups(dset.baseline_array):
+                flags = dset.flag_array[blt_inds, 0]
+                for spw in spw_ranges:
+                    self.set_spw(spw)
+                    _broadcast_flag_cube(flags, self.spw_range, time_thresh)
+                dset.flag_array[blt_inds] = flags[:, :, None]
 
     def units(self, little_h=True):
         """
@@ -2458,8 +3648,9 @@ class PSpecData(object):
             raise IndexError("No datasets have been added yet; cannot "
                              "calculate power spectrum units.")
 
-        # get visibility units
-        vis_units = self.dsets[0].vis_units
+        # get visibility units, which are those of the calibrated data if
+        # the calibration of the first dataset is deferred
+        vis_units = self._lazy_cal_units.get((0, 0), self.dsets[0].vis_units)
 
         # set pspec norm units
         if self.primary_beam is None:
@@ -2660,7 +3851,7 @@ class PSpecData(object):
         else:
             adjustment = self.spw_Ndlys / (self.spw_Nfreqs * ratio)
         if self.taper != 'none':
-            tapering_fct = dspec.gen_window(self.taper, self.spw_Nfreqs)
+            tapering_fct = self.get_spw_operators()['taper']
             adjustment *= np.mean(tapering_fct**2)
 
         return adjustment
@@ -2728,7 +3919,8 @@ class PSpecData(object):
               baseline_tol=1.0, store_cov=False, store_cov_diag=False,
               return_q=False, store_window=True, verbose=True,
               filter_extensions=None, exact_norm=False, history='', r_params=None,
-              cov_model='empirical', known_cov=None, allow_fft=False):
+              cov_model='empirical', known_cov=None, allow_fft=False,
+              nprocs=1, executor=None):
         """
         Estimate the delay power spectrum from a pair of datasets contained in
         this object, using the optimal quadratic estimator of arXiv:1502.06016.
@@ -2827,7 +4019,8 @@ class PSpecData(object):
             `sqrt(diag(cov_array_real)) + 1.j*sqrt(diag(cov_array_imag))`.
             It's a way to save the disk space since the whole cov_array data
             with a size of Ndlys x Ndlys x Ntimes x Nblpairs x Nspws is too
-            large.
+            large. Only the diagonals are computed (see the diag_only
+            argument of get_analytic_covariance()).
 
         return_q : bool, optional
             If True, return the results (delay spectra and covariance
@@ -2913,6 +4106,22 @@ class PSpecData(object):
             Use an fft to compute q-hat.
             Default is False.
 
+        nprocs : int, optional
+            Number of processes over which to split the baseline pairs. The
+            baseline pairs are cut into nprocs contiguous shards, each of
+            which is computed by a worker process, and the shards are then
+            concatenated in order, so that the output is identical to a
+            serial run. Default: 1 (serial).
+
+        executor : object, optional
+            Pool with a map(func, iterable) method, e.g. a
+            concurrent.futures.ProcessPoolExecutor, used to compute the
+            shards if nprocs > 1. This PSpecData object is then sent along
+            with each shard. Thread pools cannot be used, as pspec modifies
+            the state of this object. If None, a multiprocessing.Pool of
+            nprocs workers is created, which receive this object once at
+            startup. Default: None.
+
         Returns
         -------
         uvp : UVPSpec object
@@ -2962,8 +4171,10 @@ class PSpecData(object):
         self.set_symmetric_taper(symmetric_taper)
         self.set_weighting(input_data_weight)
 
-        # Validate the input data to make sure it's sensible
-        self.validate_datasets(verbose=verbose)
+        # Validate the input data to make sure it's sensible (pspec_iter
+        # does so once for all of its chunks)
+        if self._iter_scalars is None:
+            self.validate_datasets(verbose=verbose)
 
         # Currently the "pspec normalization scalar" doesn't work if a
         # non-identity data weighting AND a non-trivial taper are used
@@ -3013,6 +4224,40 @@ class PSpecData(object):
 
         # validate bl-pair redundancy
         validate_blpairs(bl_pairs, dset1, dset2, baseline_tol=baseline_tol)
+        self._clear_data_cubes()
+
+        # split baseline pairs into shards computed by worker processes
+        assert nprocs >= 1, "nprocs must be a positive integer"
+        if min(nprocs, len(bl_pairs)) > 1:
+            kwargs = dict(n_dlys=n_dlys, input_data_weight=input_data_weight,
+                          norm=norm, taper=taper, sampling=sampling,
+                          little_h=little_h, spw_ranges=spw_ranges,
+                          symmetric_taper=symmetric_taper,
+                          baseline_tol=baseline_tol, store_cov=store_cov,
+                          store_cov_diag=store_cov_diag, return_q=return_q,
+                          store_window=store_window, verbose=verbose,
+                          filter_extensions=filter_extensions,
+                          exact_norm=exact_norm, history=history,
+                          r_params=r_params, cov_model=cov_model,
+                          known_cov=known_cov, allow_fft=allow_fft)
+            shards = np.array_split(np.arange(len(bl_pairs)),
+                                    min(nprocs, len(bl_pairs)))
+            tasks = [([bls1[k] for k in shard], [bls2[k] for k in shard],
+                      dsets, pols, kwargs) for shard in shards]
+            if executor is None:
+                pool = multiprocessing.Pool(len(tasks),
+                                            initializer=_init_pspec_worker,
+                                            initargs=(self,))
+                try:
+                    uvps = pool.map(_pspec_worker,
+                                    [(None,) + task for task in tasks])
+                finally:
+                    pool.terminate()
+                    pool.join()
+            else:
+                uvps = list(executor.map(_pspec_worker,
+                                         [(self,) + task for task in tasks]))
+            return _concat_blpair_shards(uvps)
 
         # configure spectral window selections
         if spw_ranges is None:
@@ -3099,8 +4344,11 @@ class PSpecData(object):
             self.set_spw(spw_ranges[i], ndlys=n_dlys[i])
             self.set_filter_extension(filter_extensions[i])
 
-            # clear covariance cache
-            self.clear_cache()
+            # clear per-baseline covariance and weighting caches, which are
+            # not keyed on the spw. Identity-weighting G, H, M and W are
+            # keyed on the spw settings and flag patterns, so they are
+            # reused across spws, dataset pairs and pspec calls
+            self.clear_cache(caches=self.data_cache_names)
 
             # setup empty data arrays
             spw_data = []
@@ -3152,9 +4400,16 @@ class PSpecData(object):
                             "be cross-correlated if primary_beam = None. Cannot "
                             "compute beam scalar for mixed polarizations.")
 
+                    # the scalar is a costly beam integral, which pspec_iter
+                    # only computes for its first chunk
+                    skey = (tuple(self.spw_range), tuple(p), self.taper,
+                            little_h, norm, exact_norm)
+                    if self._iter_scalars is not None \
+                            and skey in self._iter_scalars:
+                        scalar = self._iter_scalars[skey]
                     # using zero'th indexed polarization, as cross-polarized
                     # beams are not yet implemented
-                    if norm == 'H^-1':
+                    elif norm == 'H^-1':
                         # If using decorrelation, the H^-1 normalization
                         # already deals with the taper, so we need to override
                         # the taper when computing the scalar
@@ -3164,6 +4419,8 @@ class PSpecData(object):
                     else:
                         scalar = self.scalar(p, little_h=little_h,
                                 exact_norm=exact_norm)
+                    if self._iter_scalars is not None:
+                        self._iter_scalars[skey] = scalar
                 else:
                     raise_warning("Warning: self.primary_beam is not defined, "
                                   "so pspectra are not properly normalized",
@@ -3173,6 +4430,47 @@ class PSpecData(object):
                 pol = (p[0]) # used in get_integral_beam function to specify the correct polarization for the beam
                 spw_scalar.append(scalar)
 
+                # Gather the data and weights of all baselines into
+                # contiguous cubes, read by x(), w() and dx() below
+                if np.all([isinstance(blp, tuple) for blp in bl_pairs]):
+                    self._set_data_cubes(
+                        [(dsets[0],) + blp[0] + (p_str[0],) for blp in bl_pairs]
+                        + [(dsets[1],) + blp[1] + (p_str[1],) for blp in bl_pairs])
+
+                # Invert the covariances of all baselines at once
+                if input_data_weight == 'iC' \
+                        and np.all([isinstance(blp, tuple) for blp in bl_pairs]):
+                    self.iC_batch(
+                        [(dsets[0],) + blp[0] + (p_str[0],) for blp in bl_pairs]
+                        + [(dsets[1],) + blp[1] + (p_str[1],) for blp in bl_pairs])
+
+                # Calculate unnormalized bandpowers of all baseline pairs at
+                # once (dayenu r_params are only set inside the loop below)
+                q_batch = None
+                if input_data_weight != 'dayenu' and not exact_norm \
+                        and np.all([isinstance(blp, tuple) for blp in bl_pairs]):
+                    if verbose: print("  Building q_hat for all baseline pairs...")
+                    q_batch = self.q_hat_batch(
+                        [(dsets[0],) + blp[0] + (p_str[0],) for blp in bl_pairs],
+                        [(dsets[1],) + blp[1] + (p_str[1],) for blp in bl_pairs],
+                        allow_fft=allow_fft)
+
+                # Calculate the normalization matrices of all baseline pairs
+                # at once, decomposing their G, H and V matrices in batches
+                # (dayenu r_params are only set inside the loop below)
+                GH_batch, MW_batch = None, None
+                if norm != 'I' and input_data_weight != 'dayenu' \
+                        and np.all([isinstance(blp, tuple) for blp in bl_pairs]):
+                    if verbose: print("  Building M and W for all baseline pairs...")
+                    keys1 = [(dsets[0],) + blp[0] + (p_str[0],) for blp in bl_pairs]
+                    keys2 = [(dsets[1],) + blp[1] + (p_str[1],) for blp in bl_pairs]
+                    GH_batch = [self._get_GH(key1, key2, sampling=sampling,
+                                             exact_norm=exact_norm, pol=pol)
+                                for key1, key2 in zip(keys1, keys2)]
+                    MW_batch = self._get_MW_batch(keys1, keys2, GH_batch, norm,
+                                                  sampling=sampling,
+                                                  exact_norm=exact_norm, pol=pol)
+
                 # Loop over baseline pairs
                 for k, blp in enumerate(bl_pairs):
                     # assign keys
@@ -3195,8 +4493,8 @@ class PSpecData(object):
                         print("\n(bl1, bl2) pair: {}\npol: {}".format(blp, tuple(p)))
 
                     # Check that number of non-zero weight chans >= n_dlys
-                    key1_dof = np.sum(~np.isclose(self.Y(key1).diagonal(), 0.0))
-                    key2_dof = np.sum(~np.isclose(self.Y(key2).diagonal(), 0.0))
+                    key1_dof = np.sum(~np.isclose(self._Y_diag(key1), 0.0))
+                    key2_dof = np.sum(~np.isclose(self._Y_diag(key2), 0.0))
                     if key1_dof - np.sum(self.filter_extension) < self.spw_Ndlys\
                      or key2_dof - np.sum(self.filter_extension) < self.spw_Ndlys:
                         if verbose:
@@ -3217,47 +4515,27 @@ class PSpecData(object):
                         self.set_r_param(key2, r_params[key2])
 
                     # Build Fisher matrix
-                    if input_data_weight == 'identity':
-                        # in this case, all Gv and Hv differ only by flagging pattern
-                        # so check if we've already computed this
-                        # First: get flag weighting matrices given key1 & key2
-                        Y = np.vstack([self.Y(key1).diagonal(),
-                                       self.Y(key2).diagonal()])
-
-                        # Second: check cache for Y
-                        matches = [np.isclose(Y, y).all()
-                                   for y in self._identity_Y.values()]
-                        if True in matches:
-                            # This Y exists, so pick appropriate G and H and continue
-                            match = list(self._identity_Y.keys())[matches.index(True)]
-                            Gv = self._identity_G[match]
-                            Hv = self._identity_H[match]
-                        else:
-                            # This Y doesn't exist, so compute it
-                            if verbose: print("  Building G...")
-                            Gv = self.get_G(key1, key2, exact_norm=exact_norm, pol = pol)
-                            Hv = self.get_H(key1, key2, sampling=sampling, exact_norm=exact_norm, pol = pol)
-                            # cache it
-                            self._identity_Y[(key1, key2)] = Y
-                            self._identity_G[(key1, key2)] = Gv
-                            self._identity_H[(key1, key2)] = Hv
+                    if GH_batch is not None:
+                        Gv, Hv = GH_batch[k]
                     else:
-                        # for non identity weighting (i.e. iC weighting)
-                        # Gv and Hv are always different, so compute them
-                        if verbose: print("  Building G...")
-                        Gv = self.get_G(key1, key2, exact_norm=exact_norm, pol = pol)
-                        Hv = self.get_H(key1, key2, sampling=sampling, exact_norm=exact_norm, pol = pol)
+                        Gv, Hv = self._get_GH(key1, key2, sampling=sampling,
+                                              exact_norm=exact_norm, pol=pol,
+                                              verbose=verbose)
 
                     # Calculate unnormalized bandpowers
-                    if verbose: print("  Building q_hat...")
-                    qv = self.q_hat(key1, key2, exact_norm=exact_norm, pol=pol, allow_fft=allow_fft)
+                    if q_batch is not None:
+                        qv = q_batch[k]
+                    else:
+                        if verbose: print("  Building q_hat...")
+                        qv = self.q_hat(key1, key2, exact_norm=exact_norm, pol=pol, allow_fft=allow_fft)
 
                     if verbose: print("  Normalizing power spectrum...")
-                    if norm == 'V^-1/2':
-                        V_mat = self.get_unnormed_V(key1, key2, exact_norm=exact_norm, pol = pol)
-                        Mv, Wv = self.get_MW(Gv, Hv, mode=norm, band_covar=V_mat, exact_norm=exact_norm)
+                    if MW_batch is not None:
+                        Mv, Wv = MW_batch[k]
                     else:
-                        Mv, Wv = self.get_MW(Gv, Hv, mode=norm, exact_norm=exact_norm)
+                        Mv, Wv = self._get_MW_batch([key1], [key2], [(Gv, Hv)], norm,
+                                                    sampling=sampling,
+                                                    exact_norm=exact_norm, pol=pol)[0]
                     pv = self.p_hat(Mv, qv)
 
                     # Multiply by scalar
@@ -3282,7 +4560,8 @@ class PSpecData(object):
                                                            exact_norm=exact_norm,
                                                            pol=pol,
                                                            model=cov_model,
-                                                           known_cov=known_cov, )
+                                                           known_cov=known_cov,
+                                                           diag_only=store_cov_diag)
 
                         if self.primary_beam != None:
                             cov_real = cov_real * (scalar)**2.
@@ -3292,6 +4571,9 @@ class PSpecData(object):
                             if isinstance(sa, (np.float, float)):
                                 cov_real = cov_real * (sa)**2.
                                 cov_imag = cov_imag * (sa)**2.
+                            elif store_cov_diag:
+                                cov_real = cov_real * (sa**2)[None]
+                                cov_imag = cov_imag * (sa**2)[None]
                             else:
                                 cov_real = cov_real * np.outer(sa, sa)[None]
                                 cov_imag = cov_imag * np.outer(sa, sa)[None]
@@ -3301,19 +4583,22 @@ class PSpecData(object):
                                 pol_cov_real.extend(np.real(cov_real).astype(np.float64))
                                 pol_cov_imag.extend(np.real(cov_imag).astype(np.float64))
                             if store_cov_diag:
-                                stats = np.sqrt(np.diagonal(np.real(cov_real), axis1=1, axis2=2)) + 1.j*np.sqrt(np.diagonal(np.real(cov_imag), axis1=1, axis2=2))
+                                stats = np.sqrt(np.real(cov_real)) + 1.j*np.sqrt(np.real(cov_imag))
                                 pol_stats_array_cov_model.extend(stats)
                         else:
                             if store_cov:
                                 pol_cov_real.extend(np.real(cov_q_real).astype(np.float64))
                                 pol_cov_imag.extend(np.real(cov_q_imag).astype(np.float64))
                             if store_cov_diag:
-                                stats = np.sqrt(np.diagonal(np.real(cov_q_real), axis1=1, axis2=2)) + 1.j*np.sqrt(np.diagonal(np.real(cov_q_imag), axis1=1, axis2=2))
+                                stats = np.sqrt(np.real(cov_q_real)) + 1.j*np.sqrt(np.real(cov_q_imag))
                                 pol_stats_array_cov_model.extend(stats)
 
                     # store the window_function
                     if store_window:
-                        pol_window_function.extend(np.repeat(Wv[np.newaxis,:,:], qv.shape[1], axis=0).astype(np.float64))
+                        # the window functions are the same at all times, so only views
+                        # of one copy are kept until the output arrays are built
+                        Wv = Wv.astype(np.float64)
+                        pol_window_function.extend(np.broadcast_to(Wv, (qv.shape[1],) + Wv.shape))
 
                     # Get baseline keys
                     if isinstance(blp, list):
@@ -3411,6 +4696,9 @@ class PSpecData(object):
             self.set_filter_extension((0, 0))
             # set filter_extension to be zero when ending the loop
 
+        # the data cubes are a snapshot of the datasets for this call only
+        self._clear_data_cubes()
+
         # fill uvp object
         uvp = uvpspec.UVPSpec()
         uvp.symmetric_taper=symmetric_taper
@@ -3506,6 +4794,67 @@ class PSpecData(object):
         uvp.check()
         return uvp
 
+    def pspec_iter(self, bls1, bls2, dsets, pols, Nblps_per_chunk=100,
+                   **kwargs):
+        """
+        Generator version of pspec(), which estimates the power spectra of
+        consecutive chunks of baseline pairs and yields a UVPSpec object for
+        each chunk as soon as it is done. Memory use is thus bounded by the
+        chunk size rather than by the total number of baseline pairs.
+
+        Normalization matrices cached by one chunk (see _identity_GH_key)
+        are reused by the next ones, and concatenating the yielded objects
+        along the baseline-pair-time axis gives the same power spectra as
+        a single call to pspec(). The datasets are validated once, and the
+        beam scalars of each spectral window and polarization pair are
+        computed for the first chunk only.
+
+        Parameters
+        ----------
+        bls1, bls2 : list
+            List of baseline groups, each group being a list of ant-pair
+            tuples. See pspec().
+
+        dsets : length-2 tuple or list
+            Indices of self.dsets to use in forming power spectra. See
+            pspec().
+
+        pols : tuple or list of tuple
+            Polarization pairs to use in forming power spectra. See pspec().
+
+        Nblps_per_chunk : int, optional
+            Maximum number of baseline pairs per chunk. Smaller chunks use
+            less memory but repeat the per-call setup of pspec() more often.
+            Default: 100.
+
+        kwargs : dict, optional
+            Keyword arguments passed on to pspec().
+
+        Yields
+        ------
+        uvp : UVPSpec object
+            Power spectra of a chunk of baseline pairs.
+        """
+        assert isinstance(bls1, list) and isinstance(bls2, list), \
+            "bls1 and bls2 must be fed as a list of antpair tuples"
+        assert len(bls1) == len(bls2) and len(bls1) > 0, \
+            "length of bls1 must equal length of bls2 and be > 0"
+        assert Nblps_per_chunk >= 1, "Nblps_per_chunk must be a positive integer"
+        self.validate_datasets(verbose=kwargs.get('verbose', True))
+        scalars, beam = {}, self.primary_beam
+        for i in range(0, len(bls1), Nblps_per_chunk):
+            # the scalars depend on the beam, which may be set between chunks
+            if self.primary_beam is not beam:
+                scalars, beam = {}, self.primary_beam
+            self._iter_scalars = scalars
+            try:
+                uvp = self.pspec(bls1[i:i + Nblps_per_chunk],
+                                 bls2[i:i + Nblps_per_chunk], dsets, pols,
+                                 **kwargs)
+            finally:
+                self._iter_scalars = None
+            yield uvp
+
     def rephase_to_dset(self, dset_index=0, inplace=True):
         """
         Rephase visibility data in self.dsets to the LST grid of
@@ -3540,8 +4889,13 @@ class PSpecData(object):
         # run dataset validation
         self.validate_datasets()
 
+        # all baselines are rephased, so calibrate them first
+        for i in range(len(self.dsets)):
+            self._apply_lazy_cal(i)
+
         # assign dsets
         if inplace:
+            self._clear_data_cubes()
             dsets = self.dsets
         else:
             dsets = copy.deepcopy(self.dsets)
@@ -3644,7 +4998,10 @@ class PSpecData(object):
             factors[p] = beam.Jy_to_mK(self.freqs, pol=p)
 
         # iterate over datasets and apply factor
+        self._clear_data_cubes()
         for i, dset in enumerate(self.dsets):
+            # all baselines are converted, so calibrate them first
+            self._apply_lazy_cal(i)
             # check dset vis units
             if dset.vis_units.upper() != 'JY':
                 print("Cannot convert dset {} Jy -> mK because vis_units = {}".format(i, dset.vis_units))
@@ -3667,32 +5024,14 @@ class PSpecData(object):
         lst_tol : float
             Decimal tolerance [radians] for comparing float-valued LST bins.
         """
-        # ensure each dset has same dLST within tolerance / Ntimes
-        dlst = np.median(np.diff(np.unique(self.dsets[0].lst_array)))
-        for dset in self.dsets:
-            _dlst = np.median(np.diff(np.unique(dset.lst_array)))
-            if not np.isclose(dlst, _dlst, atol=10**(-lst_tol) / dset.Ntimes):
-                raise ValueError("Not all datasets in self.dsets are on the same LST "
-                      "grid, cannot LST trim.")
-
-        # get lst array of each dataset, turn into string and add to common_lsts
-        lst_arrs = []
-        common_lsts = set()
-        for i, dset in enumerate(self.dsets):
-            lsts = ["{lst:0.{tol}f}".format(lst=l, tol=lst_tol)
-                    for l in dset.lst_array]
-            lst_arrs.append(lsts)
-            if i == 0:
-                common_lsts = common_lsts.union(set(lsts))
-            else:
-                common_lsts = common_lsts.intersection(set(lsts))
+        times = _common_lst_times(self.dsets, lst_tol=lst_tol)
 
         # iterate through dsets and trim off integrations whose lst isn't
-        # in common_lsts
-        for i, dset in enumerate(self.dsets):
-            trim_inds = np.array([l not in common_lsts for l in lst_arrs[i]])
-            if np.any(trim_inds):
-                self.dsets[i].select(times=dset.time_array[~trim_inds])
+        # in all other dsets
+        self._clear_data_cubes()
+        for i, _times in enumerate(times):
+            if _times is not None:
+                self.dsets[i].select(times=_times)
 
 
 def pspec_run(dsets, filename, dsets_std=None, cals=None, cal_flag=True,
@@ -3707,7 +5046,10 @@ def pspec_run(dsets, filename, dsets_std=None, cals=None, cal_flag=True,
               time_thresh=0.2, Jy2mK=False, overwrite=True, symmetric_taper=True,
               file_type='miriad', verbose=True, exact_norm=False, store_cov=False, store_cov_diag=False, filter_extensions=None,
               history='', r_params=None, tsleep=0.1, maxiter=1, return_q=False, known_cov=None, cov_model='empirical',
-              include_autocorrs=False, include_crosscorrs=True, xant_flag_thresh=0.95, allow_fft=False):
+              include_autocorrs=False, include_crosscorrs=True, xant_flag_thresh=0.95, allow_fft=False,
+              norm_cache_dir=None, norm_cache_max_bytes=None, nprocs=1,
+              executor=None, dset_pair_nprocs=1, max_chunk_bytes=None,
+              append=False, nprefetch=0, lazy_cal=False, dedupe=False):
     """
     Create a PSpecData object, run OQE delay spectrum estimation and write
     results to a PSpecContainer object.
@@ -3979,12 +5321,93 @@ def pspec_run(dsets, filename, dsets_std=None, cals=None, cal_flag=True,
         Use an fft to compute q-hat.
         Default is False.
 
+    norm_cache_dir : str, optional
+        Directory in which to persist the identity-weighting normalization
+        matrices, so that they are reused by later runs with the same
+        spectral windows and flag patterns. See PSpecData.set_norm_cache_dir.
+        Default is None (no on-disk cache).
+
+    norm_cache_max_bytes : int, optional
+        Maximum total size in bytes of norm_cache_dir. Default is None
+        (unbounded).
+
+    nprocs : int, optional
+        Number of processes over which to split the baseline pairs of each
+        dataset pair. See PSpecData.pspec. Default is 1 (serial).
+
+    executor : object, optional
+        Pool with a map(func, iterable) method to use instead of a new
+        multiprocessing.Pool if nprocs > 1. See PSpecData.pspec.
+        Default is None.
+
+    dset_pair_nprocs : int, optional
+        Number of processes over which to split the dataset pairs. Each
+        process computes its dataset pairs serially and stores them in its
+        own shard container, filename + '.shard<N>', and the shards are
+        then merged into filename and deleted (see
+        container.merge_psc_shards). Cannot be combined with nprocs > 1.
+        Default is 1 (serial).
+
+    max_chunk_bytes : int, optional
+        If set, run out-of-core: only the metadata of the datasets is read
+        at first, to work out the baseline-pairs (antennas are excluded
+        with xant_flag_thresh by scanning the flags in chunks of baselines),
+        and the baseline-pairs of each dataset pair are then processed in
+        chunks, reading only the baselines needed by each chunk and
+        appending its power spectra to the container (see append). Each
+        chunk only reads the two datasets of its dataset pair (and the one
+        rephase_to_dset refers to), and the chunks are sized such that the
+        data, flags and nsamples read for a chunk (including dsets_std)
+        take up about max_chunk_bytes. The LSTs kept by trim_dset_lsts are
+        worked out from the metadata of all datasets. Every chunk is loaded
+        and preprocessed (cals, trim_dset_lsts, rephase_to_dset,
+        broadcast_dset_flags, Jy2mK) separately, and normalization matrices are shared between chunks
+        through norm_cache_dir, or a temporary directory if it is None.
+        Requires dsets (and dsets_std) to be fed as filepaths and is not
+        supported with interleave_times. Default is None (load all data).
+
+    append : bool, optional
+        If True, append the power spectra to the power spectra of the same
+        name in the container with PSpecContainer.append_pspec, creating them
+        if they do not exist, instead of storing them with set_pspec.
+        overwrite is then ignored, and baseline-pair times that are already
+        stored raise a ValueError. Default is False.
+
+    nprefetch : int, optional
+        Number of reads to run ahead in background threads, to overlap
+        reading with computing. The datasets, dsets_std and calibration
+        files are then read concurrently, and if max_chunk_bytes is set,
+        the data of the next nprefetch chunks is read while the current
+        chunk is computed, such that up to nprefetch + 1 chunks are held in
+        memory. Default is 0 (read serially).
+
+    lazy_cal : bool, optional
+        If True, calibrate each baseline when it is first used rather than
+        calibrating the whole datasets up front. See PSpecData.add. This
+        pays off if few of the baselines read are used, e.g. with bl_len_range
+        or bl_deg_range restrictions, as long as broadcast_dset_flags,
+        rephase_to_dset and Jy2mK are not used (they calibrate all
+        baselines first) and either blpairs is fed or cal_flag is False
+        (otherwise all flags are needed). Default is False.
+
+    dedupe : bool, optional
+        If True, store only the distinct baseline-pair time slices of the
+        window function and covariance arrays of the power spectra, plus an
+        index of the slice of each baseline-pair time (see
+        UVPSpec.write_to_group). The window functions are the same at all
+        times of a baseline-pair, so this shrinks them by a factor of at
+        least Ntimes. They are expanded again when read. Default is False.
+
     Returns
     -------
     ds : PSpecData object
         The PSpecData object used for OQE of power spectrum, with cached
-        weighting matrices.
+        weighting matrices. If max_chunk_bytes is set, this is the object
+        of the last chunk.
     """
+    # keep the arguments to call pspec_run on chunks of baseline-pairs
+    run_kwargs = dict(locals())
+
     # type check
     assert isinstance(dsets, (list, tuple, np.ndarray)), \
         "dsets must be fed as a list of dataset string paths or UVData objects."
@@ -4032,12 +5455,36 @@ def pspec_run(dsets, filename, dsets_std=None, cals=None, cal_flag=True,
         assert not np.any(['_' in dl for dl in dset_labels]), \
           "cannot accept underscores in input dset_labels: {}".format(dset_labels)
 
+    # run out-of-core on chunks of baseline-pairs
+    if max_chunk_bytes is not None:
+        if isinstance(dsets[0], UVData) or (dsets_std is not None
+                                            and isinstance(dsets_std[0], UVData)):
+            raise ValueError("max_chunk_bytes requires dsets and dsets_std "
+                             "to be fed as filepaths")
+        if interleave_times:
+            raise ValueError("interleave_times is not supported with "
+                             "max_chunk_bytes")
+        return _pspec_run_chunked(run_kwargs, bls, pols, dset_pairs,
+                                  dset_labels)
+
+    # read calibration in the background while reading the data
+    cals_future = None
+    if nprefetch > 0 and cals is not None:
+        if not isinstance(cals, (list, tuple)):
+            cals = [cals for d in dsets]
+        if not isinstance(cals[0], UVCal):
+            pool = ThreadPoolExecutor(max_workers=1)
+            cals_future = pool.submit(_load_cals, cals, verbose=verbose,
+                                      nthreads=nprefetch)
+            pool.shutdown(wait=False)
+
     # if dsets are not UVData, assume they are filepaths or list of filepaths
     if not isinstance(dsets[0], UVData):
         try:
             # load data into UVData objects if fed as list of strings
             t0 = time.time()
-            dsets = _load_dsets(dsets, bls=bls, pols=pols, file_type=file_type, verbose=verbose)
+            dsets = _load_dsets(dsets, bls=bls, pols=pols, file_type=file_type,
+                                verbose=verbose, nthreads=nprefetch)
             utils.log("Loaded data in %1.1f sec." % (time.time() - t0),
                       lvl=1, verbose=verbose)
         except ValueError:
@@ -4061,7 +5508,9 @@ def pspec_run(dsets, filename, dsets_std=None, cals=None, cal_flag=True,
             try:
                 # load data into UVData objects if fed as list of strings
                 t0 = time.time()
-                dsets_std = _load_dsets(dsets_std, bls=bls, pols=pols, file_type=file_type, verbose=verbose)
+                dsets_std = _load_dsets(dsets_std, bls=bls, pols=pols,
+                                        file_type=file_type, verbose=verbose,
+                                        nthreads=nprefetch)
                 utils.log("Loaded data in %1.1f sec." % (time.time() - t0),
                           lvl=1, verbose=verbose)
             except ValueError:
@@ -4074,6 +5523,8 @@ def pspec_run(dsets, filename, dsets_std=None, cals=None, cal_flag=True,
         assert np.all([isinstance(d, UVData) for d in dsets_std]), err_msg
 
     # read calibration if provided (calfits partial IO not yet supported)
+    if cals_future is not None:
+        cals = cals_future.result()
     if cals is not None:
         if not isinstance(cals, (list, tuple)):
             cals = [cals for d in dsets]
@@ -4104,7 +5555,10 @@ def pspec_run(dsets, filename, dsets_std=None, cals=None, cal_flag=True,
 
     # package into PSpecData
     ds = PSpecData(dsets=dsets, wgts=[None for d in dsets], labels=dset_labels,
-                   dsets_std=dsets_std, beam=beam, cals=cals, cal_flag=cal_flag)
+                   dsets_std=dsets_std, beam=beam, cals=cals, cal_flag=cal_flag,
+                   lazy_cal=lazy_cal)
+    if norm_cache_dir is not None:
+        ds.set_norm_cache_dir(norm_cache_dir, max_bytes=norm_cache_max_bytes)
 
     # erase calibration as they are no longer needed
     del cals
@@ -4134,6 +5588,13 @@ def pspec_run(dsets, filename, dsets_std=None, cals=None, cal_flag=True,
         # wgts is currently always None
         ds.wgts.append(None)
 
+        # the new dataset shares the deferred calibration of the first one
+        ds._lazy_cals.append(ds._lazy_cals[0])
+        ds._lazy_cal_applied.update([(1,) + key[1:]
+                                     for key in ds._lazy_cal_applied])
+        ds._lazy_cal_units.update([((1,) + key[1:], units)
+                                   for key, units in ds._lazy_cal_units.items()])
+
         dset_pairs = [(0, 1)]
         dsets = ds.dsets
         dsets_std = ds.dsets_std
@@ -4175,6 +5636,10 @@ def pspec_run(dsets, filename, dsets_std=None, cals=None, cal_flag=True,
     for i, dsetp in enumerate(dset_pairs):
         # get bls if blpairs not fed
         if blpairs is None:
+            # flag-based antenna exclusion needs calibrated flags
+            if cal_flag:
+                for d in dsetp:
+                    ds._apply_lazy_cal(d)
             (bls1, bls2, blps, xants1,
              xants2) = utils.calc_blpair_reds(
                                       dsets[dsetp[0]], dsets[dsetp[1]],
@@ -4207,36 +5672,75 @@ def pspec_run(dsets, filename, dsets_std=None, cals=None, cal_flag=True,
             bls1_list.append(_bls1)
             bls2_list.append(_bls2)
 
-    # Open PSpecContainer to store all output in
-    if verbose: print("Opening {} in transactional mode".format(filename))
-    psc = container.PSpecContainer(filename, mode='rw', keep_open=False, tsleep=tsleep, maxiter=maxiter)
-
     # assign group name
     if groupname is None:
         groupname = '_'.join(dset_labels)
 
-    # Loop over dataset combinations
+    # Collect dataset pairs with non-empty bls lists
+    jobs = []
     for i, dset_idxs in enumerate(dset_pairs):
-        # check bls lists aren't empty
         if len(bls1_list[i]) == 0 or len(bls2_list[i]) == 0:
             continue
-        # Run OQE
-        uvp = ds.pspec(bls1_list[i], bls2_list[i], dset_idxs, pol_pairs, symmetric_taper=symmetric_taper,
-                       spw_ranges=spw_ranges, n_dlys=n_dlys, r_params=r_params,
-                       store_cov=store_cov, store_cov_diag=store_cov_diag, input_data_weight=input_data_weight,
-                       exact_norm=exact_norm, sampling=sampling,
-                       return_q=return_q, cov_model=cov_model, known_cov=known_cov,
-                       norm=norm, taper=taper, history=history, verbose=verbose,
-                       filter_extensions=filter_extensions, store_window=store_window)
-
-        # Store output
         psname = '{}_x_{}{}'.format(dset_labels[dset_idxs[0]],
                                     dset_labels[dset_idxs[1]], psname_ext)
+        jobs.append((psname, bls1_list[i], bls2_list[i], dset_idxs))
+
+    pspec_kwargs = dict(symmetric_taper=symmetric_taper,
+                        spw_ranges=spw_ranges, n_dlys=n_dlys, r_params=r_params,
+                        store_cov=store_cov, store_cov_diag=store_cov_diag,
+                        input_data_weight=input_data_weight,
+                        exact_norm=exact_norm, sampling=sampling,
+                        return_q=return_q, cov_model=cov_model,
+                        known_cov=known_cov, norm=norm, taper=taper,
+                        history=history, verbose=verbose,
+                        filter_extensions=filter_extensions,
+                        store_window=store_window)
+
+    # Open PSpecContainer to store all output in
+    if verbose: print("Opening {} in transactional mode".format(filename))
+    psc = container.PSpecContainer(filename, mode='rw', keep_open=False, tsleep=tsleep, maxiter=maxiter)
+
+    # Compute dataset pairs in parallel, each worker writing into its own
+    # shard container, and merge the shards into psc
+    assert dset_pair_nprocs >= 1, "dset_pair_nprocs must be a positive integer"
+    Nshards = min(dset_pair_nprocs, len(jobs))
+    if Nshards > 1:
+        if nprocs > 1:
+            raise ValueError("nprocs > 1 cannot be combined with "
+                             "dset_pair_nprocs > 1")
+        if append:
+            raise ValueError("append cannot be combined with "
+                             "dset_pair_nprocs > 1")
+        shards = ['{}.shard{:d}'.format(filename, k) for k in range(Nshards)]
+        tasks = [(shard, groupname, jobs[k::Nshards], pol_pairs, pspec_kwargs,
+                  dedupe)
+                 for k, shard in enumerate(shards)]
+        pool = multiprocessing.Pool(Nshards, initializer=_init_pspec_worker,
+                                    initargs=(ds,))
+        try:
+            pool.map(_pspec_run_worker, tasks)
+        finally:
+            pool.terminate()
+            pool.join()
+        if verbose: print("Merging shards into {}".format(filename))
+        container.merge_psc_shards(psc, shards, overwrite=overwrite,
+                                   verbose=verbose)
+        return ds
+
+    # Loop over dataset combinations
+    for psname, bls1, bls2, dset_idxs in jobs:
+        # Run OQE
+        uvp = ds.pspec(bls1, bls2, dset_idxs, pol_pairs, nprocs=nprocs,
+                       executor=executor, **pspec_kwargs)
 
         # write in transactional mode
         if verbose: print("Storing {}".format(psname))
-        psc.set_pspec(group=groupname, psname=psname, pspec=uvp,
-                      overwrite=overwrite)
+        if append:
+            psc.append_pspec(group=groupname, psname=psname, pspec=uvp,
+                             dedupe=dedupe)
+        else:
+            psc.set_pspec(group=groupname, psname=psname, pspec=uvp,
+                          overwrite=overwrite, dedupe=dedupe)
 
     return ds
 
@@ -4328,6 +5832,14 @@ def get_pspec_run_argparser():
     a.add_argument("--xant_flag_thresh", default=0.95, type=float, help="fraction of baseline waterfall that needs to be flagged for entire baseline to be flagged (and excluded from pspec)")
     a.add_argument("--store_window", default=False, action="store_true", help="store window function array.")
     a.add_argument("--allow_fft", default=False, action="store_true", help="use an FFT to comptue q-hat.")
+    a.add_argument("--norm_cache_dir", default=None, type=str, help="Directory in which to persist identity-weighting normalization matrices for reuse across runs.")
+    a.add_argument("--norm_cache_max_bytes", default=None, type=int, help="Maximum size in bytes of norm_cache_dir.")
+    a.add_argument("--nprocs", default=1, type=int, help="Number of processes over which to split the baseline pairs of each dataset pair.")
+    a.add_argument("--dset_pair_nprocs", default=1, type=int, help="Number of processes over which to split the dataset pairs, each writing into its own shard container that is merged into filename at the end.")
+    a.add_argument("--max_chunk_bytes", default=None, type=int, help="If set, read and process the baseline-pairs in chunks whose data takes up about this many bytes, appending their power spectra to filename.")
+    a.add_argument("--nprefetch", default=0, type=int, help="Number of reads to run ahead in background threads to overlap reading with computing.")
+    a.add_argument("--lazy_cal", default=False, action='store_true', help="Calibrate each baseline when it is first used rather than calibrating whole datasets up front.")
+    a.add_argument("--dedupe", default=False, action='store_true', help="Store only the distinct baseline-pair time slices of the window function and covariance arrays, plus an index.")
     return a
 
 
@@ -4395,8 +5907,843 @@ def raise_warning(warning, verbose=True):
         print(warning)
 
 
+def _apply_R(R, x):
+    """
+    Multiply a data-weighting matrix into x from the left, R x, where R is
+    either a matrix or a 1D array holding the diagonal of a diagonal matrix
+    (see PSpecData._R_operator).
+    """
+    if R.ndim == 1:
+        return R.reshape((-1,) + (1,) * (np.ndim(x) - 1)) * x
+    return np.dot(R, x)
+
+
+def _right_apply_R(A, R):
+    """
+    Multiply a data-weighting matrix into A from the right, A R, where R is
+    either a matrix or a 1D array holding the diagonal of a diagonal matrix
+    (see PSpecData._R_operator).
+    """
+    if R.ndim == 1:
+        return A * R
+    return np.dot(A, R)
+
+
+def _blt_index(uvd, bls):
+    """
+    Find the baseline-time indices of a set of baselines in a UVData object
+    with a single sort of its baseline array, rather than one search per
+    baseline. Times are in the order returned by UVData.get_data.
+
+    Parameters
+    ----------
+    uvd : UVData
+        Dataset to index.
+
+    bls : list of tuples
+        Baseline keys of the form (ant1, ant2, pol).
+
+    Returns
+    -------
+    rows : dict
+        Row of each indexed baseline key in the arrays below. Baselines
+        that are absent, present in both orientations, or that have a
+        number of times differing from the first indexed baseline are left
+        out.
+
+    blt_inds : ndarray of int
+        Baseline-time indices, of shape (Nrows, Ntimes).
+
+    pol_inds : ndarray of int
+        Polarization index of each row.
+
+    conj : ndarray of bool
+        Whether each row is stored in the opposite orientation, such that
+        its data need to be conjugated.
+    """
+    order = np.argsort(uvd.baseline_array, kind='stable')
+    ubls, starts, counts = np.unique(uvd.baseline_array[order],
+                                     return_index=True, return_counts=True)
+    lookup = dict(zip(ubls.tolist(), zip(starts, counts)))
+    pols = uvd.polarization_array.tolist()
+
+    rows, blt_inds, pol_inds, conj = {}, [], [], []
+    for bl in bls:
+        pol = bl[2]
+        if isinstance(pol, str):
+            pol = uvutils.polstr2num(pol, x_orientation=uvd.x_orientation)
+        bl_num = uvd.antnums_to_baseline(bl[0], bl[1])
+        conj_num = uvd.antnums_to_baseline(bl[1], bl[0])
+        if bl_num in lookup and (bl[0] == bl[1] or conj_num not in lookup):
+            is_conj = False
+        elif conj_num in lookup and bl_num not in lookup:
+            # conjugating a baseline also conjugates its polarization
+            is_conj, bl_num = True, conj_num
+            pol = uvutils.conj_pol(pol)
+        else:
+            continue
+        if pol not in pols:
+            continue
+        start, count = lookup[bl_num]
+        if len(blt_inds) > 0 and count != len(blt_inds[0]):
+            continue
+        rows[bl] = len(blt_inds)
+        blt_inds.append(order[start:start + count])
+        pol_inds.append(pols.index(pol))
+        conj.append(is_conj)
+
+    return (rows, np.array(blt_inds, dtype=int).reshape(len(rows), -1),
+            np.array(pol_inds, dtype=int), np.array(conj, dtype=bool))
+
+
+def _E_dagger(E):
+    """
+    Return the matrices E^{21,a} = (E^{12,a})^\dagger of a set of E matrices.
+
+    E matrices are held either as a dense array with shape
+    (spw_Ndlys, spw_Nfreqs, spw_Nfreqs), or as a pair of rank-1 factors
+    (U, V) of shape (spw_Ndlys, spw_Nfreqs) each, with E^a = u_a v_a^t (see
+    PSpecData._unnormed_E_operator). The result is held in the same form.
+    """
+    if isinstance(E, tuple):
+        return (E[1].conj(), E[0].conj())
+    return np.transpose(E.conj(), (0, 2, 1))
+
+
+def _E_conj(E):
+    """
+    Return the complex conjugates of a set of E matrices (see _E_dagger).
+    """
+    if isinstance(E, tuple):
+        return (E[0].conj(), E[1].conj())
+    return E.conj()
+
+
+def _E_transpose(E):
+    """
+    Return the transposes of a set of E matrices (see _E_dagger).
+    """
+    if isinstance(E, tuple):
+        return (E[1], E[0])
+    return np.transpose(E, (0, 2, 1))
+
+
+def _E_dot(E, x):
+    """
+    Compute the products E^a x_t of a set of E matrices (see _E_dagger) with
+    a set of vectors.
+
+    Parameters
+    ----------
+    E : tuple or ndarray
+        E matrices, dense or factored.
+
+    x : ndarray
+        Vectors x_t, with shape (Ntimes, spw_Nfreqs).
+
+    Returns
+    -------
+    Ex : ndarray
+        Products E^a x_t, with shape (Ntimes, spw_Ndlys, spw_Nfreqs).
+    """
+    if isinstance(E, tuple):
+        U, V = E
+        return U[None] * np.dot(x, V.T)[:, :, None]
+    return np.transpose(np.dot(E, x.T), (2, 0, 1))
+
+
+def _array_digest(*arrays):
+    """
+    Return a digest of the shapes, types and contents of a set of arrays,
+    used to find the times with identical inputs in
+    PSpecData.get_analytic_covariance.
+    """
+    h = hashlib.sha1()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(repr((a.shape, a.dtype.str)).encode())
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+def _E_traces(E, X, F, Y, diag=False, delay_diag=False):
+    """
+    Compute the traces tr[ E^a X F^b Y ] for all pairs of delays (a, b) of two
+    sets of E matrices (see _E_dagger).
+
+    For rank-1 factored matrices E^a = u_a v_a^t and F^b = s_b w_b^t, the
+    trace reduces to a product of bilinear forms,
+
+        tr[ E^a X F^b Y ] = (v_a^t X s_b) (w_b^t Y u_a)
+                          = [V X S^t]_{ab} [W Y U^t]_{ba},
+
+    which only takes products of (spw_Ndlys, spw_Nfreqs) matrices. For dense
+    matrices with diagonal X and Y, we have used
+    tr[A D_1 B D_2] = \sum_{ik} [A_{ik}*d_{1k}] * [B_{ki}*d_{2i}], so that the
+    traces of all times are computed with one matrix product over times per
+    frequency i.
+
+    Parameters
+    ----------
+    E, F : tuple or ndarray
+        E matrices, both dense or both factored.
+
+    X, Y : ndarray
+        Matrices with shape (spw_Nfreqs, spw_Nfreqs). If diag is True, the
+        diagonals of diagonal matrices at a set of times instead, with shape
+        (Ntimes, spw_Nfreqs).
+
+    diag : bool, optional
+        Whether X and Y are given as diagonals. Default: False.
+
+    delay_diag : bool, optional
+        If True, only compute the traces of equal delays a = b, which only
+        takes O(spw_Ndlys spw_Nfreqs) operations per time for factored
+        matrices and diagonal X and Y. Default: False.
+
+    Returns
+    -------
+    traces : ndarray
+        Traces with shape (spw_Ndlys, spw_Ndlys), or
+        (Ntimes, spw_Ndlys, spw_Ndlys) if diag is True. The last axis is
+        dropped if delay_diag is True.
+    """
+    if delay_diag:
+        if isinstance(E, tuple):
+            (U, V), (S, W) = E, F
+            if diag:
+                return np.dot(X, (V * S).T) * np.dot(Y, (W * U).T)
+            return np.sum(np.dot(V, X) * S, axis=1) \
+                   * np.sum(np.dot(W, Y) * U, axis=1)
+        # E^a_{ij} F^a_{ji}
+        EF = E * np.transpose(F, (0, 2, 1))
+        if diag:
+            return np.einsum('ait,ti->ta', np.matmul(EF, X.T), Y)
+        return np.einsum('aij,aji->a', np.matmul(E, X), np.matmul(F, Y))
+    if isinstance(E, tuple):
+        (U, V), (S, W) = E, F
+        if diag:
+            VXS = np.matmul(V * X[:, None, :], S.T)
+            WYU = np.matmul(W * Y[:, None, :], U.T)
+        else:
+            VXS = np.dot(np.dot(V, X), S.T)
+            WYU = np.dot(np.dot(W, Y), U.T)
+        return VXS * np.swapaxes(WYU, -1, -2)
+    if not diag:
+        return np.einsum('aij,bji->ab', np.matmul(E, X), np.matmul(F, Y))
+    Ndlys = E.shape[0]
+    traces = np.zeros((X.shape[0], Ndlys, Ndlys), dtype=np.complex128)
+    for i in range(E.shape[1]):
+        # E^a_{ik} F^b_{ki}, with shape (spw_Nfreqs, Ndlys, Ndlys)
+        EF = E[:, i, :].T[:, :, None] * F[:, :, i].T[:, None, :]
+        traces += Y[:, i, None, None] * np.tensordot(X, EF, axes=(1, 0))
+    return traces
+
+
+def _inv_covariances(C, rcond=1e-15):
+    """
+    Invert a stack of covariance matrices, pseudo-inverting the poorly
+    conditioned ones.
+
+    Hermitian matrices are handled with a single batched eigenvalue
+    decomposition, C = V diag(w) V^H, which gives both their condition
+    numbers (their singular values are |w|) and their (pseudo-)inverses,
+    V diag(1/w) V^H. Other matrices, e.g. set with set_C, are inverted and
+    pseudo-inverted with np.linalg.
+
+    Parameters
+    ----------
+    C : ndarray
+        Covariance matrices, of shape (Nmats, N, N).
+
+    rcond : float, optional
+        Cutoff for small eigenvalues of the pseudo-inverted matrices, relative
+        to the largest absolute eigenvalue, as in np.linalg.pinv.
+        Default: 1e-15.
+
+    Returns
+    -------
+    iC : ndarray
+        Inverse covariance matrices, of shape (Nmats, N, N). Matrices with a
+        condition number >= 1e9 are pseudo-inverted.
+
+    cond : ndarray
+        Condition number of each matrix.
+    """
+    if np.allclose(C, np.swapaxes(C.conj(), 1, 2)):
+        w, V = np.linalg.eigh(C)
+        svals = np.abs(w)
+        smax = np.max(svals, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cond = smax / np.min(svals, axis=1)
+            inv_w = 1. / w
+        cond[np.isnan(cond)] = np.inf
+        # pseudo-invert the poorly conditioned matrices by dropping their
+        # small eigenvalues
+        small = (cond >= 1e9)[:, None] & (svals <= rcond * smax[:, None])
+        inv_w[small] = 0.
+        iC = np.matmul(V * inv_w[:, None, :], np.swapaxes(V.conj(), 1, 2))
+        return iC, cond
+
+    cond = np.linalg.cond(C)
+    poor = cond >= 1e9
+    if not np.any(poor):
+        return np.linalg.inv(C), cond
+    iC = np.empty_like(C)
+    iC[poor] = np.linalg.pinv(C[poor], rcond=rcond)
+    if not np.all(poor):
+        iC[~poor] = np.linalg.inv(C[~poor])
+    return iC, cond
+
+
+def _bl_time_groups(baseline_array):
+    """
+    Group the baseline-time indices of a baseline array by baseline, with a
+    single sort rather than one search per baseline.
+
+    Parameters
+    ----------
+    baseline_array : ndarray of int
+        Baseline number of each baseline-time (see UVData.baseline_array).
+
+    Returns
+    -------
+    groups : list of ndarray of int
+        Baseline-time indices, of shape (Nbls, Ntimes), of the baselines
+        having the same number of times, with one group per distinct
+        number of times.
+    """
+    order = np.argsort(baseline_array, kind='stable')
+    _, starts, counts = np.unique(baseline_array[order], return_index=True,
+                                  return_counts=True)
+    groups = []
+    for count in np.unique(counts):
+        bl_starts = starts[counts == count]
+        groups.append(order[bl_starts[:, None] + np.arange(count)])
+    return groups
+
+
+def _broadcast_flag_cube(flags, spw_range, time_thresh):
+    """
+    Make the flagging patterns of a cube of flag waterfalls time-independent
+    in a spectral window, in place (see PSpecData.broadcast_dset_flags).
+
+    Parameters
+    ----------
+    flags : ndarray of bool
+        Flags of shape (Nbls, Ntimes, Nfreqs, Npols).
+
+    spw_range : tuple
+        Start (inclusive) and stop (exclusive) channels of the spw.
+
+    time_thresh : float
+        Fractional threshold of flagged pixels across time needed to flag
+        all times per freq channel.
+    """
+    Nfreqs = float(flags.shape[2])
+    # get time- and freq-continguous flags
+    freq_contig_flgs = np.sum(flags, axis=2) / Nfreqs > 0.999999
+    Ntimes_noncontig = np.sum(~freq_contig_flgs, axis=1, dtype=float)
+    # get freq channels where non-contiguous flags exceed threshold, which
+    # is never the case for waterfalls without non-contiguous times
+    Nflags = np.sum(flags & ~freq_contig_flgs[:, :, None, :], axis=1,
+                    dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exceeds_thresh = Nflags / Ntimes_noncontig[:, None, :] > time_thresh
+    # for pixels that have flags but didn't meet broadcasting limit
+    # flag the integration within the spw
+    spw = slice(spw_range[0], spw_range[1])
+    flag_ints = np.any(flags[:, :, spw] & ~exceeds_thresh[:, None, spw],
+                       axis=2)
+    # flag channels for all times that exceed time_thresh
+    flags |= exceeds_thresh[:, None]
+    flags[:, :, spw] |= flag_ints[:, :, None]
+
+
+# PSpecData object of a pspec worker process (see _init_pspec_worker)
+_worker_ds = None
+
+
+def _init_pspec_worker(ds):
+    """
+    Initializer of the worker processes of PSpecData.pspec, which stores the
+    PSpecData object once per worker instead of sending it with every task.
+    """
+    global _worker_ds
+    _worker_ds = ds
+
+
+def _pspec_worker(task):
+    """
+    Compute the power spectra of one shard of baseline pairs.
+
+    Parameters
+    ----------
+    task : tuple
+        (ds, bls1, bls2, dsets, pols, kwargs), where ds is a PSpecData
+        object, or None to use the one stored by _init_pspec_worker, and
+        the rest are passed on to ds.pspec.
+
+    Returns
+    -------
+    uvp : UVPSpec
+        Power spectra of the shard.
+    """
+    ds, bls1, bls2, dsets, pols, kwargs = task
+    if ds is None:
+        ds = _worker_ds
+    return ds.pspec(bls1, bls2, dsets, pols, **kwargs)
+
+
+def _pspec_run_worker(task):
+    """
+    Compute the power spectra of a list of dataset pairs in a pspec_run worker
+    process, using the PSpecData object stored by _init_pspec_worker, and
+    store them in a shard container.
+
+    Parameters
+    ----------
+    task : tuple
+        (shard, groupname, jobs, pol_pairs, kwargs, dedupe), where shard is
+        the path to the shard container, which is overwritten, jobs is a
+        list of (psname, bls1, bls2, dset_idxs) tuples, kwargs are passed on
+        to PSpecData.pspec and dedupe to PSpecContainer.set_pspec.
+
+    Returns
+    -------
+    shard : str
+        Path to the shard container.
+    """
+    shard, groupname, jobs, pol_pairs, kwargs, dedupe = task
+    if os.path.exists(shard):
+        os.remove(shard)
+    psc = container.PSpecContainer(shard, mode='rw', keep_open=True)
+    try:
+        for psname, bls1, bls2, dset_idxs in jobs:
+            uvp = _worker_ds.pspec(bls1, bls2, dset_idxs, pol_pairs, **kwargs)
+            psc.set_pspec(group=groupname, psname=psname, pspec=uvp,
+                          dedupe=dedupe)
+    finally:
+        psc._close()
+    return shard
+
+
+def _concat_blpair_shards(uvps):
+    """
+    Concatenate the UVPSpec objects computed by PSpecData.pspec for
+    consecutive shards of a list of baseline pairs along the baseline-pair
+    time axis, giving the same object as computing them all at once.
+
+    Parameters
+    ----------
+    uvps : list of UVPSpec
+        Power spectra of each shard, in order. All metadata other than the
+        baseline-pair times must be the same. The first object is modified
+        in place.
+
+    Returns
+    -------
+    uvp : UVPSpec
+        Concatenated power spectra.
+    """
+    uvp = uvps[0]
+    if len(uvps) == 1:
+        return uvp
+
+    # per-spw arrays with baseline-pair times along their first axis
+    for attr in ['data_array', 'wgt_array', 'integration_array',
+                 'nsample_array', 'cov_array_real', 'cov_array_imag',
+                 'window_function_array']:
+        if hasattr(uvp, attr):
+            setattr(uvp, attr, odict([(spw, np.concatenate(
+                        [getattr(u, attr)[spw] for u in uvps]))
+                        for spw in getattr(uvp, attr)]))
+    if hasattr(uvp, 'stats_array'):
+        uvp.stats_array = odict([(stat, odict([(spw, np.concatenate(
+                                    [u.stats_array[stat][spw] for u in uvps]))
+                                    for spw in uvp.stats_array[stat]]))
+                                 for stat in uvp.stats_array])
+
+    # baseline-pair time metadata
+    for attr in ['time_1_array', 'time_2_array', 'time_avg_array',
+                 'lst_1_array', 'lst_2_array', 'blpair_array']:
+        setattr(uvp, attr, np.concatenate([getattr(u, attr) for u in uvps]))
+    uvp.lst_avg_array = np.mean([np.unwrap(uvp.lst_1_array),
+                                 np.unwrap(uvp.lst_2_array)], axis=0) \
+                                 % (2*np.pi)
+    uvp.label_1_array = np.concatenate([u.label_1_array for u in uvps], axis=1)
+    uvp.label_2_array = np.concatenate([u.label_2_array for u in uvps], axis=1)
+    uvp.Nblpairs = len(np.unique(uvp.blpair_array))
+    uvp.Ntimes = len(np.unique(uvp.time_1_array))
+    uvp.Nblpairts = len(uvp.time_1_array)
+
+    # baselines are sorted by antenna pair, as in PSpecData.pspec
+    bl_vecs = odict()
+    for u in uvps:
+        bl_vecs.update(zip(u.bl_array, u.bl_vecs))
+    bls = sorted(bl_vecs.keys(), key=uvp.bl_to_antnums)
+    uvp.bl_array = np.array(bls)
+    uvp.bl_vecs = np.array([bl_vecs[bl] for bl in bls])
+    uvp.Nbls = len(uvp.bl_array)
+
+    uvp.check()
+    return uvp
+
+
+def _pspec_run_chunked(kwargs, bls, pols, dset_pairs, dset_labels):
+    """
+    Run pspec_run out-of-core, on chunks of baseline-pairs. See the
+    max_chunk_bytes argument of pspec_run.
+
+    Parameters
+    ----------
+    kwargs : dict
+        Arguments of the pspec_run call.
+
+    bls : list of tuples
+        Baselines to read. None reads all baselines.
+
+    pols : list of str
+        Polarizations to read. None reads all polarizations.
+
+    dset_pairs : list of tuples
+        Dataset pairs to compute.
+
+    dset_labels : list of str
+        Labels of the datasets.
+
+    Returns
+    -------
+    ds : PSpecData object
+        The PSpecData object of the last chunk, or None if there was
+        nothing to compute.
+    """
+    verbose = kwargs['verbose']
+    dsets, dsets_std = kwargs['dsets'], kwargs['dsets_std']
+    file_type = kwargs['file_type']
+    max_chunk_bytes = kwargs['max_chunk_bytes']
+    nprefetch = kwargs['nprefetch']
+    assert max_chunk_bytes > 0, "max_chunk_bytes must be positive"
+    if kwargs['Nblps_per_group'] is not None:
+        raise ValueError("Nblps_per_group is not supported with "
+                         "max_chunk_bytes")
+
+    # read metadata only
+    try:
+        t0 = time.time()
+        meta = _load_dsets(dsets, bls=bls, pols=pols, file_type=file_type,
+                           verbose=verbose, read_data=False,
+                           nthreads=nprefetch)
+        utils.log("Loaded metadata in %1.1f sec." % (time.time() - t0),
+                  lvl=1, verbose=verbose)
+    except ValueError:
+        utils.log("One of the dset loads failed due to no data overlap given "
+                  "the bls and pols selection", verbose=verbose)
+        return None
+
+    # read calibration and beam once for all chunks
+    cals = kwargs['cals']
+    if cals is not None:
+        if not isinstance(cals, (list, tuple)):
+            cals = [cals for d in dsets]
+        if not isinstance(cals[0], UVCal):
+            cals = _load_cals(cals, verbose=verbose, nthreads=nprefetch)
+    beam = kwargs['beam']
+    if isinstance(beam, (str, np.str)):
+        beam = pspecbeam.PSpecBeamUV(beam, cosmo=kwargs['cosmo'])
+
+    # chunks only read the datasets of their dataset pair, and the one
+    # rephase_to_dset refers to, whose LSTs the others are rephased to
+    rephase_to_dset = kwargs['rephase_to_dset']
+    if isinstance(rephase_to_dset, (str, np.str)):
+        rephase_to_dset = dset_labels.index(rephase_to_dset)
+    def dset_inds(dsetp):
+        inds = set(dsetp)
+        if rephase_to_dset is not None:
+            inds.add(rephase_to_dset)
+        return sorted(inds)
+
+    # the LST trimming involves all datasets, so work it out from the
+    # metadata and apply it to the datasets read for each chunk
+    trim_times = None
+    if kwargs['trim_dset_lsts']:
+        trim_times = _common_lst_times(meta)
+
+    # size of the data, flags and nsamples of a baseline in each dataset
+    itemsize = np.dtype(np.complex128).itemsize \
+               + np.dtype(np.bool_).itemsize + np.dtype(np.float32).itemsize
+    bl_bytes = [m.Ntimes * m.Nfreqs * m.Npols * itemsize for m in meta]
+    with_autos = kwargs['cov_model'] in ["autos", "foreground_dependent"]
+
+    # flag-based antenna exclusion, scanning the flags in chunks
+    blpairs = kwargs['blpairs']
+    if blpairs is None:
+        xants = []
+        for i, m in enumerate(meta):
+            xants.append(_scan_xants(
+                            dsets[i], m, pols=pols, file_type=file_type,
+                            Nbls_per_chunk=max(1, max_chunk_bytes // bl_bytes[i]),
+                            cal=None if cals is None else cals[i],
+                            cal_flag=kwargs['cal_flag'],
+                            xant_flag_thresh=kwargs['xant_flag_thresh'],
+                            include_autocorrs=kwargs['include_autocorrs'],
+                            include_crosscorrs=kwargs['include_crosscorrs'],
+                            nprefetch=nprefetch, verbose=verbose))
+
+    # split the baseline-pairs of each dataset pair into chunks
+    groupname = kwargs['groupname']
+    if groupname is None:
+        groupname = '_'.join(dset_labels)
+    jobs = []
+    for dsetp in dset_pairs:
+        m1, m2 = meta[dsetp[0]], meta[dsetp[1]]
+        if blpairs is None:
+            bls1, bls2 = utils.calc_blpair_reds(
+                            m1, m2, filter_blpairs=True,
+                            exclude_auto_bls=kwargs['exclude_auto_bls'],
+                            exclude_cross_bls=kwargs['exclude_cross_bls'],
+                            exclude_permutations=kwargs['exclude_permutations'],
+                            bl_len_range=kwargs['bl_len_range'],
+                            bl_deg_range=kwargs['bl_deg_range'],
+                            include_autocorrs=kwargs['include_autocorrs'],
+                            include_crosscorrs=kwargs['include_crosscorrs'],
+                            bl_tol=kwargs['bl_error_tol'],
+                            xants=xants[dsetp[0]] + xants[dsetp[1]])[:2]
+            dset_blps = list(zip(bls1, bls2))
+        else:
+            dset1_bls, dset2_bls = m1.get_antpairs(), m2.get_antpairs()
+            dset_blps = [(_bl1, _bl2) for _bl1, _bl2 in blpairs
+                         if (_bl1 in dset1_bls or _bl1[::-1] in dset1_bls)
+                         and (_bl2 in dset2_bls or _bl2[::-1] in dset2_bls)]
+
+        # redundant groups are contiguous, so chunks share most baselines
+        Nbls_per_chunk = max_chunk_bytes \
+                         // (sum([bl_bytes[j] for j in dset_inds(dsetp)]) \
+                             * (1 if dsets_std is None else 2))
+        chunks, chunk, chunk_bls = [], [], set()
+        for blp in dset_blps:
+            _bls = chunk_bls.union(blp)
+            Nbls = len(_bls)
+            if with_autos:
+                Nbls += len(set(utils.flatten(_bls)))
+            if len(chunk) > 0 and Nbls > Nbls_per_chunk:
+                chunks.append(chunk)
+                chunk, _bls = [], set(blp)
+            chunk.append(blp)
+            chunk_bls = _bls
+        if len(chunk) > 0:
+            chunks.append(chunk)
+        if len(chunks) > 0:
+            psname = '{}_x_{}{}'.format(dset_labels[dsetp[0]],
+                                        dset_labels[dsetp[1]],
+                                        kwargs['psname_ext'] or '')
+            jobs.append((psname, dsetp, chunks))
+
+    # chunks are appended to the container, so remove existing spectra first
+    psc = container.PSpecContainer(kwargs['filename'], mode='rw',
+                                   keep_open=True, tsleep=kwargs['tsleep'],
+                                   maxiter=kwargs['maxiter'])
+    try:
+        if groupname in psc.groups():
+            spectra = psc.spectra(groupname)
+            for psname, dsetp, chunks in jobs:
+                if psname not in spectra:
+                    continue
+                if not kwargs['overwrite']:
+                    raise AttributeError(
+                        "Power spectrum %s/%s already exists and "
+                        "overwrite=False." % (groupname, psname))
+                del psc.data[groupname][psname]
+    finally:
+        psc._close()
+
+    # share normalization matrices between chunks through a disk cache
+    norm_cache_dir = kwargs['norm_cache_dir']
+    if norm_cache_dir is None:
+        norm_cache_dir = tempfile.mkdtemp(prefix='norm_cache')
+    # read the data of the next chunks while computing the current one
+    def read(psname, i, Nchunks, dsetp, chunk):
+        bls = sorted(set(utils.flatten(chunk)))
+        if with_autos:
+            bls += [(ant, ant) for ant in np.unique(utils.flatten(bls))]
+        inds = dset_inds(dsetp)
+        try:
+            chunk_dsets = _load_dsets([dsets[j] for j in inds], bls=bls,
+                                      pols=pols, file_type=file_type,
+                                      verbose=False)
+            chunk_dsets_std = None
+            if dsets_std is not None:
+                chunk_dsets_std = _load_dsets([dsets_std[j] for j in inds],
+                                              bls=bls, pols=pols,
+                                              file_type=file_type,
+                                              verbose=False)
+        except ValueError:
+            return None, None
+        if trim_times is not None:
+            for j, uvd in zip(inds, chunk_dsets):
+                if trim_times[j] is not None:
+                    uvd.select(times=trim_times[j])
+        return chunk_dsets, chunk_dsets_std
+
+    tasks = [(psname, i, len(chunks), dsetp, chunk)
+             for psname, dsetp, chunks in jobs
+             for i, chunk in enumerate(chunks)]
+    ds = None
+    try:
+        for task, (chunk_dsets, chunk_dsets_std) \
+            in zip(tasks, _prefetch(read, tasks, nprefetch)):
+            psname, i, Nchunks, dsetp, chunk = task
+            if chunk_dsets is None:
+                utils.log("Skipping {} chunk {} / {}: no data overlap given "
+                          "the bls and pols selection".format(
+                          psname, i + 1, Nchunks), verbose=verbose)
+                continue
+            utils.log("Computing {} chunk {} / {}".format(
+                      psname, i + 1, Nchunks), verbose=verbose)
+            # index the datasets read for the chunk
+            inds = dset_inds(dsetp)
+            ds = pspec_run(**dict(kwargs, dsets=chunk_dsets,
+                                  dsets_std=chunk_dsets_std,
+                                  cals=None if cals is None
+                                       else [cals[j] for j in inds],
+                                  beam=beam, blpairs=chunk,
+                                  dset_pairs=[tuple([inds.index(j) for j in dsetp])],
+                                  dset_labels=[dset_labels[j] for j in inds],
+                                  trim_dset_lsts=False,
+                                  rephase_to_dset=None if rephase_to_dset is None
+                                                  else inds.index(rephase_to_dset),
+                                  groupname=groupname,
+                                  norm_cache_dir=norm_cache_dir,
+                                  max_chunk_bytes=None, append=True,
+                                  nprefetch=0))
+    finally:
+        if kwargs['norm_cache_dir'] is None:
+            shutil.rmtree(norm_cache_dir)
+
+    return ds
+
+
+def _common_lst_times(dsets, lst_tol=6):
+    """
+    Find the times of each dataset whose LSTs are found in all the other
+    datasets, assuming they are all locked to the same LST grid (see
+    PSpecData.trim_dset_lsts). Only the metadata of the datasets is used.
+
+    Parameters
+    ----------
+    dsets : list of UVData
+        Datasets, or their metadata.
+
+    lst_tol : float
+        Decimal tolerance [radians] for comparing float-valued LST bins.
+
+    Returns
+    -------
+    times : list of ndarray
+        Times to keep in each dataset (per baseline-time), or None if all
+        its times are kept.
+    """
+    # ensure each dset has same dLST within tolerance / Ntimes
+    dlst = np.median(np.diff(np.unique(dsets[0].lst_array)))
+    for dset in dsets:
+        _dlst = np.median(np.diff(np.unique(dset.lst_array)))
+        if not np.isclose(dlst, _dlst, atol=10**(-lst_tol) / dset.Ntimes):
+            raise ValueError("Not all datasets in self.dsets are on the same LST "
+                  "grid, cannot LST trim.")
+
+    # get lst array of each dataset, turn into string and add to common_lsts
+    lst_arrs = []
+    common_lsts = set()
+    for i, dset in enumerate(dsets):
+        lsts = ["{lst:0.{tol}f}".format(lst=l, tol=lst_tol)
+                for l in dset.lst_array]
+        lst_arrs.append(lsts)
+        if i == 0:
+            common_lsts = common_lsts.union(set(lsts))
+        else:
+            common_lsts = common_lsts.intersection(set(lsts))
+
+    # keep the integrations whose lst is in common_lsts
+    times = []
+    for i, dset in enumerate(dsets):
+        trim_inds = np.array([l not in common_lsts for l in lst_arrs[i]])
+        times.append(dset.time_array[~trim_inds] if np.any(trim_inds) else None)
+    return times
+
+
+def _scan_xants(fname, meta, pols=None, file_type='miriad', Nbls_per_chunk=1,
+                cal=None, cal_flag=True, xant_flag_thresh=0.95,
+                include_autocorrs=False, include_crosscorrs=True,
+                nprefetch=0, verbose=True):
+    """
+    Find the antennas that utils.calc_blpair_reds excludes based on data
+    flags, reading the flags of a dataset in chunks of baselines.
+
+    Parameters
+    ----------
+    fname : str or list of str
+        Filepath(s) of the dataset.
+
+    meta : UVData
+        Metadata of the dataset.
+
+    pols : list of str, optional
+        Polarizations to read. Default is all.
+
+    file_type : str, optional
+        File type of the dataset. Default: 'miriad'.
+
+    Nbls_per_chunk : int, optional
+        Number of baselines to read at once. Default: 1.
+
+    cal : UVCal, optional
+        Calibration to apply to the data, as done by PSpecData.
+
+    cal_flag : bool, optional
+        If True, use flags in calibration to flag data.
+
+    xant_flag_thresh, include_autocorrs, include_crosscorrs :
+        See utils.calc_blpair_reds.
+
+    nprefetch : int, optional
+        Number of chunks to read ahead in background threads. Default: 0.
+
+    verbose : bool, optional
+        Report feedback to standard output.
+
+    Returns
+    -------
+    xants : list of int
+        Antennas without any baseline that is sufficiently unflagged.
+    """
+    xants = set(meta.get_ENU_antpos(pick_data_ants=False)[1])
+    antpairs = [ap for ap in meta.get_antpairs()
+                if (ap[0] == ap[1] and include_autocorrs)
+                or (ap[0] != ap[1] and include_crosscorrs)]
+    def read(chunk):
+        uvd = _load_dsets([fname], bls=chunk, pols=pols, file_type=file_type,
+                          verbose=False)[0]
+        if cal is not None:
+            uvutils.uvcalibrate(uvd, cal, inplace=True, prop_flags=cal_flag)
+        return uvd
+
+    chunks = [(antpairs[i:i + Nbls_per_chunk],)
+              for i in range(0, len(antpairs), Nbls_per_chunk)]
+    for (chunk,), uvd in zip(chunks, _prefetch(read, chunks, nprefetch)):
+        for ap in chunk:
+            # remove from bad list if unflagged data exists
+            f = uvd.get_flags(ap)
+            if np.sum(f) < np.prod(f.shape) * xant_flag_thresh:
+                xants.discard(ap[0])
+                xants.discard(ap[1])
+    utils.log("Excluding antennas {}".format(sorted(xants)), lvl=1,
+              verbose=verbose)
+    return sorted(xants)
+
+
 def _load_dsets(fnames, bls=None, pols=None, logf=None, verbose=True,
-                file_type='miriad', cals=None, cal_flag=True):
+                file_type='miriad', cals=None, cal_flag=True, read_data=True,
+                nthreads=0):
     """
     Helper function for loading UVData-compatible datasets in pspec_run.
 
@@ -4415,6 +6762,11 @@ def _load_dsets(fnames, bls=None, pols=None, logf=None, verbose=True,
         Report output to logfile.
     file_type : str
         File type of input files.
+    read_data : bool
+        If False, only read the metadata of the files.
+    nthreads : int
+        Number of datasets to read concurrently in background threads. 0
+        reads them serially.
 
     Returns
     -------
@@ -4424,9 +6776,8 @@ def _load_dsets(fnames, bls=None, pols=None, logf=None, verbose=True,
     ### TODO: data loading for cross-polarization power
     ### spectra is sub-optimal: only dset1 pol1 and dset2 pol2
     ### is needed instead of pol1 & pol2 for dset1 & dset2
-    dsets = []
     Ndsets = len(fnames)
-    for i, dset in enumerate(fnames):
+    def read(i, dset):
         utils.log("Reading {} / {} datasets...".format(i+1, Ndsets),
                   f=logf, lvl=1, verbose=verbose)
 
@@ -4437,13 +6788,13 @@ def _load_dsets(fnames, bls=None, pols=None, logf=None, verbose=True,
         else:
             dfiles = dset
         uvd.read(dfiles, bls=bls, polarizations=pols,
-                 file_type=file_type)
+                 file_type=file_type, read_data=read_data)
         uvd.extra_keywords['filename'] = json.dumps(dfiles)
-        dsets.append(uvd)
+        return uvd
 
-    return dsets
+    return list(_prefetch(read, enumerate(fnames), nthreads))
 
-def _load_cals(cnames, logf=None, verbose=True):
+def _load_cals(cnames, logf=None, verbose=True, nthreads=0):
     """
     Helper function for loading calibration files.
 
@@ -4456,15 +6807,17 @@ def _load_cals(cnames, logf=None, verbose=True):
         Log file to write to.
     verbose : bool
         Report feedback to log file.
+    nthreads : int
+        Number of files to read concurrently in background threads. 0
+        reads them serially.
 
     Returns
     -------
     list
         List of UVCal objects
     """
-    cals = []
     Ncals = len(cnames)
-    for i, cfile in enumerate(cnames):
+    def read(i, cfile):
         utils.log("Reading {} / {} calibrations...".format(i+1, Ncals),
                   f=logf, lvl=1, verbose=verbose)
 
@@ -4475,6 +6828,51 @@ def _load_cals(cnames, logf=None, verbose=True):
         else:
             uvc.read_calfits(cfile)
         uvc.extra_keywords['filename'] = json.dumps(cfile)
-        cals.append(uvc)
+        return uvc
+
+    return list(_prefetch(read, enumerate(cnames), nthreads))
 
-    return cals
+
+def _prefetch(func, tasks, nprefetch=0):
+    """
+    Generator of func(*task) for each task, in order, that computes up to
+    nprefetch results ahead in background threads. Used to read data while
+    the caller is busy with the previous results: the number of results
+    held at once is bounded by nprefetch + 1.
+
+    Parameters
+    ----------
+    func : callable
+        Function to call, usually reading from disk.
+
+    tasks : iterable of tuples
+        Arguments of each call of func.
+
+    nprefetch : int, optional
+        Number of results to compute ahead. 0 calls func serially when each
+        result is requested. Default: 0.
+
+    Yields
+    ------
+    result : object
+        Return value of func(*task), in the order of tasks. Exceptions
+        raised by func are re-raised when its result is reached.
+    """
+    if nprefetch < 1:
+        for task in tasks:
+            yield func(*task)
+        return
+
+    with ThreadPoolExecutor(max_workers=nprefetch) as pool:
+        pending = collections.deque()
+        try:
+            for task in tasks:
+                pending.append(pool.submit(func, *task))
+                if len(pending) > nprefetch:
+                    yield pending.popleft().result()
+            while len(pending) > 0:
+                yield pending.popleft().result()
+        finally:
+            # don't start reads that will not be used
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Benchmark the 'rank1' and 'einsum' engines used by PSpecData.get_G and
+PSpecData.get_H, using random dense weighting matrices.
+"""
+from __future__ import print_function
+import time
+import numpy as np
+from hera_pspec import pspecdata
+
+
+def run_benchmark(nfreqs=(32, 64, 128), ndlys_frac=(1., 0.5), seed=0):
+    """
+    Time get_G and get_H with both engines and report the largest relative
+    difference between them.
+    """
+    np.random.seed(seed)
+    key1, key2 = (0, 24, 25), (1, 24, 25)
+    for nfreq in nfreqs:
+        for frac in ndlys_frac:
+            ds = pspecdata.PSpecData()
+            ds.set_spw((0, nfreq), ndlys=int(nfreq * frac))
+            R = {}
+            for k in [key1, key2]:
+                R[k] = np.random.normal(size=(nfreq, nfreq)) \
+                       + 1j * np.random.normal(size=(nfreq, nfreq))
+            ds.set_R(dict([((k[0], k[1:], ds.data_weighting, ds.taper), R[k])
+                           for k in R]))
+
+            results, timing = {}, {}
+            for engine in ['einsum', 'rank1']:
+                ds.set_norm_engine(engine)
+                t0 = time.time()
+                results[engine] = (ds.get_G(key1, key2), ds.get_H(key1, key2))
+                timing[engine] = time.time() - t0
+
+            err = max([np.abs(a - b).max() / np.abs(a).max()
+                       for a, b in zip(results['einsum'], results['rank1'])])
+            print("Nfreqs = {:4d}, Ndlys = {:4d}: einsum {:8.3f} s, rank1 "
+                  "{:8.4f} s, speedup {:7.1f}x, max rel. diff {:.1e}".format(
+                  nfreq, ds.spw_Ndlys, timing['einsum'], timing['rank1'],
+                  timing['einsum'] / timing['rank1'], err))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,168 @@
+import unittest
+import os
+import shutil
+import tempfile
+import pytest
+import numpy as np
+from .. import cache
+
+
+class Test_MatrixCache(unittest.TestCase):
+
+    def setUp(self):
+        self.a = np.zeros(10)  # 80 bytes
+        self.b = np.zeros(20)  # 160 bytes
+
+    def tearDown(self):
+        pass
+
+    def runTest(self):
+        pass
+
+    def test_dict_interface(self):
+        c = cache.MatrixCache()
+        c['a'] = self.a
+        c['b'] = self.b
+        assert len(c) == 2
+        assert c.nbytes == 240
+        assert list(c.keys()) == ['a', 'b']
+        assert c['a'] is self.a
+        # membership tests count hits and misses
+        assert 'a' in c
+        assert 'c' not in c
+        stats = c.stats()
+        assert stats['hits'] == 1 and stats['misses'] == 1
+        # so do reads with get
+        assert c.get('a') is self.a
+        assert c.get('c') is None
+        assert c.get('c', self.b) is self.b
+        stats = c.stats()
+        assert stats['hits'] == 2 and stats['misses'] == 3
+        del c['a']
+        assert c.nbytes == 160
+        pytest.raises(KeyError, c.__delitem__, 'a')
+        # overwriting an entry replaces its size
+        c['b'] = self.a
+        assert c.nbytes == 80
+        c.clear()
+        assert len(c) == 0 and c.nbytes == 0
+        # clear keeps the statistics
+        assert c.stats()['hits'] == 2
+        c.reset_stats()
+        assert c.stats()['hits'] == 0
+
+    def test_lru_eviction(self):
+        c = cache.MatrixCache(max_bytes=250)
+        c['a'] = self.a
+        c['b'] = self.a
+        c['c'] = self.a
+        assert list(c.keys()) == ['a', 'b', 'c']
+        # touch 'a' so that 'b' is the least recently used entry
+        c['a']
+        c['d'] = self.a
+        assert list(c.keys()) == ['c', 'a', 'd']
+        assert c.stats()['evictions'] == 1
+        assert c.nbytes <= 250
+
+        # the newest entry is kept even if it exceeds the budget on its own
+        c['e'] = np.zeros(100)
+        assert list(c.keys()) == ['e']
+
+        # shrinking the budget evicts entries
+        c = cache.MatrixCache()
+        for k in range(5):
+            c[k] = self.a
+        c.set_max_bytes(160)
+        assert list(c.keys()) == [3, 4]
+        pytest.raises(ValueError, c.set_max_bytes, -1)
+
+    def test_pinned(self):
+        c = cache.MatrixCache(max_bytes=160)
+        c.set('a', self.a, pinned=True)
+        c['b'] = self.a
+        c['c'] = self.a
+        # 'a' is pinned, so 'b' is evicted
+        assert list(c.keys()) == ['a', 'c']
+        assert c.stats()['pinned'] == 1
+        assert c.is_pinned('a') and not c.is_pinned('c')
+        # re-setting an entry without pinning unpins it
+        c['a'] = self.a
+        c['d'] = self.a
+        assert list(c.keys()) == ['a', 'd']
+        assert c.stats()['pinned'] == 0
+
+
+class Test_DiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.a = np.arange(100, dtype=np.float64)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def runTest(self):
+        pass
+
+    def test_get_set(self):
+        c = cache.DiskCache(os.path.join(self.cache_dir, 'sub'))
+        assert c.get(('a', 1)) is None
+        c.set(('a', 1), x=self.a, y=self.a * 1j)
+        value = c.get(('a', 1))
+        assert sorted(value.keys()) == ['x', 'y']
+        assert np.all(value['x'] == self.a)
+        assert np.all(value['y'] == self.a * 1j)
+        stats = c.stats()
+        assert stats['size'] == 1 and stats['hits'] == 1 and stats['misses'] == 1
+        # entries are shared by caches pointing to the same directory
+        c2 = cache.DiskCache(os.path.join(self.cache_dir, 'sub'))
+        assert c2.get(('a', 1)) is not None
+        # numpy scalars in keys hash like python scalars
+        assert c2.get(('a', np.int64(1))) is not None
+        c2.clear()
+        assert c.get(('a', 1)) is None
+        pytest.raises(ValueError, cache.DiskCache, self.cache_dir, max_bytes=-1)
+
+    def test_corrupt_entry(self):
+        c = cache.DiskCache(self.cache_dir)
+        c.set('a', x=self.a)
+        with open(c._path('a'), 'wb') as f:
+            f.write(b'not an npz file')
+        assert c.get('a') is None
+
+    def test_eviction(self):
+        c = cache.DiskCache(self.cache_dir)
+        c.set('a', x=self.a)
+        nbytes = c.stats()['nbytes']
+        c = cache.DiskCache(self.cache_dir, max_bytes=2 * nbytes)
+        # make 'a' older than 'b', then touch it so that 'b' is evicted
+        c.set('b', x=self.a)
+        os.utime(c._path('a'), (0, 0))
+        os.utime(c._path('b'), (1, 1))
+        assert c.get('a') is not None
+        c.set('c', x=self.a)
+        assert c.get('b') is None
+        assert c.get('a') is not None and c.get('c') is not None
+        assert c.stats()['evictions'] == 1
+        assert c.stats()['nbytes'] <= 2 * nbytes
+
+        # the size is tracked in memory, so the directory is only scanned
+        # when over budget or every rescan_interval writes
+        c = cache.DiskCache(self.cache_dir, max_bytes=100 * nbytes)
+        scans = []
+        entries = c._entries
+        c._entries = lambda: scans.append(1) or entries()
+        for k in range(10):
+            c.set(('k', k % 5), x=self.a)
+        assert len(scans) == 1
+        c.rescan_interval = 3
+        for k in range(6):
+            c.set(('k', k), x=self.a)
+        assert len(scans) == 3
+        assert c._nbytes == c.stats()['nbytes']
+
+
+def test_hash_key():
+    assert cache.hash_key((1, 'a', (2.0, None))) == \
+           cache.hash_key([np.int32(1), 'a', (np.float64(2.0), None)])
+    assert cache.hash_key((1, 'a')) != cache.hash_key((1, 'b'))
@@ -241,6 +241,93 @@ def test_combine_psc_spectra():
         os.remove("ex.h5")
 
 
+def test_append_pspec():
+    fname = os.path.join(DATA_PATH, "zen.2458042.17772.xx.HH.uvXA")
+    uvp1 = testing.uvpspec_from_data(fname, [(24, 25), (37, 38)],
+                                     spw_ranges=[(10, 40)])
+    uvp2 = testing.uvpspec_from_data(fname, [(38, 39), (52, 53)],
+                                     spw_ranges=[(10, 40)])
+    if os.path.exists('ex.h5'):
+        os.remove('ex.h5')
+    psc = PSpecContainer('ex.h5', mode='rw', keep_open=False)
+
+    # test basic execution
+    psc.append_pspec("grp1", "uvp", uvp1)
+    assert psc.get_pspec("grp1", "uvp") == uvp1
+    psc.append_pspec("grp1", "uvp", uvp2)
+    uvp = psc.get_pspec("grp1", "uvp")
+    assert uvp.Nblpairts == uvp1.Nblpairts + uvp2.Nblpairts
+    assert uvp.Nblpairs == uvp1.Nblpairs + uvp2.Nblpairs
+    assert uvp.Nbls == 4
+    assert uvp.Ntimes == uvp1.Ntimes
+    assert np.array_equal(uvp.blpair_array,
+                          np.concatenate([uvp1.blpair_array, uvp2.blpair_array]))
+    assert np.allclose(uvp.lst_avg_array,
+                       np.concatenate([uvp1.lst_avg_array, uvp2.lst_avg_array]))
+    assert np.array_equal(uvp.data_array[0],
+                          np.concatenate([uvp1.data_array[0], uvp2.data_array[0]]))
+    # partial I/O of appended spectra
+    uvp = psc.get_pspec("grp1", "uvp", blpairs=np.unique(uvp2.blpair_array))
+    assert np.array_equal(uvp.data_array[0], uvp2.data_array[0])
+
+    # test exceptions
+    uvp3 = testing.uvpspec_from_data(fname, [(24, 25), (37, 38)],
+                                     spw_ranges=[(10, 30)])
+    pytest.raises(ValueError, psc.append_pspec, "grp1", "uvp", uvp3)
+    # baseline-pair times that are already stored
+    pytest.raises(ValueError, psc.append_pspec, "grp1", "uvp", uvp2)
+    assert psc.get_pspec("grp1", "uvp").Nblpairts == uvp1.Nblpairts + uvp2.Nblpairts
+    psc.set_pspec("grp1", "uvp_fixed", uvp1)
+    pytest.raises(ValueError, psc.append_pspec, "grp1", "uvp_fixed", uvp2)
+    pytest.raises(TypeError, psc.append_pspec, "grp1", "uvp", None)
+
+    if os.path.exists("ex.h5"):
+        os.remove("ex.h5")
+
+
+def test_merge_psc_shards():
+    fname = os.path.join(DATA_PATH, "zen.2458042.17772.xx.HH.uvXA")
+    uvp1 = testing.uvpspec_from_data(fname, [(24, 25), (37, 38)],
+                                     spw_ranges=[(10, 40)])
+    uvp2 = testing.uvpspec_from_data(fname, [(38, 39), (52, 53)],
+                                     spw_ranges=[(10, 40)])
+    for f in ['ex.h5', 'ex.h5.shard0', 'ex.h5.shard1']:
+        if os.path.exists(f):
+            os.remove(f)
+    psc = PSpecContainer('ex.h5.shard0', mode='rw')
+    psc.set_pspec("grp1", ["uvp_a", "uvp_b"], [uvp1, uvp2])
+    psc._close()
+    psc = PSpecContainer('ex.h5.shard1', mode='rw')
+    psc.append_pspec("grp2", "uvp_a", uvp2)
+    psc._close()
+
+    # test basic execution
+    container.merge_psc_shards('ex.h5', ['ex.h5.shard0', 'ex.h5.shard1'],
+                               remove_shards=False, verbose=False)
+    psc = PSpecContainer('ex.h5', mode='rw', keep_open=False)
+    assert sorted(psc.groups()) == ['grp1', 'grp2']
+    assert sorted(psc.spectra('grp1')) == ['uvp_a', 'uvp_b']
+    assert psc.get_pspec('grp1', 'uvp_b') == uvp2
+    assert psc.get_pspec('grp2', 'uvp_a') == uvp2
+    assert os.path.exists('ex.h5.shard0')
+    # the HDF5 groups are copied as they are, so the spectrum can still be
+    # appended to
+    psc.append_pspec("grp2", "uvp_a", uvp1)
+    assert psc.get_pspec('grp2', 'uvp_a').Nblpairs == 4
+
+    # existing spectra are only replaced if overwrite is True
+    pytest.raises(AttributeError, container.merge_psc_shards, psc,
+                  ['ex.h5.shard1'], remove_shards=False, verbose=False)
+    container.merge_psc_shards(psc, ['ex.h5.shard0', 'ex.h5.shard1'],
+                               overwrite=True, verbose=False)
+    assert not os.path.exists('ex.h5.shard0')
+    assert not os.path.exists('ex.h5.shard1')
+    assert psc.get_pspec('grp1', 'uvp_a') == uvp1
+
+    if os.path.exists("ex.h5"):
+        os.remove("ex.h5")
+
+
 def test_combine_psc_spectra_argparser():
     args = container.get_combine_psc_spectra_argparser()
     a = args.parse_args(["filename", "--dset_split_str", "_x_", "--ext_split_str", "_"])
@@ -2,7 +2,7 @@ import unittest
 import pytest
 import numpy as np
 import pyuvdata as uv
-import os, copy, sys
+import os, copy, sys, shutil
 from scipy.integrate import simps, trapz
 from .. import pspecdata, pspecbeam, conversions, container, utils, testing
 from hera_pspec.data import DATA_PATH
@@ -14,6 +14,7 @@ from astropy.time import Time
 import warnings
 import glob
 from uvtools import dspec
+from concurrent.futures import ProcessPoolExecutor
 # Data files to use in tests
 dfiles = [
     'zen.2458042.12552.xx.HH.uvXAA',
@@ -326,6 +327,68 @@ class Test_PSpecData(unittest.TestCase):
         ds.add(self.uvd, None)
         print(ds) # print populated psd
 
+    def test_cache_size(self):
+        """
+        Test bounded matrix caches.
+        """
+        key1 = (0, 24, 38)
+        key2 = (1, 25, 38)
+        ds = pspecdata.PSpecData(dsets=self.d, wgts=self.w)
+        ds.set_spw((10, 40))
+        ds.set_weighting('iC')
+        q = ds.q_hat(key1, key2)
+        nbytes = ds.cache_stats()['iC']['nbytes']
+        assert ds.cache_stats()['iC']['size'] == 2
+
+        # only room for a single iC matrix
+        ds.clear_cache()
+        ds.set_cache_size(nbytes // 2, caches=['iC'])
+        assert ds.cache_stats()['iC']['max_bytes'] == nbytes // 2
+        assert ds.cache_stats()['R']['max_bytes'] is None
+        assert np.allclose(ds.q_hat(key1, key2), q)
+        stats = ds.cache_stats()['iC']
+        assert stats['size'] == 1 and stats['evictions'] == 1
+
+        # cached matrices may be evicted by the ones computed after them in
+        # the same batch
+        keys = [(0, 24, 25), (0, 37, 38), (0, 38, 39), (0, 52, 53)]
+        iC = [ds.iC(key) for key in keys]
+        ds.clear_cache()
+        ds.set_cache_size(2 * iC[0].nbytes, caches=['iC'])
+        ds.iC_batch(keys[:2])
+        for ic, _ic in zip(ds.iC_batch([keys[0]] + keys[2:]), [iC[0]] + iC[2:]):
+            assert np.allclose(ic, _ic)
+
+        # pspec gives the same results with small budgets
+        bls1 = [(24, 25), (37, 38), (38, 39), (52, 53)]
+        bls2 = [(37, 38), (24, 25), (52, 53), (38, 39)]
+        for weighting in ['iC', 'identity']:
+            uvp = []
+            for max_bytes in [None, 1]:
+                ds.clear_cache()
+                ds.set_cache_size(max_bytes)
+                uvp.append(ds.pspec(bls1, bls2, (0, 1), ('xx','xx'),
+                                    input_data_weight=weighting, norm='H^-1',
+                                    spw_ranges=(10, 40), verbose=False))
+            assert np.allclose(uvp[0].data_array[0], uvp[1].data_array[0])
+        ds.set_cache_size(None, caches=['identity_G'])
+        ds.set_cache_size(1, caches=['identity_H'])
+        assert np.allclose(ds.pspec(bls1, bls2, (0, 1), ('xx','xx'),
+                                    input_data_weight='identity', norm='H^-1',
+                                    spw_ranges=(10, 40), verbose=False).data_array[0],
+                           uvp[0].data_array[0])
+
+        # matrices set by hand are never evicted
+        ds.clear_cache()
+        ds.set_cache_size(0)
+        Rkey = (0, (24, 38), 'iC', 'none')
+        R = np.eye(ds.spw_Nfreqs)
+        ds.set_R({Rkey: R})
+        ds.R(key2)
+        assert ds._R[Rkey] is R
+        assert ds.cache_stats()['R']['pinned'] == 1
+        pytest.raises(ValueError, ds.set_cache_size, 100, caches=['foo'])
+
     def test_get_Q_alt(self):
         """
         Test the Q = dC/dp function.
@@ -405,6 +468,41 @@ class Test_PSpecData(unittest.TestCase):
         # Check for error handling
         pytest.raises(ValueError, self.ds.set_Ndlys, vect_length+100)
 
+    def test_get_spw_operators(self):
+        """
+        Test the cached delay operators of a spectral window.
+        """
+        ds = pspecdata.PSpecData(dsets=self.d, wgts=self.w)
+        Nfreq = ds.Nfreqs
+        ds.set_spw((10, Nfreq-10), ndlys=Nfreq-30)
+        ds.set_symmetric_taper(False)
+        ds.set_filter_extension((5, 5))
+        ops = ds.get_spw_operators()
+        self.assertEqual(ops['m'].shape, (Nfreq-30, Nfreq-20))
+        self.assertEqual(ops['m_ext'].shape, (Nfreq-30, Nfreq-10))
+        self.assertEqual(ops['tmat'].shape, (Nfreq-20, Nfreq-10))
+        self.assertEqual(ops['sinc_matrix'].shape, (Nfreq-10, Nfreq-10))
+        self.assertTrue(np.allclose(ops['taper'], 1.))
+        # operators are reused until the spw, delays, extension or taper change
+        self.assertTrue(ds.get_spw_operators() is ops)
+        for alpha in range(ds.spw_Ndlys):
+            m = ops['m'][alpha]
+            self.assertTrue(np.allclose(ds.get_Q_alt(alpha),
+                                        np.outer(m.conj(), m)))
+        ds.set_taper('bh7')
+        ops = ds.get_spw_operators()
+        self.assertTrue(np.allclose(ops['taper'],
+                                    dspec.gen_window('bh7', Nfreq-20)))
+        ds.set_filter_extension((0, 0))
+        ds.set_spw((0, 20))
+        ops = ds.get_spw_operators()
+        self.assertEqual(ops['m'].shape, (20, 20))
+        self.assertEqual(ops['m_ext'].shape, (20, 20))
+        # sinc eigen-decomposition reproduces the sinc matrix
+        S = np.dot(ops['sinc_eigvecs'].T * ops['sinc_eigvals'],
+                   ops['sinc_eigvecs'])
+        self.assertTrue(np.allclose(S, ops['sinc_matrix'], atol=1e-12))
+
 
     def test_get_Q(self):
         """
@@ -648,6 +746,20 @@ class Test_PSpecData(unittest.TestCase):
             for j in range(self.ds.spw_Ndlys):
                 self.assertLessEqual(frac_non_herm[i,j], tol)
 
+        # Test that the factored E matrices give the same V as the dense ones
+        E = self.ds.get_unnormed_E(key1, key2)
+        U, W = self.ds._unnormed_E_operator(key1, key2)
+        self.assertEqual(U.shape, (self.ds.spw_Ndlys, self.ds.spw_Nfreqs))
+        assert np.allclose(np.einsum('ai,aj->aij', U, W), E)
+        C1 = self.ds.C_model(key1)
+        C2 = self.ds.C_model(key2)
+        P21 = self.ds.cross_covar_model(key2, key1, conj_1=False, conj_2=False)
+        S21 = self.ds.cross_covar_model(key2, key1, conj_1=True, conj_2=True)
+        V_dense = np.einsum('aij,bji', np.dot(E, C2),
+                            np.dot(np.transpose(E.conj(), (0,2,1)), C1)) \
+                  + np.einsum('aij,bji', np.dot(E, P21), np.dot(E.conj(), S21))
+        assert np.allclose(V, V_dense)
+
     def test_get_MW(self):
         n = 17
         random_G = generate_pos_def_all_pos(n)
@@ -711,6 +823,20 @@ class Test_PSpecData(unittest.TestCase):
             for norm in test_norm:
                 self.assertAlmostEqual(norm, 1.)
 
+        # Test that stacks of matrices give the stacks of M and W, including
+        # singular H matrices that are pseudo-inverted
+        Gs = np.array([random_G, random_H, random_V])
+        Hs = np.array([random_H, random_V, np.ones((n, n))])
+        Vs = np.array([random_V, random_G, random_H])
+        for mode in ['H^-1', 'V^-1/2', 'I']:
+            M, W = self.ds.get_MW(Gs, Hs, mode=mode, band_covar=Vs)
+            self.assertEqual(M.shape, (3, n, n))
+            self.assertEqual(W.shape, (3, n, n))
+            for i in range(3):
+                M_i, W_i = self.ds.get_MW(Gs[i], Hs[i], mode=mode, band_covar=Vs[i])
+                assert np.allclose(M[i], M_i)
+                assert np.allclose(W[i], W_i)
+
     def test_cov_q(self, ndlys=13):
         """
         Test that q_hat_cov has the right shape and accepts keys in correct
@@ -783,6 +909,13 @@ class Test_PSpecData(unittest.TestCase):
                 else:
                     self.assertTrue(np.isclose(0., cov_p[0, p, q], atol=1e-6))
 
+        # stacks of M and q covariances, e.g. of many times
+        M = np.random.normal(size=(4, 10, 10))
+        q_cov = np.random.normal(size=(4, 10, 10))
+        cov_p = self.ds.cov_p_hat(M, q_cov)
+        for t in range(4):
+            assert np.allclose(cov_p[t], np.dot(M[t], np.dot(q_cov[t], M[t].T)))
+
 
     def test_R_truncation(self):
         """
@@ -833,6 +966,107 @@ class Test_PSpecData(unittest.TestCase):
         ds1.set_filter_extension([10,10])
         rm1 = ds1.R(key1)
 
+    def test_data_cubes(self):
+        ds = pspecdata.PSpecData(dsets=copy.deepcopy(self.d), wgts=self.w,
+                                 dsets_std=copy.deepcopy(self.d))
+        ds.set_spw((10, 40))
+        ds.set_filter_extension((2, 3))
+        keys = [(0, (24, 25), 'xx'), (0, (25, 24), 'xx'), (1, 37, 38, 'xx')]
+        ref = [[ds.x(k), ds.w(k), ds.dx(k), ds.x(k, include_extension=True)]
+               for k in keys]
+        ds._set_data_cubes(keys + [(0, (1000, 1001), 'xx')])
+        for k, r in zip(keys, ref):
+            out = [ds.x(k), ds.w(k), ds.dx(k), ds.x(k, include_extension=True)]
+            for a, b in zip(out, r):
+                assert np.array_equal(a, b)
+            # views into the cubes are contiguous and read-only
+            assert out[0].flags['C_CONTIGUOUS']
+            assert not out[0].flags['WRITEABLE']
+        assert len(ds._data_cube_view('x', 0, (24, 25, 'xx'))) == 35
+        # absent baselines fall back to the datasets
+        assert ds._data_cube_view('x', 0, (1000, 1001, 'xx')) is None
+        assert ds._data_cube_view('x', 0, (37, 38, 'xx')) is None
+
+        # cubes are dropped when editing the datasets and after pspec
+        ds.broadcast_dset_flags()
+        assert ds._data_cubes == {}
+        # no cubes for spectral windows extending beyond the band
+        ds.set_spw((0, 20))
+        ds._set_data_cubes(keys)
+        assert ds._data_cubes == {}
+        ds.set_spw((10, 40))
+        ds._set_data_cubes(keys)
+        assert len(ds._data_cubes) == 6
+        ds.pspec([(24, 25)], [(24, 25)], (0, 1), [('xx', 'xx')],
+                 spw_ranges=[(10, 40)], filter_extensions=[(2, 3)],
+                 symmetric_taper=False, verbose=False)
+        assert ds._data_cubes == {}
+
+    def test_dayenu_R_cache(self):
+        d = copy.deepcopy(self.d)
+        for _d in d:
+            _d.flag_array[:] = False
+        ds = pspecdata.PSpecData(dsets=d, wgts=self.w)
+        ds.set_spw((10, 30))
+        ds.set_weighting('dayenu')
+        rp = {'filter_centers': [0.], 'filter_half_widths': [250e-9],
+              'filter_factors': [1e-9]}
+        keys = [(0, 24, 25, 'xx'), (1, 24, 25, 'xx'), (0, 37, 38, 'xx')]
+        for key in keys:
+            ds.set_r_param(key, rp)
+        # baselines with the same filter parameters and flags share R
+        R = [ds.R(key) for key in keys]
+        assert R[0] is R[1] and R[0] is R[2]
+        assert ds.cache_stats()['dayenu_R']['size'] == 1
+
+        # but not with different filter parameters, flags or spw
+        ds.set_r_param(keys[1], dict(rp, filter_factors=[1e-8]))
+        ds.dsets[0].flag_array[ds.dsets[0].antpair2ind(37, 38, ordered=False), :, 15] = True
+        ds.clear_cache(caches=['R', 'Y'])
+        R = [ds.R(key) for key in keys]
+        assert not np.allclose(R[0], R[1]) and not np.allclose(R[0], R[2])
+        ds.set_spw((10, 20))
+        ds.clear_cache(caches=['R', 'Y'])
+        ds.R(keys[0])
+        assert ds.cache_stats()['dayenu_R']['size'] == 4
+
+    def test_R_diagonal(self):
+        """
+        Test that identity-weighted R matrices are stored as diagonals and
+        give the same results as dense R matrices.
+        """
+        key1 = (0, 24, 38)
+        key2 = (1, 25, 38)
+        for taper in taper_selection:
+            for symmetric_taper in [True, False]:
+                ds = pspecdata.PSpecData(dsets=copy.deepcopy(self.d), wgts=self.w)
+                ds.set_spw((10, 40), ndlys=20)
+                ds.set_taper(taper)
+                ds.set_symmetric_taper(symmetric_taper)
+                ds.dsets[0].flag_array[ds.dsets[0].antpair2ind(24, 38, ordered=False), :, 25, :] = True
+                R1 = ds._R_operator(key1)
+                self.assertEqual(R1.shape, (ds.spw_Nfreqs,))
+                self.assertTrue(np.allclose(ds.R(key1), np.diag(R1)))
+                self.assertTrue(np.allclose(ds.Y(key1), np.diag(ds._Y_diag(key1))))
+                self.assertTrue(np.isclose(R1[15], 0.0))
+                out = [ds.q_hat(key1, key2), ds.get_G(key1, key2),
+                       ds.get_H(key1, key2), ds.get_unnormed_E(key1, key2)]
+
+                # compare to dense R matrices
+                ds_dense = copy.deepcopy(ds)
+                Rkey = lambda k: (k[0], k[1:], ds.data_weighting, ds.taper)
+                ds_dense.set_R({Rkey(key1): ds.R(key1), Rkey(key2): ds.R(key2)})
+                self.assertEqual(ds_dense._R_operator(key1).ndim, 2)
+                out_dense = [ds_dense.q_hat(key1, key2), ds_dense.get_G(key1, key2),
+                             ds_dense.get_H(key1, key2), ds_dense.get_unnormed_E(key1, key2)]
+                for a, b in zip(out, out_dense):
+                    self.assertTrue(np.allclose(a, b, atol=1e-10 * np.abs(b).max()))
+
+        # filter extensions are not diagonal
+        ds.set_symmetric_taper(False)
+        ds.set_filter_extension((5, 5))
+        self.assertEqual(ds._R_operator(key1).shape, (30, 40))
+
 
     def test_q_hat(self):
         """
@@ -909,6 +1143,45 @@ class Test_PSpecData(unittest.TestCase):
         #Test if error is raised when one tried FFT approach on exact_norm
         pytest.raises(NotImplementedError, self.ds.q_hat, key1, key2, exact_norm=True, allow_fft = True)
 
+    def test_q_hat_batch(self):
+        """
+        Test that q_hat_batch matches q_hat for each baseline-pair.
+        """
+        self.ds = pspecdata.PSpecData(dsets=self.d, wgts=self.w)
+        Nfreq = self.ds.Nfreqs
+        Ntime = self.ds.Ntimes
+        keys1 = [(0, 24, 38), (0, 24, 38), (1, 25, 38), (0, (25, 38), 'xx')]
+        keys2 = [(1, 25, 38), (0, 24, 38), (1, 24, 38), (1, (24, 38), 'xx')]
+
+        for ndlys, allow_fft in [(Nfreq - 3, False), (Nfreq, True)]:
+            self.ds.set_spw((0, Nfreq), ndlys=ndlys)
+            for input_data_weight in ['identity', 'iC']:
+                self.ds.set_weighting(input_data_weight)
+                for taper in taper_selection:
+                    self.ds.set_taper(taper)
+                    q = self.ds.q_hat_batch(keys1, keys2, allow_fft=allow_fft)
+                    self.assertEqual(q.shape, (len(keys1), ndlys, Ntime))
+                    for i, (key1, key2) in enumerate(zip(keys1, keys2)):
+                        q_hat = self.ds.q_hat(key1, key2, allow_fft=allow_fft)
+                        self.assertTrue(np.allclose(q[i], q_hat,
+                                        atol=1e-10 * np.abs(q_hat).max()))
+
+        # R matrices set with set_R are not shared with baselines of the
+        # same flag pattern
+        self.ds.set_weighting('identity')
+        self.ds.set_R({self.ds._R_key((0, 24, 38)): 2. * np.ones(Nfreq)})
+        q = self.ds.q_hat_batch(keys1, keys2)
+        for i, (key1, key2) in enumerate(zip(keys1, keys2)):
+            self.assertTrue(np.allclose(q[i], self.ds.q_hat(key1, key2)))
+
+        # lists of keys and exact_norm fall back to q_hat
+        key3 = [(0, 24, 38), (0, 24, 38)]
+        q = self.ds.q_hat_batch([key3], [(1, 25, 38)])
+        self.assertTrue(np.allclose(q[0], self.ds.q_hat(key3, (1, 25, 38))))
+        pytest.raises(AssertionError, self.ds.q_hat_batch, keys1, keys2[:2])
+        pytest.raises(NotImplementedError, self.ds.q_hat_batch, keys1, keys2,
+                      exact_norm=True, allow_fft=True)
+
     def test_get_H(self):
         """
         Test Fisher/weight matrix calculation.
@@ -1008,6 +1281,47 @@ class Test_PSpecData(unittest.TestCase):
                         self.assertLessEqual(G_diff_norm,
                                              matrix_scale * multiplicative_tolerance)
 
+    def test_norm_engine(self):
+        """
+        Test that the rank-1 G/H engine matches explicit trace evaluation.
+        """
+        self.ds = pspecdata.PSpecData(dsets=self.d, wgts=self.w)
+        Nfreq = self.ds.Nfreqs
+        key1 = (0, 24, 38)
+        key2 = (1, 25, 38)
+        pytest.raises(ValueError, self.ds.set_norm_engine, 'foo')
+
+        for input_data_weight in ['identity', 'iC']:
+            self.ds.set_weighting(input_data_weight)
+            for taper in taper_selection:
+                self.ds.set_taper(taper)
+                # FFT (Ndlys == Nfreqs) and DFT-matrix paths
+                for ndlys in [Nfreq, Nfreq//3]:
+                    self.ds.set_Ndlys(ndlys)
+                    GH = {}
+                    for engine in ['einsum', 'rank1']:
+                        self.ds.set_norm_engine(engine)
+                        GH[engine] = (self.ds.get_G(key1, key2),
+                                      self.ds.get_H(key1, key2),
+                                      self.ds.get_H(key1, key2, sampling=True))
+                    for M1, M2 in zip(GH['einsum'], GH['rank1']):
+                        self.assertEqual(M1.shape, M2.shape)
+                        self.assertTrue(np.allclose(M1, M2, rtol=1e-10,
+                                            atol=1e-10 * np.abs(M1).max()))
+
+        # filter extensions with non-square R matrices
+        ds1 = pspecdata.PSpecData(dsets=self.d, wgts=self.w)
+        ds1.set_spw((10, Nfreq-10), ndlys=Nfreq-30)
+        ds1.set_symmetric_taper(False)
+        ds1.set_filter_extension((10, 10))
+        GH = {}
+        for engine in ['einsum', 'rank1']:
+            ds1.set_norm_engine(engine)
+            GH[engine] = (ds1.get_G(key1, key2), ds1.get_H(key1, key2))
+        for M1, M2 in zip(GH['einsum'], GH['rank1']):
+            self.assertTrue(np.allclose(M1, M2, rtol=1e-10,
+                                        atol=1e-10 * np.abs(M1).max()))
+
 
     """
     Under Construction
@@ -1311,6 +1625,19 @@ class Test_PSpecData(unittest.TestCase):
         assert( ((0, 0), ((bls1[0][0],bls1[0][1] ,"xx"),(bls1[0][0],bls1[0][1] ,"xx")), 'empirical', None, False, True,) in ds._C.keys())
         ds.C_model(key, model='autos', time_index=0)
         assert( ((0, 0), ((bls1[0][0],bls1[0][1] ,"xx"), (bls1[0][0],bls1[0][1] ,"xx")), 'autos', 0, False, True,) in ds._C.keys())
+        # diagonals of the covariance model at all times at once
+        C_diag = ds._C_diag_times(key, 'autos', np.arange(uvd.Ntimes))
+        assert C_diag.shape == (uvd.Ntimes, spws[0][1]-spws[0][0])
+        assert np.allclose(C_diag[-1], np.diag(ds.C_model(key, model='autos', time_index=uvd.Ntimes-1)))
+        pytest.raises(ValueError, ds._C_diag_times, key, 'foo', [0])
+        # the autos variances are taken from cached auto-correlations, which
+        # agree with utils.variance_from_auto_correlations
+        var = utils.variance_from_auto_correlations(uvd, key[1] + (key[2],), tuple(spws[0]),
+                                                    np.arange(uvd.Ntimes))
+        assert np.allclose(C_diag, var)
+        assert len(ds._auto_cubes) == 1
+        ds._clear_data_cubes()
+        assert len(ds._auto_cubes) == 0
         for Ckey in ds._C.keys():
             assert ds._C[Ckey].shape == (spws[0][1]-spws[0][0], spws[0][1]-spws[0][0])
 
@@ -1324,6 +1651,24 @@ class Test_PSpecData(unittest.TestCase):
         assert ( Ckey in ds._C.keys())
         assert ds._C[Ckey].shape == (spws[1][1]-spws[1][0], spws[1][1]-spws[1][0])
 
+    def test_iC_batch(self):
+        ds = pspecdata.PSpecData(dsets=self.d, wgts=self.w)
+        ds.set_spw((10, 40))
+        keys = [(0, 24, 25, 'xx'), (1, 37, 38, 'xx'), (0, 24, 25, 'xx')]
+        iC = ds.iC_batch(keys)
+        assert len(iC) == 3 and iC[0] is iC[2]
+        assert ds.cache_stats()['iC']['size'] == 2
+        ds2 = pspecdata.PSpecData(dsets=self.d, wgts=self.w)
+        ds2.set_spw((10, 40))
+        for key, ic in zip(keys, iC):
+            assert np.allclose(ds2.iC(key), ic)
+
+        # user-set covariances are inverted too
+        Ckey = ((0, 0), ((24, 25, 'xx'), (24, 25, 'xx')), 'dsets', 0, False, True)
+        ds.set_C({Ckey: 2 * np.eye(ds.spw_Nfreqs)})
+        assert np.allclose(ds.iC_batch([keys[0]], model='dsets', time_index=0)[0],
+                           np.eye(ds.spw_Nfreqs) / 2)
+
     def test_get_analytic_covariance(self):
         uvd = UVData()
         uvd.read(os.path.join(DATA_PATH, 'zen.even.xx.LST.1.28828.uvOCRSA'))
@@ -1379,6 +1724,19 @@ class Test_PSpecData(unittest.TestCase):
             for cov in [cov_q_real, cov_q_imag, cov_p_real, cov_p_imag]:
                 assert np.isclose(cov.imag, 0, atol=abs(cov.real).max() / 1e10).all()
 
+        # the diag_only variances are the diagonals of the covariances, for
+        # both diagonal and non-diagonal M
+        G = ds.get_G(key1, key2)
+        H = ds.get_H(key1, key2)
+        for M in [M_, ds.get_MW(G, H, mode='H^-1')[0]]:
+            for model in ['autos', 'empirical', 'foreground_dependent']:
+                covs = ds.get_analytic_covariance(key1, key2, M=M, model=model)
+                variances = ds.get_analytic_covariance(key1, key2, M=M, model=model,
+                                                       diag_only=True)
+                for cov, var in zip(covs, variances):
+                    assert var.shape == (ds.Ntimes, ds.spw_Ndlys)
+                    assert np.allclose(np.diagonal(cov, axis1=1, axis2=2), var)
+
         # Here we generate a known_cov to be passed to ds.pspec, which stores two cov_models named 'dsets' and 'fiducial'.
         # The two models have actually the same data, while in generating output covariance, 'dsets' mode will follow the shorter
         # path where we use some optimization for diagonal matrices, while 'fiducial' mode will follow the longer path
@@ -1425,6 +1783,22 @@ class Test_PSpecData(unittest.TestCase):
         # check their cov_array are equal
         assert np.allclose(uvp_dsets_cov.cov_array_real[0], uvp_fiducial_cov.cov_array_real[0], rtol=1e-05)
 
+        # covariances are only computed once per distinct set of inputs, so
+        # inputs that only vary at the second time are not taken as uniform
+        key1, key2 = (0, bls1[0], 'xx'), (1, bls2[0], 'xx')
+        known_cov_vary = dict(known_cov_test)
+        for key in (key1, key2):
+            dset, bl = ds.parse_blkey(key)
+            for model in models:
+                known_cov_vary[((dset, dset), (bl, bl), model, 1, False, True)] = 2. * C_n_11
+        for model in models:
+            covs = ds.get_analytic_covariance(key1, key2, M=M_, model=model,
+                                              known_cov=known_cov_vary)
+            for cov in covs:
+                assert not np.allclose(cov[0], 0)
+                assert np.allclose(cov[1], 4. * cov[0])
+                assert np.allclose(cov[2:], cov[0])
+
         # check noise floor computation from auto correlations
         uvp_auto_cov = ds.pspec(bls1, bls2, (0, 1), ('xx','xx'), spw_ranges=(60, 90), store_cov=True,
                                  cov_model='autos', verbose=False, taper='bh')
@@ -1522,6 +1896,13 @@ class Test_PSpecData(unittest.TestCase):
                                        norm='I', taper='none', verbose=True, exact_norm=True)
         uvp_ext = ds_t.pspec(bls_Q, bls_Q, (0, 1), [('xx', 'xx')], input_data_weight='identity',
                                        norm='I', taper='none', verbose=True, exact_norm=False)
+        # the identity-weighting caches are cleared when the beam changes
+        assert len(ds_t._identity_G) > 0
+        ds_t.primary_beam = self.bm_Q
+        assert len(ds_t._identity_G) > 0
+        ds_t.primary_beam = self.bm
+        assert len(ds_t._identity_G) == 0 and len(ds_t._identity_MW) == 0
+        ds_t.primary_beam = self.bm_Q
         spw         = 0
         blp         = (bls_Q[0], bls_Q[0])
         key         = (spw, blp, 'xx')
@@ -1654,19 +2035,132 @@ class Test_PSpecData(unittest.TestCase):
         uvp = ds.pspec([(24, 25), (24, 25)], [(24, 25), (24, 25)], (0, 1), ('xx', 'xx'),
                        input_data_weight='identity', norm='I', taper='none', verbose=False,
                        spw_ranges=[(20, 30)])
-        assert len(ds._identity_Y) == len(ds._identity_G) == len(ds._identity_H)
-        assert len(ds._identity_Y) == 1
-        assert list(ds._identity_Y.keys())[0] == ((0, 24, 25, 'xx'), (1, 24, 25, 'xx'))
+        assert len(ds._identity_G) == len(ds._identity_H)
+        assert len(ds._identity_G) == 1
+        assert ds.identity_cache_stats == {'hits': 1, 'misses': 1}
+        GHkey = ds._identity_GH_key((0, 24, 25, 'xx'), (1, 24, 25, 'xx'))
+        assert list(ds._identity_G.keys())[0] == GHkey
 
         # assert caching is not used when inappropriate
         ds.dsets[0].flag_array[ds.dsets[0].antpair2ind(37, 38, ordered=False), :, 25, :] = True
         uvp = ds.pspec([(24, 25), (37, 38)], [(24, 25), (37, 38)], (0, 1), ('xx', 'xx'),
                        input_data_weight='identity', norm='I', taper='none', verbose=False,
                        spw_ranges=[(20, 30)])
-        assert len(ds._identity_Y) == len(ds._identity_G) == len(ds._identity_H)
-        assert len(ds._identity_Y) == 2
-        assert ((0, 24, 25, 'xx'), (1, 24, 25, 'xx')) in ds._identity_Y.keys()
-        assert ((0, 37, 38, 'xx'), (1, 37, 38, 'xx')) in ds._identity_Y.keys()
+        assert len(ds._identity_G) == len(ds._identity_H)
+        assert len(ds._identity_G) == 2
+        # (24, 25) is reused from the previous call
+        assert ds.identity_cache_stats == {'hits': 2, 'misses': 2}
+        assert len(ds._identity_MW) == 2
+        assert ds._identity_GH_key((0, 24, 25, 'xx'), (1, 24, 25, 'xx')) in ds._identity_G
+        assert ds._identity_GH_key((0, 37, 38, 'xx'), (1, 37, 38, 'xx')) in ds._identity_G
+        # cache keys depend on the spectral window settings
+        ds.set_taper('bh7')
+        assert ds._identity_GH_key((0, 24, 25, 'xx'), (1, 24, 25, 'xx')) not in ds._identity_G
+
+        # normalization caches are reused across spws and pspec calls, and
+        # give the same power spectra as a fresh PSpecData object
+        bls = [(24, 25), (37, 38)]
+        kwargs = dict(input_data_weight='identity', norm='I', taper='bh7',
+                      verbose=False, spw_ranges=[(20, 30), (30, 40)])
+        uvp1 = ds.pspec(bls, bls, (0, 1), ('xx', 'xx'), **kwargs)
+        misses = ds.identity_cache_stats['misses']
+        uvp2 = ds.pspec(bls, bls, (0, 1), ('xx', 'xx'), **kwargs)
+        assert ds.identity_cache_stats['misses'] == misses
+        assert np.allclose(uvp1.data_array[0], uvp2.data_array[0])
+        ds_new = pspecdata.PSpecData(dsets=copy.deepcopy(ds.dsets), wgts=[None, None],
+                                     beam=self.bm)
+        uvp3 = ds_new.pspec(bls, bls, (0, 1), ('xx', 'xx'), **kwargs)
+        assert np.allclose(uvp2.data_array[0], uvp3.data_array[0])
+        assert np.allclose(uvp2.data_array[1], uvp3.data_array[1])
+
+        # on-disk normalization cache is filled by one PSpecData object and
+        # read back by another one, giving the same power spectra
+        if os.path.exists('./norm_cache'):
+            shutil.rmtree('./norm_cache')
+        for i in range(2):
+            ds_new = pspecdata.PSpecData(dsets=copy.deepcopy(ds.dsets), wgts=[None, None],
+                                         beam=self.bm)
+            ds_new.set_norm_cache_dir('./norm_cache')
+            uvp4 = ds_new.pspec(bls, bls, (0, 1), ('xx', 'xx'), **kwargs)
+            stats = ds_new._norm_disk_cache.stats()
+            if i == 0:
+                assert stats['hits'] == 0 and stats['misses'] > 0
+            else:
+                assert stats['misses'] == 0 and stats['hits'] > 0
+            assert np.allclose(uvp2.data_array[0], uvp4.data_array[0])
+            assert np.allclose(uvp2.data_array[1], uvp4.data_array[1])
+        # exact_norm normalization depends on the beam and is not persisted
+        assert ds_new._norm_disk_key((0, 24, 25, 'xx'), (1, 24, 25, 'xx'),
+                                     exact_norm=True) is None
+        ds_new.set_norm_cache_dir(None)
+        assert ds_new._norm_disk_key((0, 24, 25, 'xx'), (1, 24, 25, 'xx')) is None
+        shutil.rmtree('./norm_cache')
+
+    def test_pspec_nprocs(self):
+        uvd = copy.deepcopy(self.uvd)
+        ds = pspecdata.PSpecData(dsets=[uvd, uvd], wgts=[None, None], beam=self.bm)
+        bls = [(24, 25), (37, 38), (38, 39), (52, 53), (24, 25)]
+        kwargs = dict(input_data_weight='identity', norm='I', taper='bh7',
+                      spw_ranges=[(10, 20), (30, 45)], store_cov=True,
+                      cov_model='empirical', verbose=False)
+        uvp = ds.pspec(bls, bls, (0, 1), ('xx', 'xx'), **kwargs)
+
+        # sharded runs are identical to the serial run
+        uvp2 = ds.pspec(bls, bls, (0, 1), ('xx', 'xx'), nprocs=3, **kwargs)
+        with ProcessPoolExecutor(2) as executor:
+            uvp3 = ds.pspec(bls, bls, (0, 1), ('xx', 'xx'), nprocs=2,
+                            executor=executor, **kwargs)
+        for u in [uvp2, uvp3]:
+            for attr in ['blpair_array', 'time_1_array', 'lst_avg_array',
+                         'bl_array', 'bl_vecs', 'label_1_array']:
+                assert np.array_equal(getattr(uvp, attr), getattr(u, attr))
+            assert (u.Nblpairs, u.Nblpairts, u.Nbls) \
+                   == (uvp.Nblpairs, uvp.Nblpairts, uvp.Nbls)
+            for spw in [0, 1]:
+                for attr in ['data_array', 'wgt_array', 'integration_array',
+                             'cov_array_real', 'window_function_array']:
+                    assert np.array_equal(getattr(uvp, attr)[spw],
+                                          getattr(u, attr)[spw])
+
+        # more processes than baseline pairs
+        uvp4 = ds.pspec(bls[:2], bls[:2], (0, 1), ('xx', 'xx'), nprocs=4, **kwargs)
+        assert uvp4.Nblpairs == 2
+        pytest.raises(AssertionError, ds.pspec, bls, bls, (0, 1), ('xx', 'xx'),
+                      nprocs=0, **kwargs)
+
+    def test_pspec_iter(self):
+        uvd = copy.deepcopy(self.uvd)
+        ds = pspecdata.PSpecData(dsets=[uvd, uvd], wgts=[None, None], beam=self.bm)
+        bls = [(24, 25), (37, 38), (38, 39), (52, 53), (24, 25)]
+        kwargs = dict(input_data_weight='identity', norm='I', taper='bh7',
+                      spw_ranges=[(10, 20), (30, 45)], store_cov=True,
+                      cov_model='empirical', verbose=False)
+        uvp = ds.pspec(bls, bls, (0, 1), ('xx', 'xx'), **kwargs)
+
+        # the beam scalars are only computed for the first chunk
+        calls = []
+        scalar = ds.scalar
+        ds.scalar = lambda *args, **kw: calls.append(args) or scalar(*args, **kw)
+        uvps = list(ds.pspec_iter(bls, bls, (0, 1), ('xx', 'xx'),
+                                  Nblps_per_chunk=2, **kwargs))
+        assert [u.Nblpairs for u in uvps] == [2, 2, 1]
+        assert len(calls) == 2
+        assert ds._iter_scalars is None
+        del ds.scalar
+        uvp2 = pspecdata._concat_blpair_shards(uvps)
+        assert np.array_equal(uvp.blpair_array, uvp2.blpair_array)
+        for spw in [0, 1]:
+            assert np.array_equal(uvp.data_array[spw], uvp2.data_array[spw])
+            assert np.array_equal(uvp.cov_array_real[spw], uvp2.cov_array_real[spw])
+
+        # by default, all 5 baseline pairs fit in one chunk
+        uvps = list(ds.pspec_iter(bls, bls, (0, 1), ('xx', 'xx'), **kwargs))
+        assert len(uvps) == 1
+        assert np.array_equal(uvp.data_array[0], uvps[0].data_array[0])
+
+        # the generator is lazy, so errors are raised upon iteration
+        gen = ds.pspec_iter(bls, bls, (0, 1), ('xx', 'xx'), Nblps_per_chunk=0)
+        pytest.raises(AssertionError, next, gen)
 
     def test_normalization(self):
         # Test Normalization of pspec() compared to PAPER legacy techniques
@@ -1753,6 +2247,17 @@ class Test_PSpecData(unittest.TestCase):
         assert ds.dsets[0].get_flags(24, 25)[3, 400:800].all()
         assert ds.dsets[0].get_flags(24, 25)[3, :].all() == False
 
+        # test baselines with differing numbers of times
+        uvd2 = copy.deepcopy(uvd)
+        blt_inds = np.delete(np.arange(uvd2.Nblts),
+                             uvd2.antpair2ind(37, 38, ordered=False)[:2])
+        uvd2.select(blt_inds=blt_inds)
+        ds2 = pspecdata.PSpecData(dsets=[uvd2, copy.deepcopy(uvd)], wgts=[None, None])
+        ds2.dsets[0].flag_array[ds2.dsets[0].antpair2ind(24, 25, ordered=False)[3], 0, 600, 0] = True
+        ds2.broadcast_dset_flags(spw_ranges=[(400, 800)], time_thresh=0.25, unflag=False)
+        assert np.all(ds2.dsets[0].get_flags(24, 25) == ds.dsets[0].get_flags(24, 25))
+        assert ds2.dsets[0].get_flags(37, 38).shape[0] == uvd.Ntimes - 2
+
         # test pspec run sets flagged integration to have zero weight
         uvd.flag_array[uvd.antpair2ind(24, 25, ordered=False)[3], 0, 400, :] = True
         ds = pspecdata.PSpecData(dsets=[copy.deepcopy(uvd), copy.deepcopy(uvd)], wgts=[None, None])
@@ -1860,6 +2365,90 @@ class Test_PSpecData(unittest.TestCase):
         pspecdata.validate_blpairs(blpairs, uvd, uvd)
 
 
+def test_prefetch():
+    calls = []
+    def read(i):
+        calls.append(i)
+        if i == 3:
+            raise ValueError("bad read")
+        return 2 * i
+    assert list(pspecdata._prefetch(read, [(i,) for i in range(3)])) \
+           == [0, 2, 4]
+    assert list(pspecdata._prefetch(read, [(i,) for i in range(3)],
+                                    nprefetch=2)) == [0, 2, 4]
+
+    # results are computed at most nprefetch ahead
+    calls = []
+    gen = pspecdata._prefetch(read, [(i,) for i in range(10)], nprefetch=2)
+    assert next(gen) == 0
+    assert len(calls) <= 3
+    gen.close()
+
+    # exceptions are raised when their result is reached
+    gen = pspecdata._prefetch(read, [(i,) for i in range(5)], nprefetch=2)
+    assert [next(gen) for i in range(3)] == [0, 2, 4]
+    pytest.raises(ValueError, next, gen)
+
+
+def test_inv_covariances():
+    np.random.seed(0)
+    A = np.random.normal(size=(5, 10, 12)) + 1j * np.random.normal(size=(5, 10, 12))
+    C = np.matmul(A, np.swapaxes(A.conj(), 1, 2))
+    # make two matrices singular, of rank 1 and 4
+    C[1] = np.outer(A[1, :, 0], A[1, :, 0].conj())
+    C[4] = np.matmul(A[4, :, :4], A[4, :, :4].T.conj())
+    iC, cond = pspecdata._inv_covariances(C)
+    assert np.allclose(cond[[0, 2, 3]], np.linalg.cond(C[[0, 2, 3]]))
+    assert cond[1] >= 1e9 and cond[4] >= 1e9
+    assert np.allclose(iC[[0, 2, 3]], np.linalg.inv(C[[0, 2, 3]]))
+    assert np.allclose(iC[1], np.linalg.pinv(C[1]))
+    assert np.allclose(iC[4], np.linalg.pinv(C[4]))
+    # real matrices give real inverses
+    iC, cond = pspecdata._inv_covariances(C.real)
+    assert np.isrealobj(iC)
+    assert np.allclose(iC[[1, 4]], np.linalg.pinv(C[[1, 4]].real))
+    # non-Hermitian matrices
+    C[2, 0, 1] += 1.0
+    iC, cond = pspecdata._inv_covariances(C)
+    assert np.allclose(cond, np.linalg.cond(C))
+    assert np.allclose(iC[2], np.linalg.inv(C[2]))
+    assert np.allclose(iC[1], np.linalg.pinv(C[1]))
+    iC, cond = pspecdata._inv_covariances(np.zeros((1, 3, 3)))
+    assert np.all(iC == 0) and np.isinf(cond[0])
+
+
+def test_E_traces():
+    # factored and dense E matrices give the same traces and products
+    rng = np.random.RandomState(0)
+    cplx = lambda *shape: rng.normal(size=shape) + 1j * rng.normal(size=shape)
+    U, W = cplx(4, 6), cplx(4, 6)
+    E = (U, W)
+    E_dense = np.einsum('ai,aj->aij', U, W)
+    X, Y = cplx(6, 6), cplx(6, 6)
+    dX, dY = cplx(3, 6), cplx(3, 6)
+    for op in [lambda e: e, pspecdata._E_dagger, pspecdata._E_conj,
+               pspecdata._E_transpose]:
+        F, F_dense = op(E), op(E_dense)
+        assert np.allclose(np.einsum('ai,aj->aij', *F), F_dense)
+        traces = np.einsum('aij,bji->ab', np.matmul(E_dense, X),
+                           np.matmul(F_dense, Y))
+        assert np.allclose(pspecdata._E_traces(E, X, F, Y), traces)
+        assert np.allclose(pspecdata._E_traces(E_dense, X, F_dense, Y), traces)
+        for EE, FF in [(E, F), (E_dense, F_dense)]:
+            t = pspecdata._E_traces(EE, X, FF, Y, delay_diag=True)
+            assert np.allclose(t, np.diagonal(traces))
+        traces = np.einsum('aij,bji->ab', E_dense * dX[1], F_dense * dY[1])
+        for EE, FF in [(E, F), (E_dense, F_dense)]:
+            t = pspecdata._E_traces(EE, dX, FF, dY, diag=True)
+            assert t.shape == (3, 4, 4)
+            assert np.allclose(t[1], traces)
+            t = pspecdata._E_traces(EE, dX, FF, dY, diag=True, delay_diag=True)
+            assert t.shape == (3, 4)
+            assert np.allclose(t[1], np.diagonal(traces))
+        assert np.allclose(pspecdata._E_dot(F, dX),
+                           np.einsum('aij,tj->tai', F_dense, dX))
+
+
 def test_pspec_run():
     fnames = [os.path.join(DATA_PATH, d)
               for d in ['zen.even.xx.LST.1.28828.uvOCRSA',
@@ -1935,6 +2524,117 @@ def test_pspec_run():
     # assert spw_ranges and n_dlys specification worked
     np.testing.assert_array_equal(uvp.get_spw_ranges(), [(163476562.5, 165917968.75, 25, 20), (170312500.0, 172265625.0, 20, 20)])
 
+    # test dataset pairs computed in parallel and merged from shards
+    if os.path.exists("./out2.h5"):
+        os.remove("./out2.h5")
+    ds = pspecdata.pspec_run(fnames, "./out2.h5",
+                             dsets_std=fnames_std,
+                             Jy2mK=True,
+                             beam=beamfile,
+                             blpairs=[((37, 38), (37, 38)),
+                                      ((37, 38), (52, 53))],
+                             verbose=False,
+                             overwrite=True,
+                             pol_pairs=[('xx', 'xx'), ('xx', 'xx')],
+                             dset_labels=["foo", "bar"],
+                             dset_pairs=[(0, 0), (0, 1)],
+                             spw_ranges=[(50, 75), (120, 140)],
+                             n_dlys=[20, 20],
+                             cosmo=cosmo,
+                             trim_dset_lsts=False,
+                             broadcast_dset_flags=False,
+                             cov_model='empirical',
+                             store_cov=True,
+                             dset_pair_nprocs=2,
+                             dedupe=True)
+    psc2 = container.PSpecContainer('./out2.h5')
+    assert sorted(psc2.spectra('foo_bar')) == sorted(psc.spectra('foo_bar'))
+    for psname in psc.spectra('foo_bar'):
+        uvp2 = psc2.get_pspec("foo_bar", psname)
+        uvp1 = psc.get_pspec("foo_bar", psname)
+        assert np.array_equal(uvp1.data_array[0], uvp2.data_array[0])
+        assert np.array_equal(uvp1.cov_array_real[1], uvp2.cov_array_real[1])
+        assert np.array_equal(uvp1.window_function_array[0],
+                              uvp2.window_function_array[0])
+        # the window functions are stored once per baseline-pair
+        grp = psc2.data['foo_bar'][psname]
+        assert grp['window_function_index_spw0'].shape == (uvp2.Nblpairts,)
+        assert grp['window_function_spw0'].shape[0] <= uvp2.Nblpairs
+    assert not os.path.exists("./out2.h5.shard0")
+    psc2._close()
+    os.remove("./out2.h5")
+    pytest.raises(ValueError, pspecdata.pspec_run, fnames, "./out2.h5",
+                  verbose=False, dset_pairs=[(0, 0), (0, 1)],
+                  blpairs=[((37, 38), (37, 38))], dset_pair_nprocs=2,
+                  nprocs=2)
+
+    # test out-of-core run on chunks of baseline-pairs
+    kwargs = dict(verbose=False, overwrite=True, dset_pairs=[(0, 1)],
+                  bl_len_range=(14, 15), bl_deg_range=(0, 180),
+                  spw_ranges=[(0, 25)], broadcast_dset_flags=True)
+    pspecdata.pspec_run(fnames, "./out2.h5", **kwargs)
+    # one baseline-pair per chunk
+    pspecdata.pspec_run(fnames, "./out3.h5", max_chunk_bytes=1, **kwargs)
+    psc2 = container.PSpecContainer('./out2.h5')
+    psc3 = container.PSpecContainer('./out3.h5')
+    uvp2 = psc2.get_pspec('dset0_dset1', 'dset0_x_dset1')
+    uvp3 = psc3.get_pspec('dset0_dset1', 'dset0_x_dset1')
+    assert uvp2.Nblpairs > 1
+    assert np.all(uvp2.blpair_array == uvp3.blpair_array)
+    assert np.allclose(uvp2.data_array[0], uvp3.data_array[0])
+    assert np.allclose(uvp2.integration_array[0], uvp3.integration_array[0])
+    psc2._close()
+    psc3._close()
+    # spectra are replaced, not appended to, by a new run, and reading
+    # chunks ahead gives the same result
+    pspecdata.pspec_run(fnames, "./out3.h5", max_chunk_bytes=1, nprefetch=2,
+                        **kwargs)
+    psc3 = container.PSpecContainer('./out3.h5')
+    uvp3 = psc3.get_pspec('dset0_dset1', 'dset0_x_dset1')
+    assert uvp3.Nblpairts == uvp2.Nblpairts
+    assert np.allclose(uvp2.data_array[0], uvp3.data_array[0])
+    psc3._close()
+    # window functions deduplicated across appended chunks
+    pspecdata.pspec_run(fnames, "./out3.h5", max_chunk_bytes=1, dedupe=True,
+                        **kwargs)
+    psc3 = container.PSpecContainer('./out3.h5')
+    uvp3 = psc3.get_pspec('dset0_dset1', 'dset0_x_dset1')
+    assert np.allclose(uvp2.window_function_array[0],
+                       uvp3.window_function_array[0])
+    grp = psc3.data['dset0_dset1']['dset0_x_dset1']
+    assert grp['window_function_index_spw0'].shape == (uvp3.Nblpairts,)
+    assert grp['window_function_spw0'].shape[0] <= uvp3.Nblpairs
+    psc3._close()
+    # chunks only read the datasets of their dataset pair, so the chunks
+    # of dset0_x_dset1 are not dropped if dset2 lacks their baselines
+    h5names = []
+    for i, fname in enumerate(fnames + fnames[:1]):
+        uvd = UVData()
+        uvd.read_miriad(fname)
+        if i == 2:
+            uvd.select(bls=[(37, 38)])
+        h5names.append("./chunk_dset{}.uvh5".format(i))
+        uvd.write_uvh5(h5names[-1], clobber=True)
+    h5kwargs = dict(kwargs, dset_pairs=[(0, 1), (1, 2)], file_type='uvh5')
+    pspecdata.pspec_run(h5names, "./out3.h5", max_chunk_bytes=1, **h5kwargs)
+    psc3 = container.PSpecContainer('./out3.h5')
+    uvp3 = psc3.get_pspec('dset0_dset1_dset2', 'dset0_x_dset1')
+    assert np.all(uvp2.blpair_array == uvp3.blpair_array)
+    assert np.allclose(uvp2.data_array[0], uvp3.data_array[0])
+    psc3._close()
+    for h5name in h5names:
+        os.remove(h5name)
+
+    kwargs['overwrite'] = False
+    pytest.raises(AttributeError, pspecdata.pspec_run, fnames, "./out3.h5",
+                  max_chunk_bytes=1, **kwargs)
+    uvd = UVData()
+    uvd.read_miriad(fnames[0])
+    pytest.raises(ValueError, pspecdata.pspec_run, [uvd], "./out3.h5",
+                  max_chunk_bytes=1, verbose=False)
+    os.remove("./out2.h5")
+    os.remove("./out3.h5")
+
     # test single_dset, time_interleaving, rephasing, flag broadcasting
     uvd = UVData()
     uvd.read_miriad(fnames[0])
@@ -2073,6 +2773,23 @@ def test_pspec_run():
     uvp = psc.get_pspec('dset0_dset1', 'dset0_x_dset1')
     assert uvp.Nblpairs == 1
 
+    # test lazy calibration gives the same results, also when converting
+    # the whole datasets to mK
+    uvps, units = [], []
+    for lazy_cal in [False, True]:
+        ds = pspecdata.pspec_run([dfile, dfile], "./out.h5", cals=cfile,
+                                 verbose=False, overwrite=True,
+                                 blpairs=[((23, 24), (24, 25))],
+                                 pol_pairs=[('xx', 'xx')], file_type='uvh5',
+                                 spw_ranges=[(100, 150)], cal_flag=True,
+                                 beam=beamfile, Jy2mK=True, lazy_cal=lazy_cal)
+        psc = container.PSpecContainer('./out.h5', 'rw')
+        uvps.append(psc.get_pspec('dset0_dset1', 'dset0_x_dset1'))
+        units.append([dset.vis_units for dset in ds.dsets])
+    assert units[0] == units[1]
+    assert uvps[0].vis_units == uvps[1].vis_units
+    assert np.allclose(uvps[0].data_array[0], uvps[1].data_array[0])
+
     # test exceptions
     pytest.raises(AssertionError, pspecdata.pspec_run, 'foo', "./out.h5")
     pytest.raises(AssertionError, pspecdata.pspec_run, fnames, "./out.h5", blpairs=(1, 2), verbose=False)
@@ -2137,6 +2854,32 @@ def test_input_calibration():
     np.testing.assert_array_almost_equal(pd.dsets[0].get_data(23, 24, 'xx') / g,
                                          pd.dsets_std[3].get_data(23, 24, 'xx'))
 
+    # test lazy calibration
+    kwargs = dict(wgts=[None for uv in dfiles], cals=cfiles, cal_flag=True)
+    pd = pspecdata.PSpecData(dsets=[copy.deepcopy(uv) for uv in dfiles],
+                             dsets_std=[copy.deepcopy(uv) for uv in dfiles],
+                             **kwargs)
+    pd_lazy = pspecdata.PSpecData(dsets=[copy.deepcopy(uv) for uv in dfiles],
+                                  dsets_std=[copy.deepcopy(uv) for uv in dfiles],
+                                  lazy_cal=True, **kwargs)
+    assert np.all(pd_lazy.dsets[0].get_data(23, 24, 'xx')
+                  == dfiles[0].get_data(23, 24, 'xx'))
+    for key in [(0, (23, 24), 'xx'), (0, (24, 23), 'xx')]:
+        np.testing.assert_array_almost_equal(pd.x(key), pd_lazy.x(key))
+        np.testing.assert_array_almost_equal(pd.dx(key), pd_lazy.dx(key))
+        np.testing.assert_array_almost_equal(pd.w(key), pd_lazy.w(key))
+    # only the accessed baseline is calibrated, once
+    assert pd_lazy._lazy_cal_applied == set([(0, 23, 24)])
+    assert np.all(pd_lazy.dsets[0].get_data(24, 25, 'xx')
+                  == dfiles[0].get_data(24, 25, 'xx'))
+    # broadcasting flags calibrates all baselines first
+    pd.broadcast_dset_flags()
+    pd_lazy.broadcast_dset_flags()
+    for d in range(len(dfiles)):
+        assert np.all(pd.dsets[d].flag_array == pd_lazy.dsets[d].flag_array)
+        np.testing.assert_array_almost_equal(pd.dsets[d].data_array,
+                                             pd_lazy.dsets[d].data_array)
+
     # test exceptions
     pd = pspecdata.PSpecData()
     pytest.raises(TypeError, pd.add, {'one': copy.deepcopy(dfiles[0])}, {'one': None},
@@ -32,6 +32,19 @@ def test_cov():
     w1 *= -1.0
     pytest.raises(ValueError, utils.cov, d1, w1)
 
+def test_variance_from_auto_correlations():
+    uvd = UVData()
+    uvd.read(os.path.join(DATA_PATH, 'zen.even.xx.LST.1.28828.uvOCRSA'))
+    bl = [ap for ap in uvd.get_antpairs() if ap[0] != ap[1]][0] + ('xx',)
+    var = utils.variance_from_auto_correlations(uvd, bl, (10, 20), 2)
+    assert var.shape == (10,)
+
+    # variances at many times at once
+    tinds = np.arange(uvd.Ntimes)
+    var_t = utils.variance_from_auto_correlations(uvd, bl, (10, 20), tinds)
+    assert var_t.shape == (uvd.Ntimes, 10)
+    assert np.allclose(var_t[2], var)
+
 def test_load_config():
     """
     Check YAML config file handling.
@@ -478,6 +478,56 @@ class Test_UVPSpec(unittest.TestCase):
         assert hasattr(uvp, 'data_array') == False
         if os.path.exists('./ex.hdf5'): os.remove('./ex.hdf5')
 
+        # test deduplicated window functions and covariances
+        uvp = self._add_optionals(copy.deepcopy(self.uvp))
+        for spw in uvp.spw_array:
+            uvp.cov_array_real[spw][:] = 1.
+            uvp.cov_array_real[spw][::2] = 2.
+            uvp.cov_array_imag[spw][:] = np.arange(uvp.Nblpairts)[:, None, None, None]
+        uvp.write_hdf5('./ex.hdf5', overwrite=True, dedupe=True)
+        with h5py.File('./ex.hdf5', 'r') as f:
+            assert f['window_function_spw0'].shape[0] == 1
+            assert f['cov_real_spw0'].shape[0] == 2
+            assert f['window_function_index_spw0'].shape == (uvp.Nblpairts,)
+            assert 'cov_imag_index_spw0' not in f
+        uvp2 = uvpspec.UVPSpec()
+        uvp2.read_hdf5('./ex.hdf5')
+        assert uvp == uvp2
+        uvp2.read_hdf5('./ex.hdf5', bls=[(1, 2)])
+        assert uvp2 == uvp.select(bls=[(1, 2)], inplace=False)
+        times = np.unique(uvp.time_avg_array)[1:3]
+        uvp2.read_hdf5('./ex.hdf5', times=times,
+                       polpairs=[uvp.polpair_array[0]])
+        assert uvp2 == uvp.select(times=times, polpairs=[uvp.polpair_array[0]],
+                                  inplace=False)
+        if os.path.exists('./ex.hdf5'): os.remove('./ex.hdf5')
+
+        # appended slices are deduplicated against the stored ones
+        uvp_a = uvp.select(times=np.unique(uvp.time_avg_array)[:5],
+                           inplace=False)
+        uvp_b = uvp.select(times=np.unique(uvp.time_avg_array)[5:],
+                           inplace=False)
+        with h5py.File('./ex.hdf5', 'w') as f:
+            uvp_a.write_to_group(f, appendable=True, dedupe=True)
+            uvp_b.append_to_group(f)
+            assert f['window_function_spw0'].shape[0] == 1
+            assert f['cov_real_spw0'].shape[0] == 2
+            assert f['cov_imag_spw0'].shape[0] == uvp.Nblpairts
+            assert f['window_function_index_spw0'].shape == (uvp.Nblpairts,)
+        uvp2.read_hdf5('./ex.hdf5')
+        for spw in uvp.spw_array:
+            for u, u2 in [(uvp_a, uvp2.select(times=uvp_a.time_avg_array,
+                                               inplace=False)),
+                          (uvp_b, uvp2.select(times=uvp_b.time_avg_array,
+                                              inplace=False))]:
+                assert np.array_equal(u.window_function_array[spw],
+                                      u2.window_function_array[spw])
+                assert np.array_equal(u.cov_array_real[spw],
+                                      u2.cov_array_real[spw])
+                assert np.array_equal(u.cov_array_imag[spw],
+                                      u2.cov_array_imag[spw])
+        if os.path.exists('./ex.hdf5'): os.remove('./ex.hdf5')
+
     def test_sense(self):
         uvp = copy.deepcopy(self.uvp)
 
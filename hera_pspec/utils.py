@@ -94,11 +94,13 @@ def variance_from_auto_correlations(uvd, bl, spw_range, time_index):
     spw_range : tuple
         Length-2 tuple of the spectral window
 
-    time_index : int
+    time_index : int or array_like of int
+        Time index, or indices to compute the variance at several times
+        at once.
 
     Returns
     -------
-    var : ndarray, (spw_Nfreqs,)
+    var : ndarray, (spw_Nfreqs,) or (Ntimes, spw_Nfreqs)
 
     """
     assert isinstance(bl, tuple) and len(bl)==3, "bl must be fed as Length-3 tuple"
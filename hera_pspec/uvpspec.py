@@ -1,6 +1,6 @@
 import numpy as np
 from collections import OrderedDict as odict
-import os, copy, shutil, operator, ast, fnmatch
+import os, copy, shutil, operator, ast, fnmatch, hashlib
 from pyuvdata import utils as uvutils
 import h5py
 import warnings
@@ -1423,7 +1423,8 @@ class UVPSpec(object):
                                  only_pairs_in_bls=only_pairs_in_bls)
 
 
-    def write_to_group(self, group, run_check=True):
+    def write_to_group(self, group, run_check=True, appendable=False,
+                       dedupe=False):
         """
         Write UVPSpec data into an HDF5 group.
 
@@ -1436,8 +1437,23 @@ class UVPSpec(object):
         run_check : bool, optional
             Whether to run a validity check on the UVPSpec object before
             writing it to the HDF5 group. Default: True.
-        """
 
+        appendable : bool, optional
+            If True, write the arrays indexed by baseline-pair time (and by
+            baseline) as chunked datasets that can be resized along that
+            axis, so that more baseline-pairs can later be added with
+            append_to_group. Default: False.
+
+        dedupe : bool, optional
+            If True, store only the distinct baseline-pair time slices of
+            the window function and covariance arrays, together with an
+            index dataset mapping each baseline-pair time to its slice.
+            These are often the same for all times of a baseline-pair, or
+            for all baseline-pairs, in which case this shrinks them by up
+            to a factor of Nblpairts. They are expanded again on read. If
+            appendable is True, the slices appended with append_to_group
+            are deduplicated against the stored ones. Default: False.
+        """
         # Run check
         if run_check: self.check()
 
@@ -1462,47 +1478,174 @@ class UVPSpec(object):
 
         for k in self._meta_dsets:
             if hasattr(self, k):
-                group.create_dataset(k, data=getattr(self, k))
+                _create_dataset(group, k, getattr(self, k),
+                                axis=_append_axes.get(k) if appendable else None)
+        if appendable:
+            _append_index(group, self)
 
         # Iterate over spectral windows and create datasets
+        axis = 0 if appendable else None
         for i in np.unique(self.spw_array):
-            group.create_dataset("data_spw{}".format(i),
-                                 data=self.data_array[i],
-                                 dtype=np.complex128)
-            group.create_dataset("wgt_spw{}".format(i),
-                                 data=self.wgt_array[i],
-                                 dtype=np.float64)
-            group.create_dataset("integration_spw{}".format(i),
-                                 data=self.integration_array[i],
-                                 dtype=np.float64)
-            group.create_dataset("nsample_spw{}".format(i),
-                                 data=self.nsample_array[i],
-                                 dtype=np.float)
+            _create_dataset(group, "data_spw{}".format(i), self.data_array[i],
+                            dtype=np.complex128, axis=axis)
+            _create_dataset(group, "wgt_spw{}".format(i), self.wgt_array[i],
+                            dtype=np.float64, axis=axis)
+            _create_dataset(group, "integration_spw{}".format(i),
+                            self.integration_array[i], dtype=np.float64,
+                            axis=axis)
+            _create_dataset(group, "nsample_spw{}".format(i),
+                            self.nsample_array[i], dtype=np.float, axis=axis)
+            create = _create_deduped_dataset if dedupe else _create_dataset
             if hasattr(self, "window_function_array"):
-                group.create_dataset("window_function_spw{}".format(i),
-                                     data=self.window_function_array[i],
-                                     dtype=np.float64)
+                create(group, "window_function_spw{}".format(i),
+                       self.window_function_array[i], dtype=np.float64,
+                       axis=axis)
             if hasattr(self, "cov_array_real"):
-                group.create_dataset("cov_real_spw{}".format(i),
-                                     data=self.cov_array_real[i],
-                                     dtype=np.float64)
-                group.create_dataset("cov_imag_spw{}".format(i),
-                                     data=self.cov_array_imag[i],
-                                     dtype=np.float64)
+                create(group, "cov_real_spw{}".format(i),
+                       self.cov_array_real[i], dtype=np.float64, axis=axis)
+                create(group, "cov_imag_spw{}".format(i),
+                       self.cov_array_imag[i], dtype=np.float64, axis=axis)
 
         # Store any statistics arrays
         if hasattr(self, "stats_array"):
             for s in self.stats_array.keys():
                 data = self.stats_array[s]
                 for i in np.unique(self.spw_array):
-                    group.create_dataset("stats_{}_{}".format(s, i),
-                                         data=data[i], dtype=data[i].dtype)
+                    _create_dataset(group, "stats_{}_{}".format(s, i), data[i],
+                                    dtype=data[i].dtype, axis=axis)
 
         # denote as a uvpspec object
         group.attrs['pspec_type'] = self.__class__.__name__
 
+    def append_to_group(self, group, run_check=True):
+        """
+        Append the baseline-pair times of this UVPSpec object to a UVPSpec
+        stored in an HDF5 group by write_to_group(..., appendable=True).
+
+        Only the datasets indexed by baseline-pair time are extended, so
+        the spectra already in the group are not read back. The sorted
+        unique baseline-pairs and times of the stored object are kept in
+        the group to update Nblpairs and Ntimes, so the cost of an append
+        does not grow with the number of stored baseline-pair times, unless
+        baseline-pairs that are already stored are appended again. The
+        spectral windows, delays, polarization pairs and the data,
+        covariance, window function and statistics arrays present must match
+        those of the stored object, and the baseline-pair times appended
+        must not be stored already.
 
-    def write_hdf5(self, filepath, overwrite=False, run_check=True):
+        Parameters
+        ----------
+        group : HDF5 group
+            The handle of the HDF5 group holding an appendable UVPSpec.
+
+        run_check : bool, optional
+            Whether to run a validity check on the UVPSpec object before
+            writing it to the HDF5 group. Default: True.
+        """
+        # Run check
+        if run_check: self.check()
+
+        # Check that the stored object can be appended to
+        if group['blpair_array'].maxshape[0] is not None:
+            raise ValueError("UVPSpec in group was not written with "
+                             "appendable=True.")
+        for k in ['spw_array', 'freq_array', 'dly_array', 'polpair_array',
+                  'spw_dly_array', 'spw_freq_array', 'scalar_array', 'labels']:
+            stored = group[k][()] if k in group else group.attrs[k]
+            if k == 'labels':
+                stored = [l.decode() if isinstance(l, bytes) else l
+                          for l in stored]
+            if not np.array_equal(stored, getattr(self, k)):
+                raise ValueError("Cannot append UVPSpec with a different "
+                                 "{} than the stored one.".format(k))
+        dsets = []
+        for i in np.unique(self.spw_array):
+            dsets += ["data_spw{}".format(i), "wgt_spw{}".format(i),
+                      "integration_spw{}".format(i), "nsample_spw{}".format(i)]
+            if hasattr(self, "window_function_array"):
+                dsets.append("window_function_spw{}".format(i))
+            if hasattr(self, "cov_array_real"):
+                dsets += ["cov_real_spw{}".format(i), "cov_imag_spw{}".format(i)]
+            if hasattr(self, "stats_array"):
+                dsets += ["stats_{}_{}".format(s, i) for s in self.stats_array]
+        stored = [k for k in group
+                  if k.split('_spw')[0] in ['data', 'wgt', 'integration',
+                                            'nsample', 'window_function',
+                                            'cov_real', 'cov_imag']
+                  or k.startswith('stats_')]
+        if sorted(dsets) != sorted(stored):
+            raise ValueError("Cannot append UVPSpec with different data "
+                             "arrays than the stored one.")
+
+        # Check that no baseline-pair time is stored already. Only the rows
+        # of baseline-pairs that are stored already have to be compared
+        blpairs, times = _append_index(group)
+        common = np.intersect1d(blpairs, self.blpair_array)
+        if len(common) > 0:
+            stored_blpairs = group['blpair_array'][:]
+            rows = np.isin(stored_blpairs, common)
+            stored = set(zip(stored_blpairs[rows],
+                             group['time_avg_array'][:][rows]))
+            rows = np.isin(self.blpair_array, common)
+            for blpt in zip(self.blpair_array[rows], self.time_avg_array[rows]):
+                if blpt in stored:
+                    raise ValueError("Cannot append baseline-pair {} at "
+                                     "time {}, which is already stored."
+                                     "".format(*blpt))
+
+        # Extend datasets along the baseline-pair time axis
+        Nold = group['blpair_array'].shape[0]
+        for k, axis in _append_axes.items():
+            if k in ['bl_array', 'bl_vecs']:
+                continue
+            _extend_dataset(group[k], getattr(self, k), Nold, axis=axis)
+        for i in np.unique(self.spw_array):
+            _extend_dataset(group["data_spw{}".format(i)],
+                            self.data_array[i], Nold)
+            _extend_dataset(group["wgt_spw{}".format(i)],
+                            self.wgt_array[i], Nold)
+            _extend_dataset(group["integration_spw{}".format(i)],
+                            self.integration_array[i], Nold)
+            _extend_dataset(group["nsample_spw{}".format(i)],
+                            self.nsample_array[i], Nold)
+            if hasattr(self, "window_function_array"):
+                _extend_deduped_dataset(group, "window_function_spw{}".format(i),
+                                        self.window_function_array[i], Nold)
+            if hasattr(self, "cov_array_real"):
+                _extend_deduped_dataset(group, "cov_real_spw{}".format(i),
+                                        self.cov_array_real[i], Nold)
+                _extend_deduped_dataset(group, "cov_imag_spw{}".format(i),
+                                        self.cov_array_imag[i], Nold)
+            if hasattr(self, "stats_array"):
+                for s in self.stats_array:
+                    _extend_dataset(group["stats_{}_{}".format(s, i)],
+                                    self.stats_array[s][i], Nold)
+
+        # Merge new baselines, sorted by antenna pair
+        bls = group['bl_array'][:]
+        new = ~np.isin(self.bl_array, bls)
+        if np.any(new):
+            bl_vecs = odict(zip(bls, group['bl_vecs'][:]))
+            bl_vecs.update(zip(self.bl_array[new], self.bl_vecs[new]))
+            bls = sorted(bl_vecs.keys(), key=self.bl_to_antnums)
+            for k, data in [('bl_array', np.array(bls)),
+                            ('bl_vecs', np.array([bl_vecs[bl] for bl in bls]))]:
+                group[k].resize(len(bls), axis=0)
+                group[k][:] = data
+
+        # Update the unique baseline-pairs and times, and summary attributes
+        blpairs = np.union1d(blpairs, self.blpair_array)
+        times = np.union1d(times, self.time_1_array)
+        for k, data in [('append_blpairs', blpairs), ('append_times', times)]:
+            group[k].resize(len(data), axis=0)
+            group[k][:] = data
+        group.attrs['Nblpairts'] = Nold + self.Nblpairts
+        group.attrs['Nblpairs'] = len(blpairs)
+        group.attrs['Ntimes'] = len(times)
+        group.attrs['Nbls'] = len(bls)
+
+    def write_hdf5(self, filepath, overwrite=False, run_check=True,
+                   dedupe=False):
         """
         Write a UVPSpec object to HDF5 file.
 
@@ -1516,6 +1659,11 @@ class UVPSpec(object):
 
         run_check : bool, optional
             Run UVPSpec validity check before writing to file. Default: True.
+
+        dedupe : bool, optional
+            If True, store only the distinct baseline-pair time slices of
+            the window function and covariance arrays. See write_to_group.
+            Default: False.
         """
         # Check output
         if os.path.exists(filepath) and overwrite is False:
@@ -1526,7 +1674,7 @@ class UVPSpec(object):
 
         # Write file
         with h5py.File(filepath, 'w') as f:
-            self.write_to_group(f, run_check=run_check)
+            self.write_to_group(f, run_check=run_check, dedupe=dedupe)
 
 
     def set_cosmology(self, new_cosmo, overwrite=False, new_beam=None,
@@ -2651,3 +2799,133 @@ def _ordered_unique(arr):
     arr = np.asarray(arr)
     _, idx = np.unique(arr, return_index=True)
     return arr[np.sort(idx)]
+
+
+# axis of the arrays written by UVPSpec.write_to_group that is resizable if
+# appendable=True, i.e. the baseline-pair time or baseline axis
+_append_axes = {'lst_1_array': 0, 'lst_2_array': 0, 'lst_avg_array': 0,
+                'time_1_array': 0, 'time_2_array': 0, 'time_avg_array': 0,
+                'blpair_array': 0, 'label_1_array': 1, 'label_2_array': 1,
+                'bl_array': 0, 'bl_vecs': 0}
+
+
+def _append_index(group, uvp=None):
+    """
+    Return the sorted unique baseline-pairs and times of a UVPSpec stored
+    in an HDF5 group by write_to_group(..., appendable=True), which are
+    kept in its 'append_blpairs' and 'append_times' datasets. These are
+    created from uvp if given, or else from the stored arrays if missing.
+    """
+    if 'append_blpairs' not in group:
+        if uvp is None:
+            blpairs = np.unique(group['blpair_array'][:])
+            times = np.unique(group['time_1_array'][:])
+        else:
+            blpairs = np.unique(uvp.blpair_array)
+            times = np.unique(uvp.time_1_array)
+        _create_dataset(group, 'append_blpairs', blpairs, axis=0)
+        _create_dataset(group, 'append_times', times, axis=0)
+    return group['append_blpairs'][:], group['append_times'][:]
+
+
+def _create_dataset(group, name, data, dtype=None, axis=None):
+    """
+    Create a dataset in an HDF5 group, which is chunked and resizable along
+    the given axis if axis is not None.
+    """
+    if axis is None:
+        return group.create_dataset(name, data=data, dtype=dtype)
+    maxshape = list(np.shape(data))
+    maxshape[axis] = None
+    return group.create_dataset(name, data=data, dtype=dtype, chunks=True,
+                                maxshape=tuple(maxshape))
+
+
+def _digest_name(name):
+    """
+    Name of the dataset holding the digests of the slices of an appendable
+    deduplicated dataset, e.g. 'cov_real_digest_spw0'.
+    """
+    return name.replace('_spw', '_digest_spw')
+
+
+def _row_digests(data):
+    """
+    SHA-1 digests of the slices of an array along its first axis.
+    """
+    return np.array([hashlib.sha1(row.tobytes()).hexdigest().encode()
+                     for row in data], dtype='S40')
+
+
+def _create_deduped_dataset(group, name, data, dtype=None, axis=None):
+    """
+    Create a dataset in an HDF5 group holding only the distinct slices of
+    data along its first axis, plus an index dataset mapping each slice of
+    data to the stored one, if there are repeated slices. These datasets
+    are expanded again by uvpspec_utils._read_rows.
+
+    If axis is not None, the datasets are resizable along the first axis,
+    the index is always written, and the digests of the stored slices are
+    kept so that _extend_deduped_dataset can match appended slices.
+    """
+    data = np.ascontiguousarray(data, dtype=dtype)
+    if axis is not None:
+        digests = _row_digests(data)
+        _, first, index = np.unique(digests, return_index=True,
+                                    return_inverse=True)
+        _create_dataset(group, uvputils._index_name(name),
+                        index.ravel().astype(np.int64), axis=0)
+        _create_dataset(group, _digest_name(name), digests[first], axis=0)
+        return _create_dataset(group, name, data[first], axis=0)
+
+    Nrows, rowsize = data.shape[0], int(np.prod(data.shape[1:]))
+    if data.size == 0:
+        return group.create_dataset(name, data=data)
+
+    # Compare slices by their bytes
+    rows = data.reshape(Nrows, rowsize)
+    rows = rows.view(np.dtype((np.void, rows.dtype.itemsize * rowsize)))[:, 0]
+    _, first, index = np.unique(rows, return_index=True, return_inverse=True)
+    if len(first) == Nrows:
+        return group.create_dataset(name, data=data)
+    group.create_dataset(uvputils._index_name(name), data=index.ravel())
+    return group.create_dataset(name, data=data[first])
+
+
+def _extend_deduped_dataset(group, name, data, start):
+    """
+    Append the slices of data along its first axis to a dataset of an HDF5
+    group from index start, or, if the dataset was written by
+    _create_deduped_dataset, append its index and only the slices that are
+    not stored yet.
+    """
+    index_name = uvputils._index_name(name)
+    if index_name not in group:
+        return _extend_dataset(group[name], data, start)
+    dset, digest_dset = group[name], group[_digest_name(name)]
+    data = np.ascontiguousarray(data, dtype=dset.dtype)
+    Nstored = digest_dset.shape[0]
+    lookup = dict(zip(digest_dset[:], range(Nstored)))
+    digests = _row_digests(data)
+    index = np.empty(len(data), np.int64)
+    new = []
+    for i, digest in enumerate(digests):
+        if digest not in lookup:
+            lookup[digest] = Nstored + len(new)
+            new.append(i)
+        index[i] = lookup[digest]
+    if len(new) > 0:
+        _extend_dataset(digest_dset, digests[new], Nstored)
+        _extend_dataset(dset, data[new], Nstored)
+    _extend_dataset(group[index_name], index, start)
+
+
+def _extend_dataset(dset, data, start, axis=0):
+    """
+    Resize a dataset along axis and write data into it from index start.
+    """
+    stop = start + np.shape(data)[axis]
+    dset.resize(stop, axis=axis)
+    slc = [slice(None)] * dset.ndim
+    slc[axis] = slice(start, stop)
+    dset[tuple(slc)] = data
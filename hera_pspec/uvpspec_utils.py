@@ -479,7 +479,42 @@ def _get_blpairs_from_bls(uvp, bls, only_pairs_in_bls=False):
     return blp_select
 
 
-def _select(uvp, spws=None, bls=None, only_pairs_in_bls=False, blpairs=None,
+def _index_name(name):
+    """
+    Name of the index dataset of a dataset written by
+    UVPSpec.write_to_group(..., dedupe=True), e.g. 'cov_real_index_spw0'.
+    """
+    return name.replace('_spw', '_index_spw')
+
+
+def _read_rows(h5file, name, blp_select):
+    """
+    Read the baseline-pair time rows blp_select of a dataset in an HDF5
+    group, expanding datasets stored with only their distinct rows.
+
+    Parameters
+    ----------
+    h5file : h5py file descriptor or group
+        Group holding the dataset.
+
+    name : str
+        Name of the dataset, e.g. 'window_function_spw0'.
+
+    blp_select : slice or int ndarray
+        Rows to read.
+
+    Returns
+    -------
+    rows : ndarray
+        Selected rows of the dataset.
+    """
+    index = _index_name(name)
+    if index not in h5file:
+        return h5file[name][blp_select]
+    return h5file[name][()][h5file[index][()][blp_select]]
+
+
+def _select(uvp,spws=None, bls=None, only_pairs_in_bls=False, blpairs=None,
             times=None, lsts=None, polpairs=None, h5file=None):
     """
     Select function for selecting out certain slices of the data, as well
@@ -723,11 +758,20 @@ def _select(uvp, spws=None, bls=None, only_pairs_in_bls=False, blpairs=None,
                 _ints = h5file['integration_spw{}'.format(s_old)]
                 _nsmp = h5file['nsample_spw{}'.format(s_old)]
                 # assign non-required arrays
+                # these may be stored deduplicated, so their selected rows
+                # are read and expanded here
+                blp_rows = slice(None)
                 if store_window:
-                    _window_function = h5file['window_function_spw{}'.format(s_old)]
+                    _window_function = _read_rows(
+                        h5file, 'window_function_spw{}'.format(s_old),
+                        blp_select)
                 if store_cov:
-                     _cov_real = h5file["cov_real_spw{}".format(s_old)]
-                     _cov_imag = h5file["cov_imag_spw{}".format(s_old)]
+                    _cov_real = _read_rows(h5file,
+                                           "cov_real_spw{}".format(s_old),
+                                           blp_select)
+                    _cov_imag = _read_rows(h5file,
+                                           "cov_imag_spw{}".format(s_old),
+                                           blp_select)
                 _stat = odict()
                 for statname in statnames:
                     if statname not in stats:
@@ -742,6 +786,7 @@ def _select(uvp, spws=None, bls=None, only_pairs_in_bls=False, blpairs=None,
                 _ints = uvp.integration_array[s_old]
                 _nsmp = uvp.nsample_array[s_old]
                 # assign non-required arrays
+                blp_rows = blp_select
                 if store_window:
                     _window_function = uvp.window_function_array[s_old]
                 if store_cov:
@@ -762,10 +807,10 @@ def _select(uvp, spws=None, bls=None, only_pairs_in_bls=False, blpairs=None,
                 ints[s] = _ints[blp_select, polpair_select]
                 nsmp[s] = _nsmp[blp_select, polpair_select]
                 if store_window:
-                    window_function[s] = _window_function[blp_select, :, :, polpair_select]
+                    window_function[s] = _window_function[blp_rows, :, :, polpair_select]
                 if store_cov:
-                    cov_real[s] = _cov_real[blp_select, :, :, polpair_select]
-                    cov_imag[s] = _cov_imag[blp_select, :, :, polpair_select]
+                    cov_real[s] = _cov_real[blp_rows, :, :, polpair_select]
+                    cov_imag[s] = _cov_imag[blp_rows, :, :, polpair_select]
                 for statname in statnames:
                     stats[statname][s] = _stat[statname][blp_select, :, polpair_select]
             else:
@@ -775,10 +820,10 @@ def _select(uvp, spws=None, bls=None, only_pairs_in_bls=False, blpairs=None,
                 ints[s] = _ints[blp_select, :][:, polpair_select]
                 nsmp[s] = _nsmp[blp_select, :][:, polpair_select]
                 if store_window:
-                    window_function[s] = _window_function[blp_select, :, :, :][:, :, :, polpair_select]
+                    window_function[s] = _window_function[blp_rows, :, :, :][:, :, :, polpair_select]
                 if store_cov:
-                    cov_real[s] = _cov_real[blp_select, :, :, :][:, :, :, polpair_select]
-                    cov_imag[s] = _cov_imag[blp_select, :, :, :][:, :, :, polpair_select]
+                    cov_real[s] = _cov_real[blp_rows, :, :, :][:, :, :, polpair_select]
+                    cov_imag[s] = _cov_imag[blp_rows, :, :, :][:, :, :, polpair_select]
                 for statname in statnames:
                     stats[statname][s] = _stat[statname][blp_select, :, :][:, :, polpair_select]
 